@@ -0,0 +1,127 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import shutil
+import zipfile
+from typing import Iterable, List
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from UM.Logger import Logger  # type: ignore
+
+from .Settings import Settings
+
+
+class ArchiveExtractJobSignals(QObject):
+    """ Signals of an archive extract job. QRunnable is not a QObject, so it can't have signals itself. """
+
+    # Signal triggered with the list of paths of the extracted files.
+    finished = pyqtSignal(object)
+
+    # Signal triggered with a message when the archive could not be extracted.
+    failed = pyqtSignal(str)
+
+
+class ArchiveExtractJob(QRunnable):
+    """
+    Extracts the files that Cura can open from a downloaded ZIP archive on a worker thread.
+    Members are streamed to disk in chunks, so the archive is never loaded into memory. To guard against archives that
+    expand to huge amounts of data, the number of entries, the total extracted size and the compression ratio of every
+    member are limited. The sizes are counted while extracting, as the sizes in the archive itself can't be trusted.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, archive_path: str, directory: str, file_types: Iterable[str],
+                 max_entries: int = Settings.ARCHIVE_MAX_ENTRIES,
+                 max_size: int = Settings.ARCHIVE_MAX_EXTRACTED_SIZE,
+                 max_ratio: int = Settings.ARCHIVE_MAX_COMPRESSION_RATIO) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = ArchiveExtractJobSignals()
+        self._archive_path = archive_path
+        self._directory = directory
+        self._file_types = {file_type.lower() for file_type in file_types}
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._max_ratio = max_ratio
+
+    @staticmethod
+    def isArchive(file_path: str) -> bool:
+        """
+        Check if a file is a ZIP archive. Only the end of the file is read.
+        :param file_path: The path of the file.
+        :return: True if it's a ZIP archive.
+        """
+        return zipfile.is_zipfile(file_path)
+
+    def run(self) -> None:
+        shutil.rmtree(self._directory, ignore_errors=True)
+        try:
+            paths = self._extract()
+        except Exception as err:  # an exception would otherwise be lost on the worker thread
+            Logger.log("w", "Could not extract %s: %s", self._archive_path, err)
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self.signals.failed.emit(str(err))
+            return
+        self.signals.finished.emit(paths)
+
+    def _extract(self) -> List[str]:
+        """
+        Extract the members with a supported file type into the target directory.
+        :return: The paths of the extracted files.
+        """
+        paths = []  # type: List[str]
+        total_size = 0
+        with zipfile.ZipFile(self._archive_path) as archive:
+            members = archive.infolist()
+            if len(members) > self._max_entries:
+                raise ValueError("the archive has more than {} entries".format(self._max_entries))
+            os.makedirs(self._directory, exist_ok=True)
+            for member in members:
+                if not self._isSupported(member):
+                    continue
+                path = self._getTargetPath(self._getFileName(member), paths)
+                with archive.open(member) as source, open(path, "wb") as target:
+                    member_size = 0
+                    for chunk in iter(lambda: source.read(self.CHUNK_SIZE), b""):
+                        member_size += len(chunk)
+                        total_size += len(chunk)
+                        if total_size > self._max_size:
+                            raise ValueError("the archive expands to more than {} MB".format(
+                                self._max_size // 1024 // 1024))
+                        if member_size > max(member.compress_size, self.CHUNK_SIZE) * self._max_ratio:
+                            raise ValueError("{} is compressed suspiciously well".format(member.filename))
+                        target.write(chunk)
+                paths.append(path)
+        return paths
+
+    @staticmethod
+    def _getFileName(member: zipfile.ZipInfo) -> str:
+        # Archives made on Windows sometimes use backslashes as separator.
+        return member.filename.replace("\\", "/").rsplit("/", 1)[-1]
+
+    def _isSupported(self, member: zipfile.ZipInfo) -> bool:
+        name = self._getFileName(member)
+        # Skip directories and the resource forks macOS adds to archives.
+        if member.is_dir() or not name or name.startswith("._") or member.filename.startswith("__MACOSX/"):
+            return False
+        return os.path.splitext(name)[1].lower().strip(".") in self._file_types
+
+    def _getTargetPath(self, name: str, taken: List[str]) -> str:
+        """
+        Get the path to extract a member to. Members are extracted without their directories, so a crafted name can't
+        write outside the target directory. Files with the same name in different directories get a number, names
+        are compared case-insensitive as file systems on Windows and macOS are.
+        :param name: The file name of the member.
+        :param taken: The paths that were already extracted to.
+        :return: The path.
+        """
+        taken_paths = {taken_path.lower() for taken_path in taken}
+        stem, extension = os.path.splitext(name)
+        path = os.path.join(self._directory, name)
+        number = 1
+        while path.lower() in taken_paths:
+            number += 1
+            path = os.path.join(self._directory, "{} ({}){}".format(stem, number, extension))
+        return path
@@ -0,0 +1,91 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from collections import deque
+from functools import partial
+from typing import Any, Deque, Dict, Tuple, TYPE_CHECKING
+
+from PyQt5.QtNetwork import QNetworkRequest
+
+from .api.RequestHandle import RequestHandle
+from .Settings import Settings
+
+if TYPE_CHECKING:
+    from .api.AbstractApiClient import AbstractApiClient
+
+# Things are prefetched by driver and thing ID.
+PrefetchKey = Tuple["AbstractApiClient", int]
+
+
+class DetailPrefetcher:
+    """
+    Speculatively loads thing details into the drivers' detail cache, so opening them does not wait on the network.
+    Requests have low network priority and only a few run at the same time. Hovered things go before visible ones.
+    The number of API requests per session is limited, so scrolling through many results does not flood the APIs.
+    Things are prefetched while the budget allows all the requests their driver needs for the details.
+    """
+
+    def __init__(self, max_parallel: int = Settings.DETAIL_PREFETCH_MAX_PARALLEL,
+                 max_queued: int = Settings.DETAIL_PREFETCH_MAX_QUEUED,
+                 budget: int = Settings.DETAIL_PREFETCH_BUDGET) -> None:
+        self._max_parallel = max_parallel
+        self._max_queued = max_queued
+        self._budget = budget
+        self._queue = deque()  # type: Deque[PrefetchKey]
+        self._running = {}  # type: Dict[PrefetchKey, RequestHandle]
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    def prefetch(self, driver: "AbstractApiClient", thing_id: int, urgent: bool = False) -> None:
+        """
+        Queue the details of a thing for loading.
+        :param driver: The driver the thing came from.
+        :param thing_id: The thing ID.
+        :param urgent: Load before the other queued things, for example because the pointer is on it.
+        """
+        key = (driver, thing_id)
+        if self._budget < driver.thing_details_requests or key in self._running or driver.hasThingDetails(thing_id):
+            return
+        if key in self._queue:
+            if not urgent:
+                return
+            self._queue.remove(key)
+        if urgent:
+            self._queue.appendleft(key)
+        elif len(self._queue) < self._max_queued:
+            self._queue.append(key)
+        while len(self._queue) > self._max_queued:
+            self._queue.pop()
+        self._startNext()
+
+    def clear(self) -> None:
+        """
+        Drop the queued things, for example because other results are shown. Running requests are finished.
+        """
+        self._queue.clear()
+
+    def abort(self) -> None:
+        """
+        Drop the queued things and abort the running requests.
+        """
+        self.clear()
+        for request in list(self._running.values()):
+            request.abort()
+        self._running.clear()
+
+    def _startNext(self) -> None:
+        while self._queue and len(self._running) < self._max_parallel and self._budget > 0:
+            key = self._queue.popleft()
+            driver, thing_id = key
+            if driver.hasThingDetails(thing_id) or self._budget < driver.thing_details_requests:
+                continue
+            self._budget -= driver.thing_details_requests
+            on_done = partial(self._onDone, key)
+            request = driver.getThingDetails(thing_id, on_done, on_done, priority=QNetworkRequest.LowPriority)
+            if request.isRunning:
+                self._running[key] = request
+
+    def _onDone(self, key: PrefetchKey, *_: Any) -> None:
+        self._running.pop(key, None)
+        self._startNext()
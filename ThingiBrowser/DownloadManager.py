@@ -0,0 +1,205 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import heapq
+import itertools
+import os
+import tempfile
+from typing import Any, Callable, List, Optional, Tuple, TYPE_CHECKING
+
+from PyQt5.QtCore import QObject, pyqtSignal  # type: ignore
+
+from .api.JsonObject import ApiError
+from .ModelStore import ModelStore
+from .models.DownloadItem import DownloadItem
+from .models.DownloadListModel import DownloadListModel
+from .Settings import Settings
+
+if TYPE_CHECKING:
+    from .api.AbstractApiClient import AbstractApiClient
+
+
+class DownloadManager(QObject):
+    """
+    Queue for file downloads. At most a fixed number of files is transferred at the same time.
+    Waiting downloads are started by priority (highest first) and then in the order they were added.
+    Downloaded files are kept in the model store if there is one, files that are in it are not downloaded again.
+    """
+
+    # Signal triggered when the first download was queued or the last one stopped.
+    activeStateChanged = pyqtSignal()
+
+    def __init__(self, on_finished: Callable[[str], Any],
+                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                 max_parallel: int = Settings.DEFAULT_MAX_PARALLEL_DOWNLOADS, store: Optional[ModelStore] = None,
+                 parent=None) -> None:
+        super().__init__(parent)
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+        self._max_parallel = max(1, max_parallel)
+        self._store = store
+        self._model = DownloadListModel(self)
+        self._queue = []  # type: List[Tuple[int, int, DownloadItem]]
+        self._running = []  # type: List[DownloadItem]
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+
+    @property
+    def model(self) -> DownloadListModel:
+        return self._model
+
+    @property
+    def hasActiveDownloads(self) -> bool:
+        return bool(self._running or self._queue)
+
+    def setMaxParallel(self, max_parallel: int) -> None:
+        """
+        Change the number of files that may be downloaded at the same time.
+        :param max_parallel: The maximum number of parallel downloads, at least 1.
+        """
+        self._max_parallel = max(1, max_parallel)
+        self._startNext()
+
+    def enqueue(self, driver: "AbstractApiClient", file_id: int, file_name: str, priority: int = 0) -> DownloadItem:
+        """
+        Add a file to the download queue. It's started right away if there is a free slot.
+        :param driver: The driver to download the file with.
+        :param file_id: The ID of the file.
+        :param file_name: The name of the file.
+        :param priority: Downloads with a higher priority are started first.
+        :return: The download.
+        """
+        item = DownloadItem(next(self._ids), driver, file_id, file_name, priority)
+        stored_path = self._store.get(self._getStoreKey(item)) if self._store else None
+        if stored_path:
+            item.bytes_received = item.bytes_total = os.path.getsize(stored_path)
+            item.status = DownloadItem.FINISHED
+            self._model.addItem(item)
+            self._on_finished(stored_path)
+            return item
+        self._model.addItem(item)
+        self._push(item)
+        return item
+
+    def cancel(self, download_id: int) -> None:
+        """
+        Cancel a queued or running download.
+        :param download_id: The ID of the download.
+        """
+        item = self._model.getItem(download_id)
+        if not item or not item.is_active:
+            return
+        was_active = self.hasActiveDownloads
+        if item in self._running:
+            self._running.remove(item)
+            if item.request:
+                item.request.abort()
+            self._discard(item)
+        else:
+            self._queue = [entry for entry in self._queue if entry[2] is not item]
+            heapq.heapify(self._queue)
+        self._setStatus(item, DownloadItem.CANCELLED)
+        self._startNext()
+        self._emitActiveStateChanged(was_active)
+
+    def retry(self, download_id: int) -> None:
+        """
+        Queue a failed or cancelled download again.
+        :param download_id: The ID of the download.
+        """
+        item = self._model.getItem(download_id)
+        if not item or item.is_active or item.status == DownloadItem.FINISHED:
+            return
+        item.bytes_received = 0
+        item.bytes_total = -1
+        self._push(item)
+
+    def clearInactive(self) -> None:
+        """
+        Remove finished, failed and cancelled downloads from the list.
+        """
+        self._model.removeInactiveItems()
+
+    def _push(self, item: DownloadItem) -> None:
+        was_active = self.hasActiveDownloads
+        self._setStatus(item, DownloadItem.QUEUED)
+        heapq.heappush(self._queue, (-item.priority, next(self._sequence), item))
+        self._startNext()
+        self._emitActiveStateChanged(was_active)
+
+    def _startNext(self) -> None:
+        """
+        Start queued downloads until all slots are taken.
+        """
+        while self._queue and len(self._running) < self._max_parallel:
+            _, _, item = heapq.heappop(self._queue)
+            self._start(item)
+
+    def _start(self, item: DownloadItem) -> None:
+        """
+        Start downloading a file into the staging directory of the model store, or a new temporary directory.
+        Note that we do not use any context clauses for the temporary directory. Even though that would be cleaner,
+        CuraApplication.getInstance() switches contexts and makes temporary dirs and files be removed by their context.
+        :param item: The download.
+        """
+        self._running.append(item)
+        self._setStatus(item, DownloadItem.DOWNLOADING)
+        if self._store:
+            item.file_path = self._store.createStagingPath(item.file_name)
+        else:
+            item.file_path = os.path.join(tempfile.mkdtemp(), item.file_name)
+        item.request = item.driver.downloadThingFile(
+            item.file_id, item.file_name, item.file_path,
+            on_finished=lambda path, content_hash: self._onFinished(item, path, content_hash),
+            on_failed=lambda error, status_code: self._onFailed(item, error, status_code),
+            on_progress=lambda received, total: self._onProgress(item, received, total))
+
+    def _onProgress(self, item: DownloadItem, bytes_received: int, bytes_total: int) -> None:
+        item.bytes_received = bytes_received
+        item.bytes_total = bytes_total
+        self._model.updateItem(item, [DownloadListModel.BytesReceivedRole, DownloadListModel.BytesTotalRole])
+
+    def _onFinished(self, item: DownloadItem, file_path: str, content_hash: str) -> None:
+        if not self._stop(item, DownloadItem.FINISHED):
+            self._discard(item)
+            return
+        if self._store:
+            file_path = self._store.add(self._getStoreKey(item), file_path, content_hash)
+        self._on_finished(file_path)
+
+    def _onFailed(self, item: DownloadItem, error: Optional[ApiError], status_code: Optional[int]) -> None:
+        self._discard(item)
+        if self._stop(item, DownloadItem.FAILED) and self._on_failed:
+            self._on_failed(error, status_code)
+
+    def _discard(self, item: DownloadItem) -> None:
+        if self._store and item.file_path:
+            self._store.discard(item.file_path)
+
+    @staticmethod
+    def _getStoreKey(item: DownloadItem) -> Tuple[str, int, str]:
+        return item.driver.name, item.file_id, item.file_name
+
+    def _stop(self, item: DownloadItem, status: str) -> bool:
+        """
+        Free the slot of a download that is done and start the next one.
+        :param item: The download.
+        :param status: The final status of the download.
+        :return: False if the download was not running (anymore), True otherwise.
+        """
+        if item not in self._running:
+            return False
+        was_active = self.hasActiveDownloads
+        self._running.remove(item)
+        item.request = None
+        self._setStatus(item, status)
+        self._startNext()
+        self._emitActiveStateChanged(was_active)
+        return True
+
+    def _setStatus(self, item: DownloadItem, status: str) -> None:
+        item.status = status
+        self._model.updateItem(item, [DownloadListModel.StatusRole])
+
+    def _emitActiveStateChanged(self, was_active: bool) -> None:
+        if was_active != self.hasActiveDownloads:
+            self.activeStateChanged.emit()
@@ -0,0 +1,196 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Sequence, TYPE_CHECKING
+
+from PyQt5.QtCore import QTimer
+
+from UM.Logger import Logger  # type: ignore
+
+from .api.JsonObject import ApiError
+from .api.RequestHandle import RequestHandle
+from .models.ThingsListModel import ListItem, ThingsListModel
+from .Settings import Settings
+
+if TYPE_CHECKING:
+    from .api.AbstractApiClient import AbstractApiClient
+
+# Fetches a page of results from a driver: (driver, page, on_finished, on_failed) -> request handle.
+Fetcher = Callable[
+    ["AbstractApiClient", int, Callable[[List[Any]], Any], Callable[[Optional[ApiError], Optional[int]], Any]],
+    RequestHandle
+]
+
+
+class FederatedQuery:
+    """
+    Runs a query on several drivers at the same time and merges the results into the things model.
+    Results are shown as soon as a driver answers. They are interleaved in the order of the drivers, so the list
+    looks the same no matter which driver answered first. Every driver has its own page cursor.
+    A driver that does not answer within the timeout is skipped for that page and asked again for the next one.
+    Items that are put in the model while the first page loads, like local search hits, are replaced by the results.
+    """
+
+    def __init__(self, drivers: Dict[str, "AbstractApiClient"], fetch: Fetcher, model: ThingsListModel,
+                 on_state_changed: Callable[[], Any], paged: bool = True,
+                 timeout: float = Settings.FEDERATED_QUERY_TIMEOUT) -> None:
+        self._drivers = drivers
+        self._fetch = fetch
+        self._model = model
+        self._on_state_changed = on_state_changed
+        self._paged = paged
+        self._timeout = timeout
+        self._pages = {name: 1 for name in drivers}  # type: Dict[str, int]
+        self._exhausted = set()  # type: Set[str]
+        self._requests = {}  # type: Dict[str, RequestHandle]
+        self._timers = {}  # type: Dict[str, QTimer]
+        # Row of the first item of the page that is loading and the new items per driver for that page.
+        self._page_start = 0
+        self._page_items = {}  # type: Dict[str, List[ListItem]]
+        self._has_results = False
+
+    @property
+    def isRunning(self) -> bool:
+        return bool(self._requests)
+
+    @property
+    def hasMore(self) -> bool:
+        return len(self._exhausted) < len(self._drivers)
+
+    def start(self) -> None:
+        """
+        Clear the model and fetch the first page from every driver.
+        """
+        self._model.clear()
+        self._fetchPage()
+
+    def fetchMore(self) -> None:
+        """
+        Fetch the next page from every driver that has more results. Does nothing while a page is loading.
+        """
+        if not self.isRunning and self.hasMore:
+            self._fetchPage()
+
+    def abort(self) -> None:
+        """
+        Abort all running requests.
+        """
+        for name in list(self._requests):
+            self._stopRequest(name).abort()
+
+    @staticmethod
+    def interleave(item_lists: Iterable[Sequence[ListItem]]) -> List[ListItem]:
+        """
+        Merge lists by taking the first item of every list, then the second item of every list and so on.
+        :param item_lists: The lists to merge.
+        :return: The merged list.
+        """
+        item_lists = list(item_lists)
+        merged = []  # type: List[ListItem]
+        for index in range(max((len(items) for items in item_lists), default=0)):
+            merged.extend(items[index] for items in item_lists if index < len(items))
+        return merged
+
+    @staticmethod
+    def withSource(items: Sequence[ListItem], source: str) -> List[ListItem]:
+        """
+        Copy items and set the driver they came from, so the UI can show their details with the right driver.
+        :param items: The items.
+        :param source: The name of the driver.
+        :return: The copied items.
+        """
+        return [item.__class__(dict(item.toStruct(), source=source)) for item in items]
+
+    def _fetchPage(self) -> None:
+        self._page_start = self._model.rowCount()
+        self._page_items = {}
+        self._model.setHasMore(False)
+        for name, driver in self._drivers.items():
+            if name in self._exhausted:
+                continue
+            timer = QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(self._getCallback(self._onTimeout, name))
+            timer.start(int(self._timeout * 1000))
+            self._timers[name] = timer
+            self._requests[name] = self._fetch(driver, self._pages[name], self._getCallback(self._onFinished, name),
+                                               self._getCallback(self._onFailed, name))
+        self._on_state_changed()
+
+    @staticmethod
+    def _getCallback(callback: Callable[..., None], name: str) -> Callable[..., None]:
+        """
+        Bind a callback to a driver.
+        :param callback: The callback, it receives the name of the driver first.
+        :param name: The name of the driver.
+        :return: The bound callback.
+        """
+        return lambda *args: callback(name, *args)
+
+    def _onFinished(self, name: str, items: Optional[List[ListItem]]) -> None:
+        if name not in self._requests:
+            return
+        self._stopRequest(name)
+        items = items or []
+        self._pages[name] += 1
+        if not self._paged or len(items) < Settings.PER_PAGE:
+            self._exhausted.add(name)
+        self._insertItems(name, items)
+        self._onRequestDone()
+
+    def _onFailed(self, name: str, error: Optional[ApiError], status_code: Optional[int]) -> None:
+        if name not in self._requests:
+            return
+        self._stopRequest(name)
+        # One failing driver (for example one the user did not sign in to) should not block the others.
+        Logger.log("w", "Federated query failed for %s with status %s: %s", name, status_code,
+                   error.error if error else None)
+        self._exhausted.add(name)
+        self._onRequestDone()
+
+    def _onTimeout(self, name: str) -> None:
+        if name not in self._requests:
+            return
+        Logger.log("w", "Federated query timed out for %s", name)
+        self._stopRequest(name).abort()
+        self._onRequestDone()
+
+    def _onRequestDone(self) -> None:
+        if not self.isRunning:
+            if not self._has_results:
+                self._clearPlaceholders()
+            self._model.setHasMore(self.hasMore)
+        self._on_state_changed()
+
+    def _stopRequest(self, name: str) -> RequestHandle:
+        timer = self._timers.pop(name, None)
+        if timer:
+            timer.stop()
+        return self._requests.pop(name)
+
+    def _clearPlaceholders(self) -> None:
+        """
+        Remove the items that were shown while waiting for the first results.
+        """
+        self._has_results = True
+        self._page_start = 0
+        self._model.clear()
+
+    def _insertItems(self, name: str, items: List[ListItem]) -> None:
+        """
+        Insert the items of a driver at their place in the page that is loading.
+        Items that are already shown keep their order, new ones are inserted in between.
+        :param name: The name of the driver.
+        :param items: The items.
+        """
+        if not self._has_results:
+            self._clearPlaceholders()
+        new_items = []  # type: List[ListItem]
+        for item in self.withSource(items, name):
+            if item.id is None or not self._model.hasItem(item) and all(item.id != other.id for other in new_items):
+                new_items.append(item)
+        self._page_items[name] = new_items
+        new_item_ids = {id(item) for item in new_items}
+        merged = self.interleave(self._page_items[driver] for driver in self._drivers if driver in self._page_items)
+        for offset, item in enumerate(merged):
+            if id(item) in new_item_ids:
+                self._model.insertItems(self._page_start + offset, [item])
@@ -0,0 +1,47 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import threading
+from collections import deque
+from typing import Deque
+
+from .Settings import Settings
+
+
+class LatencyTracker:
+    """
+    Thread-safe record of recent response latencies, used to tell when a request is slower than usual.
+    """
+
+    def __init__(self, max_samples: int = Settings.LATENCY_MAX_SAMPLES,
+                 min_samples: int = Settings.LATENCY_MIN_SAMPLES) -> None:
+        self._samples = deque(maxlen=max_samples)  # type: Deque[float]
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        """
+        Record the latency of a response.
+        :param latency: The time in seconds until the response started.
+        """
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, fraction: float, default: float) -> float:
+        """
+        Get the latency that the given fraction of the recent responses was faster than.
+        :param fraction: The fraction, for example 0.95 for the 95th percentile.
+        :param default: The latency to return while there are too few samples.
+        :return: The latency in seconds.
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self._min_samples:
+            return default
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    def getHedgeDelay(self) -> float:
+        """
+        Get the time after which a request that did not start replying yet is attempted a second time.
+        :return: The delay in seconds.
+        """
+        return max(Settings.HEDGE_MIN_DELAY, self.percentile(Settings.HEDGE_PERCENTILE, Settings.HEDGE_DEFAULT_DELAY))
@@ -0,0 +1,76 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LruCache(Generic[T]):
+    """
+    Thread-safe in-memory key-value store that keeps at most a fixed number of items.
+    When full, the least recently used item is dropped. Items can optionally expire after a time-to-live.
+    """
+
+    def __init__(self, max_items: int, ttl: Optional[float] = None) -> None:
+        self._max_items = max_items
+        self._ttl = ttl
+        self._items = OrderedDict()  # type: OrderedDict
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """
+        Get an item and mark it as most recently used.
+        :param key: The key of the item.
+        :return: The item or None if it's not in the cache.
+        """
+        with self._lock:
+            if key not in self._items:
+                return None
+            stored_at, value = self._items[key]
+            if self._ttl is not None and time.monotonic() - stored_at > self._ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: T) -> None:
+        """
+        Add or replace an item, dropping the least recently used item if the cache is full.
+        :param key: The key of the item.
+        :param value: The item.
+        """
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+
+    def remove(self, key: Hashable) -> None:
+        """
+        Remove an item if it's in the cache.
+        :param key: The key of the item.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all items.
+        """
+        with self._lock:
+            self._items.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        # Checking if an item is cached does not count as using it, and None is a valid item.
+        with self._lock:
+            item = self._items.get(key)  # items are stored as (stored_at, value), so a stored None is not missed
+            if item is None:
+                return False
+            return self._ttl is None or time.monotonic() - item[0] <= self._ttl
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
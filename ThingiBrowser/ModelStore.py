@@ -0,0 +1,209 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from UM.Logger import Logger  # type: ignore
+
+# Downloaded files are stored by driver, file ID and file name.
+ModelKey = Tuple[str, int, str]
+
+
+class ModelStore:
+    """
+    On-disk store of downloaded model files, so loading a file again does not download it again.
+    Files are stored by the SHA-256 hash of their content, identical files of different things are stored once.
+    An index maps each downloaded file to its content. When the store grows over its size limit, the least recently
+    used files are removed. Uses are only kept in memory until the index is written for a change to the stored files,
+    so loading a stored file does not write to disk. Downloads are written to a staging directory first, leftovers of downloads that did not
+    finish (for example because Cura was closed) are removed when the store is opened.
+    Files extracted from a stored archive are kept next to it, they count towards the size limit and are removed
+    together with the archive.
+    """
+
+    INDEX_FILE = "index.json"
+    OBJECTS_DIRECTORY = "objects"
+    STAGING_DIRECTORY = "staging"
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        self._directory = directory
+        self._max_size = max_size
+        self._objects_directory = os.path.join(directory, self.OBJECTS_DIRECTORY)
+        self._staging_directory = os.path.join(directory, self.STAGING_DIRECTORY)
+        self._entries = {}  # type: Dict[str, Dict[str, Any]]
+        os.makedirs(self._objects_directory, exist_ok=True)
+        shutil.rmtree(self._staging_directory, ignore_errors=True)
+        os.makedirs(self._staging_directory, exist_ok=True)
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return sum(self._getSize(entry) for entry in self._uniqueObjects().values())
+
+    def setMaxSize(self, max_size: int) -> None:
+        """
+        Change the size limit of the store, removing files if it's over the new limit.
+        :param max_size: The maximum size in bytes.
+        """
+        self._max_size = max_size
+        self._evict()
+        self._save()
+
+    def get(self, key: ModelKey) -> Optional[str]:
+        """
+        Get the path of a stored file and mark it as recently used. The use is written with the next change.
+        :param key: The driver, file ID and file name.
+        :return: The path, or None if the file is not stored (anymore).
+        """
+        entry = self._entries.get(self._formatKey(key))
+        if not entry:
+            return None
+        path = os.path.join(self._directory, entry["path"])
+        if not os.path.isfile(path) or os.path.getsize(path) != entry["size"]:
+            # Removed or changed outside of the plugin.
+            self._remove(self._formatKey(key))
+            self._save()
+            return None
+        entry["last_used"] = time.time()
+        return path
+
+    def createStagingPath(self, file_name: str) -> str:
+        """
+        Get a new path to download a file to. The file is moved into the store once the download is finished.
+        :param file_name: The name of the file.
+        :return: The path.
+        """
+        return os.path.join(tempfile.mkdtemp(dir=self._staging_directory), os.path.basename(file_name))
+
+    def add(self, key: ModelKey, staging_path: str, content_hash: str) -> str:
+        """
+        Move a downloaded file into the store.
+        :param key: The driver, file ID and file name.
+        :param staging_path: The path the file was downloaded to, from createStagingPath.
+        :param content_hash: The SHA-256 hash of the file content.
+        :return: The path of the stored file.
+        """
+        formatted_key = self._formatKey(key)
+        if formatted_key in self._entries and self._entries[formatted_key]["hash"] != content_hash:
+            self._remove(formatted_key)
+        relative_path = os.path.join(self.OBJECTS_DIRECTORY, content_hash, os.path.basename(staging_path))
+        path = os.path.join(self._directory, relative_path)
+        existing = next((entry for entry in self._entries.values() if entry["hash"] == content_hash), None)
+        if existing and os.path.isfile(os.path.join(self._directory, existing["path"])):
+            # The same content was downloaded for another file, keep one copy.
+            relative_path = existing["path"]
+            path = os.path.join(self._directory, relative_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staging_path, path)
+        self.discard(staging_path)
+        self._entries[formatted_key] = {
+            "hash": content_hash,
+            "path": relative_path,
+            "size": os.path.getsize(path),
+            "last_used": time.time(),
+        }
+        self._evict(keep=content_hash)
+        self._save()
+        return path
+
+    def addExtractedFiles(self, path: str, extracted_paths: List[str]) -> None:
+        """
+        Count the files extracted from a stored archive towards the size of the store, removing other files if
+        that makes it go over its size limit.
+        :param path: The path of the stored archive, as returned by add or get.
+        :param extracted_paths: The paths of the extracted files.
+        """
+        entries = [entry for entry in self._entries.values() if os.path.join(self._directory, entry["path"]) == path]
+        if not entries:
+            return
+        extracted_size = sum(os.path.getsize(extracted_path) for extracted_path in extracted_paths
+                             if os.path.isfile(extracted_path))
+        content_hash = entries[0]["hash"]
+        for entry in self._entries.values():
+            if entry["hash"] == content_hash:
+                entry["extracted_size"] = extracted_size
+        self._evict(keep=content_hash)
+        self._save()
+
+    def discard(self, staging_path: str) -> None:
+        """
+        Remove the staging directory of a download that was stored, failed or was cancelled.
+        :param staging_path: The path from createStagingPath.
+        """
+        staging_directory = os.path.dirname(staging_path)
+        if os.path.dirname(staging_directory) == self._staging_directory:
+            shutil.rmtree(staging_directory, ignore_errors=True)
+
+    @staticmethod
+    def _getSize(entry: Dict[str, Any]) -> int:
+        return entry["size"] + entry.get("extracted_size", 0)
+
+    @staticmethod
+    def _formatKey(key: ModelKey) -> str:
+        driver_name, file_id, file_name = key
+        return "{}/{}/{}".format(driver_name, file_id, file_name)
+
+    def _uniqueObjects(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the stored files by content hash, with the most recent use of any file with that content.
+        :return: The entries by content hash.
+        """
+        objects = {}  # type: Dict[str, Dict[str, Any]]
+        for entry in self._entries.values():
+            stored = objects.get(entry["hash"])
+            if not stored or entry["last_used"] > stored["last_used"]:
+                objects[entry["hash"]] = entry
+        return objects
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """
+        Remove the least recently used files until the store is within its size limit.
+        :param keep: Content hash of a file that must not be removed, for example because it's about to be loaded.
+        """
+        objects = self._uniqueObjects()
+        total_size = sum(self._getSize(entry) for entry in objects.values())
+        for content_hash, entry in sorted(objects.items(), key=lambda item: item[1]["last_used"]):
+            if total_size <= self._max_size:
+                break
+            if content_hash == keep:
+                continue
+            for key in [key for key, other in self._entries.items() if other["hash"] == content_hash]:
+                self._remove(key)
+            total_size -= self._getSize(entry)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if any(other["hash"] == entry["hash"] for other in self._entries.values()):
+            return
+        shutil.rmtree(os.path.join(self._objects_directory, entry["hash"]), ignore_errors=True)
+
+    def _load(self) -> None:
+        """
+        Read the index and remove stored files that are not in it, for example because Cura crashed while saving.
+        """
+        try:
+            with open(os.path.join(self._directory, self.INDEX_FILE)) as index_file:
+                entries = json.load(index_file)
+            if isinstance(entries, dict):
+                self._entries = entries
+        except (OSError, ValueError) as error:
+            if os.path.exists(os.path.join(self._directory, self.INDEX_FILE)):
+                Logger.log("w", "Could not read the model store index: %s", error)
+        known_hashes = {entry["hash"] for entry in self._entries.values()}
+        for content_hash in os.listdir(self._objects_directory):
+            if content_hash not in known_hashes:
+                shutil.rmtree(os.path.join(self._objects_directory, content_hash), ignore_errors=True)
+
+    def _save(self) -> None:
+        index_path = os.path.join(self._directory, self.INDEX_FILE)
+        try:
+            with open(index_path + ".tmp", "w") as index_file:
+                json.dump(self._entries, index_file)
+            os.replace(index_path + ".tmp", index_path)
+        except OSError as error:
+            Logger.log("w", "Could not write the model store index: %s", error)
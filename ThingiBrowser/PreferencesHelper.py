@@ -5,6 +5,7 @@ from typing import Optional, Dict, List, Any, Callable
 from cura.CuraApplication import CuraApplication  # type: ignore
 
 from .Settings import Settings
+from .SettingsSnapshot import SettingsSnapshot
 
 
 class PreferencesHelper:
@@ -12,6 +13,19 @@ class PreferencesHelper:
     Assorted helper functions around Cura's Preferences class.
     """
 
+    # In-memory copy of the plugin settings, created on first use.
+    _snapshot = None  # type: Optional[SettingsSnapshot]
+
+    @classmethod
+    def getSnapshot(cls) -> SettingsSnapshot:
+        """
+        Get the in-memory copy of the plugin settings.
+        :return: The settings snapshot.
+        """
+        if cls._snapshot is None:
+            cls._snapshot = SettingsSnapshot(CuraApplication.getInstance().getPreferences())
+        return cls._snapshot
+
     @classmethod
     def initSetting(cls, setting_name: str, default_value: Optional[str] = "") -> str:
         """
@@ -20,10 +34,10 @@ class PreferencesHelper:
         :param default_value: Setting default value.
         :return: Setting value (or default value).
         """
-        preference_key = "{}/{}".format(Settings.PREFERENCE_KEY_BASE, setting_name)
-        preferences = CuraApplication.getInstance().getPreferences()
-        preferences.addPreference(preference_key, default_value)
-        return preferences.getValue(preference_key)
+        snapshot = cls.getSnapshot()
+        snapshot.preferences.addPreference(snapshot.getPreferenceKey(setting_name), default_value)
+        snapshot.refresh(setting_name)
+        return snapshot.getValue(setting_name)
 
     @classmethod
     def getAllSettings(cls, drivers: Dict[str, str], views: Dict[str, str]) -> List[Dict[str, Any]]:
@@ -74,6 +88,48 @@ class PreferencesHelper:
                 "label": "Default view",
                 "options": views,
                 "description": "Which view to use when the plugin starts."
+            },
+            {
+                "type": "text",
+                "key": Settings.MAX_PARALLEL_DOWNLOADS_PREFERENCES_KEY,
+                "value": cls.getSettingValue(Settings.MAX_PARALLEL_DOWNLOADS_PREFERENCES_KEY),
+                "label": "Parallel downloads",
+                "description": "How many files are downloaded at the same time, other files wait in the queue."
+            },
+            {
+                "type": "text",
+                "key": Settings.MODEL_STORE_MAX_SIZE_PREFERENCES_KEY,
+                "value": cls.getSettingValue(Settings.MODEL_STORE_MAX_SIZE_PREFERENCES_KEY),
+                "label": "Downloaded files storage (MB)",
+                "description": "Downloaded files are kept so loading them again is instant. When they take more space "
+                               "than this, the files that were not used for the longest time are removed."
+            },
+            {
+                "type": "combobox",
+                "key": Settings.PREFETCH_DETAILS_PREFERENCES_KEY,
+                "value": cls.getSettingValue(Settings.PREFETCH_DETAILS_PREFERENCES_KEY),
+                "label": "Preload details",
+                "options": [{"key": "false", "label": "Off"}, {"key": "true", "label": "On"}],
+                "description": "Load the details of the things you see and point at in the background, so they open "
+                               "instantly. This uses more data."
+            },
+            {
+                "type": "combobox",
+                "key": Settings.LOG_REQUESTS_PREFERENCES_KEY,
+                "value": cls.getSettingValue(Settings.LOG_REQUESTS_PREFERENCES_KEY),
+                "label": "Log requests",
+                "options": [{"key": "false", "label": "Off"}, {"key": "true", "label": "On"}],
+                "description": "Write the timings of every request to the Cura log, to include in a bug report when "
+                               "browsing is slow."
+            },
+            {
+                "type": "combobox",
+                "key": Settings.DETECT_STALLS_PREFERENCES_KEY,
+                "value": cls.getSettingValue(Settings.DETECT_STALLS_PREFERENCES_KEY),
+                "label": "Detect freezes",
+                "options": [{"key": "false", "label": "Off"}, {"key": "true", "label": "On"}],
+                "description": "Find out which part of the plugin makes Cura freeze. The slowest parts are shown below "
+                               "and written to the Cura log when the browser is closed."
             }
         ]
 
@@ -84,18 +140,18 @@ class PreferencesHelper:
         :param setting_name: The name of the setting to store.
         :param value: The new value of the setting.
         """
-        preference_key = "{}/{}".format(Settings.PREFERENCE_KEY_BASE, setting_name)
-        CuraApplication.getInstance().getPreferences().setValue(preference_key, value)
+        snapshot = cls.getSnapshot()
+        snapshot.preferences.setValue(snapshot.getPreferenceKey(setting_name), value)
+        snapshot.refresh(setting_name)
 
     @classmethod
     def getSettingValue(cls, setting_name: str) -> str:
         """
-        Get the value of a setting from Cura preferences.
+        Get the value of a setting from the in-memory copy of Cura preferences.
         :param setting_name: The name of the setting to get the value for.
         :return: The value of the setting.
         """
-        preference_key = "{}/{}".format(Settings.PREFERENCE_KEY_BASE, setting_name)
-        return CuraApplication.getInstance().getPreferences().getValue(preference_key)
+        return cls.getSnapshot().getValue(setting_name)
 
     @classmethod
     def addSettingChangedCallback(cls, callback: Callable[[str], None]) -> None:
@@ -103,4 +159,4 @@ class PreferencesHelper:
         Add a callback on for the change of a preference value.
         :param callback: The callback function to run when setting is changed.
         """
-        CuraApplication.getInstance().getPreferences().preferenceChanged.connect(callback)
+        cls.getSnapshot().preferences.preferenceChanged.connect(callback)
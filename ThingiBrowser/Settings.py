@@ -18,6 +18,100 @@ class Settings:
 
     # Generic API settings
     PER_PAGE = 20
+    MAX_SKIPPED_PAGES = 3  # pages in a row without new things that are skipped before scrolling stops
+
+    # Key of the driver option that runs queries on all drivers at the same time
+    ALL_DRIVERS_KEY = "all"
+    ALL_DRIVERS_LABEL = "All sources"
+    FEDERATED_QUERY_TIMEOUT = 10  # per driver, in seconds
+
+    # Number of worker threads that decode API responses
+    PARSE_THREADS = 2
+
+    # In-memory cache of result pages, so paging back and forth does not wait on the network
+    PAGE_CACHE_MAX_ITEMS = 20
+    PAGE_CACHE_TTL = 5 * 60  # in seconds
+
+    # HTTP response cache options
+    HTTP_CACHE_DIRECTORY = "thingibrowser/http"  # relative to the OS cache location
+    HTTP_CACHE_MAX_SIZE = 50 * 1024 * 1024  # in bytes
+    HTTP_CACHE_TTL_THINGS = 5 * 60  # list queries, in seconds
+    HTTP_CACHE_TTL_THING = 60 * 60  # thing details, in seconds
+    HTTP_CACHE_TTL_THING_FILES = 60 * 60  # thing file lists, in seconds
+
+    # Rate limiting of API requests per host, and retries of requests that failed because the API was busy or down
+    API_RATE_LIMIT = 5  # requests per second
+    API_RATE_LIMIT_BURST = 10  # requests that can start at once
+    API_MAX_RETRIES = 3  # per request
+    API_RETRY_BASE_DELAY = 1  # in seconds, doubled for every retry
+    API_MAX_RETRY_DELAY = 60  # in seconds, requests that would have to wait longer fail right away
+    API_RETRY_STATUS_CODES = (429, 500, 503, 504)  # not 502, Thingiverse uses it for authentication errors
+    API_THROTTLE_STATUS_CODES = (429, 503)  # the API asks to slow down, all requests to the host are paused
+
+    # Connections to the API and thumbnail hosts are opened when the browser opens, other drivers' hosts a bit later
+    WARM_UP_OTHER_DRIVERS_DELAY = 2  # in seconds
+
+    # Deadlines of API requests, requests that take longer are aborted and fail with a timeout error
+    API_FIRST_BYTE_TIMEOUT = 15  # until the response starts, including connecting, in seconds
+    API_TOTAL_TIMEOUT = 30  # until the full response is received, in seconds
+    DOWNLOAD_STALL_TIMEOUT = 30  # file downloads fail when no data is received for this long, in seconds
+
+    # Hedged requests: small idempotent requests that did not start replying after the 95th percentile of the recent
+    # latencies are attempted a second time, and the first attempt to answer is used
+    HEDGE_PERCENTILE = 0.95
+    HEDGE_DEFAULT_DELAY = 2  # used until enough latencies are known, in seconds
+    HEDGE_MIN_DELAY = 0.5  # in seconds
+    LATENCY_MAX_SAMPLES = 100  # recent latencies kept per host
+    LATENCY_MIN_SAMPLES = 20
+
+    # Timings of the most recent API requests, for finding out what makes browsing slow
+    TELEMETRY_MAX_RECORDS = 500
+    TELEMETRY_EXPORT_FILE = "thingibrowser/requests.json"  # relative to the OS cache location
+
+    # Detection of plugin code that blocks the GUI thread, if enabled in the settings
+    STALL_HEARTBEAT_INTERVAL = 0.05  # in seconds
+    STALL_THRESHOLD = 0.2  # the event loop is this late, in seconds
+    STALL_LATENCY_MAX_SAMPLES = 1200  # recent event loop latencies, one per heartbeat
+    STALL_REPORT_MAX_ITEMS = 5
+
+    # Recently viewed thing details kept in memory
+    THING_DETAILS_CACHE_MAX_ITEMS = 50
+    THING_DETAILS_CACHE_TTL = 10 * 60  # in seconds
+
+    # Speculative loading of the details of visible and hovered things, if enabled in the settings
+    DETAIL_PREFETCH_MAX_PARALLEL = 2
+    DETAIL_PREFETCH_MAX_QUEUED = 20
+    DETAIL_PREFETCH_BUDGET = 200  # requests per session
+
+    # Local full-text index of the things that were seen, used for instant offline search results
+    THING_INDEX_FILE = "thingibrowser/index.sqlite3"  # relative to the OS cache location
+    THING_INDEX_MAX_ITEMS = 100000
+    THING_INDEX_MAX_DESCRIPTION_LENGTH = 1000  # in characters
+    LOCAL_SEARCH_DELAY = 0.2  # after the last keystroke, in seconds
+
+    # Store of downloaded model files, so loading a file again does not download it again
+    MODEL_STORE_DIRECTORY = "thingibrowser/models"  # relative to the OS cache location
+    DEFAULT_MODEL_STORE_MAX_SIZE = 1024  # in megabytes
+
+    # Limits for extracting downloaded ZIP archives, against archives that expand to huge amounts of data
+    ARCHIVE_MAX_ENTRIES = 1000
+    ARCHIVE_MAX_EXTRACTED_SIZE = 500 * 1024 * 1024  # in bytes
+    ARCHIVE_MAX_COMPRESSION_RATIO = 100
+
+    # File download options
+    DEFAULT_MAX_PARALLEL_DOWNLOADS = 2
+
+    # Thumbnail image provider options
+    THUMBNAIL_PROVIDER_ID = "thingithumb"
+    THUMBNAIL_CACHE_DIRECTORY = "thingibrowser/thumbnails"  # relative to the OS cache location
+    THUMBNAIL_CACHE_MAX_SIZE = 20 * 1024 * 1024  # in bytes
+    THUMBNAIL_CACHE_MAX_MEMORY_ITEMS = 200
+    THUMBNAIL_HEIGHT = 75  # in pixels, as displayed in the UI
+    THUMBNAIL_SCALE = 2  # stored at twice the displayed height for HiDPI screens
+    THUMBNAIL_CONNECT_TIMEOUT = 5  # in seconds
+    THUMBNAIL_DOWNLOAD_TIMEOUT = 10  # between received bytes, in seconds
+    THUMBNAIL_LOAD_THREADS = 4  # thumbnails loaded at the same time
+    THUMBNAIL_DOWNLOAD_THREADS = 2 * THUMBNAIL_LOAD_THREADS  # room for a hedged second attempt of every load
 
     # Thingiverse API options
     THINGIVERSE_USER_NAME_PREFERENCES_KEY = "user_name"
@@ -35,7 +129,20 @@ class Settings:
     MYMINIFACTORY_API_TOKEN_KEY = "myminifactory_access_token"
     DEFAULT_API_CLIENT_PREFERENCES_KEY = "default_api_client"
     DEFAULT_VIEW_PREFERENCES_KEY = "default_view"
+    MAX_PARALLEL_DOWNLOADS_PREFERENCES_KEY = "max_parallel_downloads"
+    PREFETCH_DETAILS_PREFERENCES_KEY = "prefetch_details"
+    MODEL_STORE_MAX_SIZE_PREFERENCES_KEY = "model_store_max_size"
+    LOG_REQUESTS_PREFERENCES_KEY = "log_requests"
+    DETECT_STALLS_PREFERENCES_KEY = "detect_stalls"
 
     # Google Analytics API options
     ANALYTICS_ID = "UA-16646729-7"
     ANALYTICS_CLIENT_ID_PREFERENCES_KEY = "client_id"
+    ANALYTICS_BATCH_URL = "https://www.google-analytics.com/batch"
+    ANALYTICS_BATCH_SIZE = 20  # maximum number of hits the batch endpoint accepts per request
+    ANALYTICS_FLUSH_INTERVAL = 30  # in seconds
+    ANALYTICS_MAX_QUEUED_HITS = 500  # older hits are dropped when the network is unavailable for a long time
+    ANALYTICS_STORAGE_FILE = "thingibrowser/analytics.json"  # relative to the OS cache location
+    ANALYTICS_SAMPLE_RATE = 1.0  # fraction of the clients that send hits
+    ANALYTICS_TIMEOUT = 10  # in seconds
+    ANALYTICS_STOP_TIMEOUT = 0.5  # how long closing Cura waits for a batch that is being sent, in seconds
@@ -0,0 +1,94 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Any, Dict
+
+from .Settings import Settings
+
+
+class SettingsSnapshot:
+    """
+    In-memory copy of the plugin settings in Cura's preferences.
+    Values are read from the preferences once and only the changed entry is refreshed when a preference changes,
+    so code that needs a setting for every request (like auth tokens) doesn't go through the preferences each time.
+    """
+
+    def __init__(self, preferences: Any) -> None:
+        self._preferences = preferences
+        self._values = {}  # type: Dict[str, str]
+        self._preference_keys = {}  # type: Dict[str, str]
+        self._setting_names = {}  # type: Dict[str, str]
+        preferences.preferenceChanged.connect(self._onPreferenceChanged)
+
+    @property
+    def preferences(self) -> Any:
+        return self._preferences
+
+    @property
+    def thingiverse_user_name(self) -> str:
+        return self.getValue(Settings.THINGIVERSE_USER_NAME_PREFERENCES_KEY) or ""
+
+    @property
+    def myminifactory_api_token(self) -> str:
+        return self.getValue(Settings.MYMINIFACTORY_API_TOKEN_KEY) or ""
+
+    @property
+    def max_parallel_downloads(self) -> int:
+        try:
+            return int(self.getValue(Settings.MAX_PARALLEL_DOWNLOADS_PREFERENCES_KEY) or "")
+        except ValueError:
+            return Settings.DEFAULT_MAX_PARALLEL_DOWNLOADS
+
+    @property
+    def model_store_max_size(self) -> int:
+        try:
+            megabytes = int(self.getValue(Settings.MODEL_STORE_MAX_SIZE_PREFERENCES_KEY) or "")
+        except ValueError:
+            megabytes = Settings.DEFAULT_MODEL_STORE_MAX_SIZE
+        return megabytes * 1024 * 1024
+
+    @property
+    def prefetch_details(self) -> bool:
+        return self.getValue(Settings.PREFETCH_DETAILS_PREFERENCES_KEY) == "true"
+
+    @property
+    def log_requests(self) -> bool:
+        return self.getValue(Settings.LOG_REQUESTS_PREFERENCES_KEY) == "true"
+
+    @property
+    def detect_stalls(self) -> bool:
+        return self.getValue(Settings.DETECT_STALLS_PREFERENCES_KEY) == "true"
+
+    def getPreferenceKey(self, setting_name: str) -> str:
+        """
+        Get the key of a setting in Cura's preferences. Keys are formatted once per setting.
+        :param setting_name: The name of the setting.
+        :return: The preference key.
+        """
+        preference_key = self._preference_keys.get(setting_name)
+        if preference_key is None:
+            preference_key = "{}/{}".format(Settings.PREFERENCE_KEY_BASE, setting_name)
+            self._preference_keys[setting_name] = preference_key
+            self._setting_names[preference_key] = setting_name
+        return preference_key
+
+    def getValue(self, setting_name: str) -> str:
+        """
+        Get the value of a setting, it's read from the preferences the first time only.
+        :param setting_name: The name of the setting.
+        :return: The value of the setting.
+        """
+        if setting_name not in self._values:
+            self.refresh(setting_name)
+        return self._values[setting_name]
+
+    def refresh(self, setting_name: str) -> None:
+        """
+        Read the value of a setting from the preferences again.
+        :param setting_name: The name of the setting.
+        """
+        self._values[setting_name] = self._preferences.getValue(self.getPreferenceKey(setting_name))
+
+    def _onPreferenceChanged(self, preference_key: str) -> None:
+        setting_name = self._setting_names.get(preference_key)
+        if setting_name is not None:
+            self.refresh(setting_name)
@@ -0,0 +1,189 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+from PyQt5.QtCore import QTimer
+
+from UM.Logger import Logger  # type: ignore
+
+from .LatencyTracker import LatencyTracker
+from .Settings import Settings
+
+# A plugin function by "Class.function", and the plugin code line it was running as "path:line".
+Culprit = Tuple[str, str]
+
+OUTSIDE_PLUGIN = "(outside the plugin)"
+UNKNOWN = "(unknown)"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class StallDetector:
+    """
+    Opt-in watchdog that finds out which plugin code blocks the GUI thread, and with it Cura's viewport.
+    A heartbeat timer on the GUI thread measures how late the event loop runs it. While the event loop is late, a
+    watchdog thread samples the Python stack of the GUI thread. When the heartbeat is late by more than the
+    threshold, the stall is attributed to the plugin slot or callback that was sampled most: the outermost plugin
+    function on the stack, which is the one Qt or Cura called. Lambdas and functions marked as dispatchers are
+    skipped, so a stall is blamed on the callback that handled an API response instead of the code that passed it
+    on. The innermost plugin line is kept as its location. Functions are named after their file, as the plugin has
+    one class per file.
+    """
+
+    # Code of the plugin functions that only pass a result on to a callback.
+    _dispatcher_code = set()  # type: Set[CodeType]
+
+    @classmethod
+    def dispatcher(cls, function: F) -> F:
+        """
+        Mark a function that only passes a result on to a callback, so stalls are blamed on the callback instead.
+        Can be used on nested functions, their code is shared by every function created from the definition.
+        :param function: The function.
+        :return: The same function.
+        """
+        cls._dispatcher_code.add(function.__code__)
+        return function
+
+    def __init__(self, on_stall: Optional[Callable[[], Any]] = None,
+                 directory: str = os.path.dirname(os.path.abspath(__file__)),
+                 interval: float = Settings.STALL_HEARTBEAT_INTERVAL,
+                 threshold: float = Settings.STALL_THRESHOLD) -> None:
+        """
+        :param on_stall: Called on the GUI thread after a stall was recorded.
+        :param directory: The directory of the code that stalls are attributed to.
+        :param interval: The time between heartbeats in seconds.
+        :param threshold: How late the event loop must be to count as a stall, in seconds.
+        """
+        self._on_stall = on_stall
+        self._directory = directory
+        self._interval = interval
+        self._threshold = threshold
+        self._latencies = LatencyTracker(max_samples=Settings.STALL_LATENCY_MAX_SAMPLES, min_samples=1)
+        self._offenders = {}  # type: Dict[str, Dict[str, Any]]
+        self._samples = []  # type: List[Culprit]
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._gui_thread_id = 0
+        self._stopped = threading.Event()
+        self._watchdog = None  # type: Optional[threading.Thread]
+        self._timer = QTimer()
+        self._timer.timeout.connect(self._onHeartbeat)  # type: ignore
+
+    @property
+    def isRunning(self) -> bool:
+        return self._watchdog is not None
+
+    def start(self) -> None:
+        """
+        Start watching the GUI thread. Must be called on the GUI thread.
+        """
+        if self._watchdog:
+            return
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="ThingiBrowserStallDetector", daemon=True)
+        self._watchdog.start()
+        self._timer.start(int(self._interval * 1000))
+
+    def stop(self) -> None:
+        """
+        Stop watching the GUI thread. The stalls recorded so far are kept.
+        """
+        if not self._watchdog:
+            return
+        self._timer.stop()
+        self._stopped.set()
+        self._watchdog.join()
+        self._watchdog = None
+
+    def getReport(self, max_items: int = Settings.STALL_REPORT_MAX_ITEMS) -> List[Dict[str, Any]]:
+        """
+        Get the plugin code that blocked the GUI thread the longest in total.
+        :param max_items: The maximum number of offenders.
+        :return: The offenders with their stall count, total and worst stall time and location, worst first.
+        """
+        offenders = sorted(self._offenders.values(), key=lambda offender: offender["total_ms"], reverse=True)
+        return [dict(offender) for offender in offenders[:max_items]]
+
+    def logReport(self) -> None:
+        """
+        Write the ranked offenders and the recent event loop latency to the log.
+        """
+        report = self.getReport()
+        if not report:
+            return
+        lines = ["{:>2}. {:>8.0f} ms total, {:>4}x, worst {:>6.0f} ms  {} ({})".format(
+            rank, offender["total_ms"], offender["count"], offender["max_ms"], offender["callback"],
+            offender["location"]) for rank, offender in enumerate(report, 1)]
+        Logger.log("i", "Slowest code on the GUI thread, event loop latency p50 %.0f ms, p95 %.0f ms:\n%s",
+                   self._latencies.percentile(0.5, 0) * 1000, self._latencies.percentile(0.95, 0) * 1000,
+                   "\n".join(lines))
+
+    def _onHeartbeat(self) -> None:
+        now = time.monotonic()
+        lateness = max(0.0, now - self._last_beat - self._interval)
+        self._last_beat = now
+        self._latencies.add(lateness)
+        with self._lock:
+            samples, self._samples = self._samples, []
+        if lateness >= self._threshold:
+            self._recordStall(lateness, samples)
+
+    def _watch(self) -> None:
+        """
+        Sample the stack of the GUI thread while its event loop is late. Runs on the watchdog thread.
+        """
+        while not self._stopped.wait(self._interval):
+            if time.monotonic() - self._last_beat < self._interval * 2:
+                continue
+            frame = sys._current_frames().get(self._gui_thread_id)
+            culprit = self._getCulprit(frame)
+            with self._lock:
+                self._samples.append(culprit)
+
+    def _getCulprit(self, frame: Optional[FrameType]) -> Culprit:
+        """
+        Find the plugin function that was called from outside the plugin, and the plugin line that is running.
+        Dispatch functions and lambdas are skipped, unless the GUI thread is not running any other plugin code.
+        :param frame: The innermost frame of the GUI thread.
+        :return: The function and line, or OUTSIDE_PLUGIN if the GUI thread is not running plugin code.
+        """
+        functions = []  # type: List[Tuple[str, bool]]  # innermost first, with whether it only dispatches
+        location = ""
+        while frame is not None:
+            code = frame.f_code
+            path = code.co_filename
+            if path.startswith(self._directory):
+                name = "{}.{}".format(os.path.splitext(os.path.basename(path))[0], code.co_name)
+                functions.append((name, code in self._dispatcher_code or code.co_name == "<lambda>"))
+                location = location or "{}:{}".format(os.path.relpath(path, self._directory), frame.f_lineno)
+            frame = frame.f_back
+        if not functions:
+            return OUTSIDE_PLUGIN, location
+        callbacks = [name for name, is_dispatcher in reversed(functions) if not is_dispatcher]
+        return callbacks[0] if callbacks else functions[0][0], location
+
+    def _recordStall(self, duration: float, samples: List[Culprit]) -> None:
+        """
+        Attribute a stall to the culprit that was sampled most during it.
+        :param duration: How late the event loop was, in seconds.
+        :param samples: The culprits sampled during the stall.
+        """
+        callback, location = Counter(samples).most_common(1)[0][0] if samples else (UNKNOWN, "")
+        offender = self._offenders.setdefault(callback, {
+            "callback": callback, "location": location, "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        offender["count"] += 1
+        offender["total_ms"] += duration * 1000
+        if duration * 1000 > offender["max_ms"]:
+            offender["max_ms"] = duration * 1000
+            offender["location"] = location
+        Logger.log("w", "The GUI thread was blocked for %.0f ms by %s (%s)", duration * 1000, callback, location)
+        if self._on_stall:
+            self._on_stall()
@@ -1,32 +1,40 @@
 # Copyright (c) 2020.
 # Thingiverse plugin is released under the terms of the LGPLv3 or higher.
 import os
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
-from PyQt5.QtCore import QObject
+from PyQt5.QtCore import QObject, QStandardPaths
 from PyQt5.QtQuick import QQuickWindow  # type: ignore
 
 from UM.Extension import Extension  # type: ignore
 from cura.CuraApplication import CuraApplication  # type: ignore
 
 from .Settings import Settings
-from .ThingiBrowserService import ThingiBrowserService
-from .api.Analytics import Analytics
+
+if TYPE_CHECKING:
+    from .ThingiBrowserService import ThingiBrowserService
+    from .ThumbnailImageProvider import ThumbnailImageProvider
+    from .api.Analytics import Analytics
 
 
 class ThingiBrowserExtension(Extension):
     """
     Thingiverse plugin main file. Controls all UI and behaviour.
+    Only the menu is set up when Cura boots. The services, drivers and UI are created when a window is first opened,
+    so the plugin adds no imports or network requests to Cura's startup.
     """
 
     def __init__(self) -> None:
         super().__init__()
 
-        # The API client that we do all calls to Thingiverse with.
-        self._service = ThingiBrowserService(self)  # type: ThingiBrowserService
+        # The API client that we do all calls to Thingiverse with, created when a window is first opened.
+        self._service = None  # type: Optional[ThingiBrowserService]
+
+        # The API client that will talk to Google Analytics, created when a window is first opened.
+        self._analytics = None  # type: Optional[Analytics]
 
-        # The API client that will talk to Google Analytics.
-        self._analytics = Analytics()  # type: Analytics
+        # Serves cached thumbnails to the UI, registered on the QML engine when the first component is created.
+        self._thumbnail_provider = None  # type: Optional[ThumbnailImageProvider]
 
         # The UI objects.
         self._main_dialog = None  # type: Optional[QQuickWindow]
@@ -41,13 +49,26 @@ class ThingiBrowserExtension(Extension):
         """
         Show the main popup window.
         """
+        service = self._getService()
+        self._warmUpConnections(service)
         if not self._main_dialog:
             self._main_dialog = self._createComponent("Thingiverse.qml")
         if self._main_dialog and isinstance(self._main_dialog, QQuickWindow):
             self._main_dialog.closing.connect(self._onClosingMainWindow)
             self._main_dialog.show()
-            self._service.updateSupportedFileTypes()
-            self._service.runDefaultQuery()
+            service.updateSupportedFileTypes()
+            service.runDefaultQuery()
+
+    def _warmUpConnections(self, service: "ThingiBrowserService") -> None:
+        """
+        Connect to the API and thumbnail hosts while the window is being created, so the first requests don't wait
+        for connection setup.
+        :param service: The service.
+        """
+        service.warmUpConnections()
+        self._registerThumbnailProvider()
+        if self._thumbnail_provider:
+            self._thumbnail_provider.warmUp(service.getThumbnailHosts())
 
     def _onClosingMainWindow(self) -> None:
         """
@@ -55,7 +76,8 @@ class ThingiBrowserExtension(Extension):
         """
         if self._settings_dialog:
             self._settings_dialog.close()
-        self._service.resetActiveDriver()
+        self._getService().resetActiveDriver()
+        self._getService().logStallReport()
 
     def showSettingsWindow(self) -> None:
         """
@@ -66,6 +88,26 @@ class ThingiBrowserExtension(Extension):
         if self._settings_dialog and isinstance(self._settings_dialog, QQuickWindow):
             self._settings_dialog.show()
 
+    def _getService(self) -> "ThingiBrowserService":
+        """
+        Get the service, creating it (and its drivers) on first use.
+        :return: The service.
+        """
+        if not self._service:
+            from .ThingiBrowserService import ThingiBrowserService
+            self._service = ThingiBrowserService(self)
+        return self._service
+
+    def _getAnalytics(self) -> "Analytics":
+        """
+        Get the analytics client, creating it on first use.
+        :return: The analytics client.
+        """
+        if not self._analytics:
+            from .api.Analytics import Analytics
+            self._analytics = Analytics()
+        return self._analytics
+
     def _createComponent(self, qml_file_path: str) -> Optional[QObject]:
         """
         Create a dialog window
@@ -76,11 +118,24 @@ class ThingiBrowserExtension(Extension):
         if not plugin_path:
             return None
         path = os.path.join(plugin_path, "views", qml_file_path)
+        self._registerThumbnailProvider()
         # Create the dialog component from a QML file.
         dialog = CuraApplication.getInstance().createQmlComponent(path, {
-            "ThingiService": self._service,
-            "Analytics": self._analytics
+            "ThingiService": self._getService(),
+            "Analytics": self._getAnalytics()
         })
         if not dialog:
             raise Exception("Failed to create Thingiverse dialog")
         return dialog
+
+    def _registerThumbnailProvider(self) -> None:
+        """
+        Register the thumbnail image provider on Cura's QML engine if that did not happen yet.
+        """
+        if self._thumbnail_provider:
+            return
+        from .ThumbnailImageProvider import ThumbnailImageProvider
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        self._thumbnail_provider = ThumbnailImageProvider(os.path.join(cache_root, Settings.THUMBNAIL_CACHE_DIRECTORY))
+        CuraApplication.getInstance().getQmlEngine().addImageProvider(Settings.THUMBNAIL_PROVIDER_ID,
+                                                                      self._thumbnail_provider)
@@ -2,26 +2,40 @@
 # Thingiverse plugin is released under the terms of the LGPLv3 or higher.
 import os
 import pathlib
-import tempfile
-from typing import List, Optional, TYPE_CHECKING, Dict, Any, cast
+from functools import partial
+from typing import List, Optional, TYPE_CHECKING, Dict, Any, Tuple, Callable
 
-from PyQt5.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot, QUrl  # type: ignore
+from PyQt5.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot, QStandardPaths, QThreadPool, QTimer, QUrl  # type: ignore
+from PyQt5.QtNetwork import QNetworkRequest
 from PyQt5.QtWidgets import QMessageBox
 
 from cura.CuraApplication import CuraApplication  # type: ignore
-
+from UM.Logger import Logger  # type: ignore
+
+from .ArchiveExtractJob import ArchiveExtractJob
+from .DetailPrefetcher import DetailPrefetcher
+from .DownloadManager import DownloadManager
+from .FederatedQuery import FederatedQuery, Fetcher
+from .LruCache import LruCache
+from .ModelStore import ModelStore
 from .PreferencesHelper import PreferencesHelper
+from .StallDetector import StallDetector
 from .api.AbstractApiClient import AbstractApiClient
-from .api.JsonObject import Thing, ThingFile, Collection, ApiError
+from .api.JsonObject import Thing, ThingDetails, ThingFile, Collection, ApiError
+from .api.RequestHandle import RequestHandle
 from .drivers.thingiverse.ThingiverseApiClient import ThingiverseApiClient
 from .drivers.myminifactory.MyMiniFactoryApiClient import MyMiniFactoryApiClient
 from .models.DriverOption import DriverOption
+from .models.ThingsListModel import ListItem, ThingsListModel
 from .models.ViewOption import ViewOption
 from .Settings import Settings
 
 if TYPE_CHECKING:
     from .ThingiBrowserExtension import ThingiBrowserExtension
 
+# Result pages are cached by (driver, query, page, per page).
+PageKey = Tuple[str, str, int, int]
+
 
 class ThingiBrowserService(QObject):
     """
@@ -40,6 +54,15 @@ class ThingiBrowserService(QObject):
     # Signal triggered when the querying state changed.
     queryingStateChanged = pyqtSignal()
 
+    # Signal triggered when requests start or stop waiting because an API asked to slow down.
+    throttledStateChanged = pyqtSignal()
+
+    # Signal triggered when a request finished and was added to the network telemetry.
+    networkTelemetryChanged = pyqtSignal()
+
+    # Signal triggered when plugin code blocked the GUI thread.
+    stallReportChanged = pyqtSignal()
+
     # Signal triggered when the active thing changed.
     activeThingChanged = pyqtSignal()
 
@@ -63,16 +86,69 @@ class ThingiBrowserService(QObject):
         self._supported_file_types = []  # type: List[str]
 
         # Hold the things found in query results.
-        self._things = []  # type: List[Thing]
+        self._things = ThingsListModel(fetch_more=self._fetchNextPage, parent=self)  # type: ThingsListModel
         self._query = ""  # type: str
         self._query_page = 1  # type: int
         self._is_querying = False  # type: bool
         self._is_from_collection = False  # type: bool
-
-        # Hold the thing and thing files that we currently see the details of.
+        AbstractApiClient.addThrottledChangedCallback(self._onThrottledChanged)
+
+        # Timings of the recent requests, written to the log as well if enabled in the settings.
+        PreferencesHelper.initSetting(Settings.LOG_REQUESTS_PREFERENCES_KEY, "false")
+        AbstractApiClient.getTelemetry().setLogging(PreferencesHelper.getSnapshot().log_requests)
+        AbstractApiClient.getTelemetry().addCallback(self._onNetworkTelemetryChanged)
+
+        # Watchdog for plugin code that blocks the GUI thread, if enabled in the settings.
+        PreferencesHelper.initSetting(Settings.DETECT_STALLS_PREFERENCES_KEY, "false")
+        self._stall_detector = StallDetector(on_stall=self._onStall)
+        self._updateStallDetector()
+
+        # The running query request. Every new query increments the generation so late replies can be dropped.
+        self._query_request = None  # type: Optional[RequestHandle]
+        self._query_generation = 0  # type: int
+
+        # Local hits shown while typing, after a short delay so the index is not searched on every keystroke.
+        # The results they replaced are kept, so they can be shown again when the search text is cleared.
+        self._local_search_term = ""  # type: str
+        self._local_search_timer = QTimer(self)
+        self._local_search_timer.setSingleShot(True)
+        self._local_search_timer.setInterval(int(Settings.LOCAL_SEARCH_DELAY * 1000))
+        self._local_search_timer.timeout.connect(self._onLocalSearchTimeout)  # type: ignore
+        self._results_before_local_hits = None  # type: Optional[Tuple[List[ListItem], bool]]
+
+        # The driver of the current query, and the query that runs on all drivers in 'All sources' mode.
+        self._query_driver_name = ""  # type: str
+        self._federated_query = None  # type: Optional[FederatedQuery]
+
+        # Hold result pages that were already fetched and the speculative request for the next page.
+        self._page_cache = LruCache(Settings.PAGE_CACHE_MAX_ITEMS, ttl=Settings.PAGE_CACHE_TTL)  # type: LruCache
+        self._prefetch_page_key = None  # type: Optional[PageKey]
+        self._prefetch_request = None  # type: Optional[RequestHandle]
+
+        # Hold the thing and thing files that we currently see the details of, and the driver they came from.
+        self._details_driver_name = ""  # type: str
         self._thing_details = None  # type: Optional[Thing]
         self._thing_files = []  # type: List[ThingFile]
-        self._is_downloading = False  # type: bool
+        self._thing_details_request = None  # type: Optional[RequestHandle]
+
+        # Loads the details of visible and hovered things in the background, if enabled in the settings.
+        PreferencesHelper.initSetting(Settings.PREFETCH_DETAILS_PREFERENCES_KEY, "false")
+        self._detail_prefetcher = DetailPrefetcher()
+
+        # Queue for the files that are downloaded and loaded into Cura, and the store that keeps them on disk.
+        PreferencesHelper.initSetting(Settings.MODEL_STORE_MAX_SIZE_PREFERENCES_KEY,
+                                      str(Settings.DEFAULT_MODEL_STORE_MAX_SIZE))
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        self._model_store = ModelStore(os.path.join(cache_root, Settings.MODEL_STORE_DIRECTORY),
+                                       PreferencesHelper.getSnapshot().model_store_max_size)
+        self._download_manager = DownloadManager(on_finished=self._onDownloadFinished,
+                                                 on_failed=self._showRequestError,
+                                                 max_parallel=self._getMaxParallelDownloads(),
+                                                 store=self._model_store, parent=self)
+        self._download_manager.activeStateChanged.connect(self.downloadingStateChanged)
+
+        # Downloaded archives that are being extracted, kept to prevent removal by the Python garbage collector.
+        self._extract_jobs = []  # type: List[ArchiveExtractJob]
 
         # Drivers for the services we can interact with.
         self._drivers = {
@@ -104,8 +180,39 @@ class ThingiBrowserService(QObject):
         """
         Callback triggered when a setting from the settings window is changed
         """
+        self._download_manager.setMaxParallel(self._getMaxParallelDownloads())
+        self._model_store.setMaxSize(PreferencesHelper.getSnapshot().model_store_max_size)
+        AbstractApiClient.getTelemetry().setLogging(PreferencesHelper.getSnapshot().log_requests)
+        self._updateStallDetector()
         self.settingChanged.emit()
 
+    @staticmethod
+    def _getMaxParallelDownloads() -> int:
+        """
+        Get the maximum number of parallel downloads from the settings.
+        :return: The configured number, or the default if the setting is not a number.
+        """
+        PreferencesHelper.initSetting(Settings.MAX_PARALLEL_DOWNLOADS_PREFERENCES_KEY,
+                                      str(Settings.DEFAULT_MAX_PARALLEL_DOWNLOADS))
+        return PreferencesHelper.getSnapshot().max_parallel_downloads
+
+    def _updateStallDetector(self) -> None:
+        """
+        Start or stop the stall detector as set in the settings. The results so far are logged when it stops.
+        """
+        if PreferencesHelper.getSnapshot().detect_stalls:
+            self._stall_detector.start()
+        elif self._stall_detector.isRunning:
+            self._stall_detector.stop()
+            self._stall_detector.logReport()
+
+    def logStallReport(self) -> None:
+        """
+        Write the plugin code that blocked the GUI thread the longest to the log, if the stall detector is running.
+        """
+        if self._stall_detector.isRunning:
+            self._stall_detector.logReport()
+
     def resetActiveDriver(self) -> None:
         """
         Reset the active driver to the one selected as default.
@@ -119,6 +226,29 @@ class ThingiBrowserService(QObject):
         supported_file_types = CuraApplication.getInstance().getMeshFileHandler().getSupportedFileTypesRead()
         self._supported_file_types = list(supported_file_types.keys())
 
+    def warmUpConnections(self) -> None:
+        """
+        Connect to the API hosts ahead of the first requests. The hosts of the other drivers follow a moment later,
+        so they don't compete with the first query.
+        """
+        active_drivers, other_drivers = self._getDriversActiveFirst()
+
+        def warm_up(drivers: List[AbstractApiClient]) -> None:
+            for driver in drivers:
+                driver.warmUp()
+
+        warm_up(active_drivers)
+        if other_drivers:
+            QTimer.singleShot(Settings.WARM_UP_OTHER_DRIVERS_DELAY * 1000, lambda: warm_up(other_drivers))
+
+    def getThumbnailHosts(self) -> List[str]:
+        """
+        Get the hosts that thumbnails are loaded from, those of the active driver first.
+        :return: The host names.
+        """
+        active_drivers, other_drivers = self._getDriversActiveFirst()
+        return [host for driver in active_drivers + other_drivers for host in driver.thumbnail_hosts]
+
     def runDefaultQuery(self) -> None:
         """
         Run the default view query.
@@ -155,7 +285,10 @@ class ThingiBrowserService(QObject):
         Get the available drivers for selecting in the UI.
         :return: The drivers.
         """
-        return [{"key": key, "label": driver_option.label} for key, driver_option in self._drivers.items()]
+        drivers = [{"key": key, "label": driver_option.label} for key, driver_option in self._drivers.items()]
+        if len(drivers) > 1:
+            drivers.append({"key": Settings.ALL_DRIVERS_KEY, "label": Settings.ALL_DRIVERS_LABEL})
+        return drivers
 
     @pyqtProperty(str, notify=activeDriverChanged)
     def activeDriver(self) -> str:
@@ -174,7 +307,7 @@ class ThingiBrowserService(QObject):
         """
         if driver == self._active_driver_name:
             return
-        if driver not in self._drivers:
+        if driver not in self._drivers and driver != Settings.ALL_DRIVERS_KEY:
             return
         self._active_driver_name = driver
         self.activeDriverChanged.emit()
@@ -231,13 +364,13 @@ class ThingiBrowserService(QObject):
         self._active_view_name = view
         self.activeViewChanged.emit()
 
-    @pyqtProperty("QVariantList", notify=thingsChanged)
-    def things(self) -> List[Dict[str, Any]]:
+    @pyqtProperty(QObject, constant=True)
+    def things(self) -> QObject:
         """
-        Get a list of found things. Updated when performing a search.
-        :return: The things.
+        Get the list model with found things. Updated when performing a search or when more pages are loaded.
+        :return: The things model.
         """
-        return [thing.toStruct() for thing in self._things]
+        return self._things
 
     @pyqtProperty(bool, notify=isFromCollectionChanged)
     def isFromCollection(self) -> bool:
@@ -255,6 +388,48 @@ class ThingiBrowserService(QObject):
         """
         return self._is_querying
 
+    @pyqtProperty(bool, notify=throttledStateChanged)
+    def isThrottled(self) -> bool:
+        """
+        Whether requests are waiting because an API asked to slow down, so results will show up later.
+        :return: True if waiting, False otherwise.
+        """
+        return AbstractApiClient.isThrottled()
+
+    @pyqtProperty("QVariantMap", notify=networkTelemetryChanged)
+    def networkTelemetry(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the timings of the recent requests per driver and endpoint, for debugging slow browsing.
+        :return: The request counts and p50, p95 and p99 timings by "driver endpoint".
+        """
+        return AbstractApiClient.getTelemetry().getSummary()
+
+    @pyqtProperty("QVariantList", notify=stallReportChanged)
+    def stallReport(self) -> List[Dict[str, Any]]:
+        """
+        Get the plugin code that blocked the GUI thread the longest, for the debug panel in the settings window.
+        :return: The offenders with their stall count, total and worst time in milliseconds, worst first.
+        """
+        return self._stall_detector.getReport()
+
+    @pyqtSlot(result=str, name="exportNetworkTelemetry")
+    def exportNetworkTelemetry(self) -> str:
+        """
+        Save the timings of the recent requests as JSON, to attach to a bug report.
+        :return: The path of the file, or an empty string if it could not be written.
+        """
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        path = os.path.join(cache_root, Settings.TELEMETRY_EXPORT_FILE)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as export_file:
+                export_file.write(AbstractApiClient.getTelemetry().toJson())
+        except OSError as error:
+            Logger.log("w", "Could not export the network telemetry: %s", error)
+            return ""
+        Logger.log("i", "Exported the network telemetry to %s", path)
+        return path
+
     @pyqtProperty("QVariantMap", notify=activeThingChanged)
     def activeThing(self) -> Optional[Dict[str, Any]]:
         """
@@ -282,10 +457,18 @@ class ThingiBrowserService(QObject):
     @pyqtProperty(bool, notify=downloadingStateChanged)
     def isDownloading(self) -> bool:
         """
-        Whether there is currently a download in progress or not.
+        Whether there is currently a download in progress or queued.
         :return: True if currently downloading, false otherwise.
         """
-        return self._is_downloading
+        return self._download_manager.hasActiveDownloads
+
+    @pyqtProperty(QObject, constant=True)
+    def downloads(self) -> QObject:
+        """
+        Get the list model with all downloads and their status and progress.
+        :return: The downloads model.
+        """
+        return self._download_manager.model
 
     @pyqtSlot(str, name="search")
     def search(self, search_term: str) -> None:
@@ -293,207 +476,507 @@ class ThingiBrowserService(QObject):
         Search for things by search term.
         :param search_term: What to search for.
         """
-        query = self._getActiveDriver().getThingsBySearchQuery(search_term)
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getThingsBySearchQuery(search_term))
+        if self._is_querying:
+            # Show the local hits right away, the remote results replace them when they arrive.
+            self._showLocalResults(search_term)
+
+    @pyqtSlot(str, name="searchLocal")
+    def searchLocal(self, search_term: str) -> None:
+        """
+        Search the things that were seen before, without network requests. Used to show results while typing.
+        The search runs shortly after the last call. The results of a running query are waited for instead, so
+        typing does not throw away a remote search. An empty search term shows the previous results again.
+        :param search_term: What to search for.
+        """
+        self._local_search_term = search_term
+        self._local_search_timer.start()
+
+    def _onLocalSearchTimeout(self) -> None:
+        if self._is_querying:
+            return
+        if not self._local_search_term.strip():
+            if self._results_before_local_hits is not None:
+                items, has_more = self._results_before_local_hits
+                self._results_before_local_hits = None
+                self._things.setItems(items, has_more=has_more)
+                self.thingsChanged.emit()
+            return
+        if self._results_before_local_hits is None:
+            self._results_before_local_hits = self._things.items, self._things.hasMore
+        self._showLocalResults(self._local_search_term)
 
     @pyqtSlot(name="getLiked")
     def getLiked(self) -> None:
         """
         Get the current user's liked things.
         """
-        query = self._getActiveDriver().getThingsLikedByUserQuery()
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getThingsLikedByUserQuery())
 
     @pyqtSlot(name="getMyThings")
     def getMyThings(self) -> None:
         """
         Get the current user's published Things.
         """
-        query = self._getActiveDriver().getThingsByUserQuery()
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getThingsByUserQuery())
 
     @pyqtSlot(name="getMakes")
     def getMakes(self) -> None:
         """
         Get the current user's made Things.
         """
-        query = self._getActiveDriver().getThingsMadeByUserQuery()
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getThingsMadeByUserQuery())
 
     @pyqtSlot(name="getPopular")
     def getPopular(self) -> None:
         """
         Get the most popular things.
-        The result is async and will be populated in self._things.
+        The result is async and will be populated in the things model.
         """
-        query = self._getActiveDriver().getPopularThingsQuery()
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getPopularThingsQuery())
 
     @pyqtSlot(name="getFeatured")
     def getFeatured(self) -> None:
         """
         Get the featured things.
-        The result is async and will be populated in self._things.
+        The result is async and will be populated in the things model.
         """
-        query = self._getActiveDriver().getFeaturedThingsQuery()
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getFeaturedThingsQuery())
 
     @pyqtSlot(name="getNewest")
     def getNewest(self) -> None:
         """
         Get the newest things.
-        The result is async and will be populated in self._things.
+        The result is async and will be populated in the things model.
         """
-        query = self._getActiveDriver().getNewestThingsQuery()
-        self._executeQuery(query)
+        self._runQuery(lambda driver: driver.getNewestThingsQuery())
 
     @pyqtSlot(name="getCollections")
     def getCollections(self) -> None:
         """
         Get the current user's collections.
         """
+        if self._isAllDriversActive():
+            self._executeFederatedQuery(lambda driver, _, on_finished, on_failed: driver.getCollections(
+                on_finished=on_finished, on_failed=on_failed), paged=False)
+            return
+        self._cancelPrefetch()
         self._prepQuery("user_collections", is_from_collection=False)
-        self._getActiveDriver().getCollections(on_finished=self._onCollectionsFinished, on_failed=self._onRequestFailed)
+        self._query_driver_name = self._getActiveDriverName()
+        self._query_request = self._getActiveDriver().getCollections(
+            on_finished=self._whenCurrentQuery(self._onCollectionsFinished),
+            on_failed=self._whenCurrentQuery(self._onRequestFailed))
 
     @pyqtSlot(int, name="showCollectionDetails")
-    def showCollectionDetails(self, collection_id: int) -> None:
+    @pyqtSlot(int, str, name="showCollectionDetails")
+    def showCollectionDetails(self, collection_id: int, source: str = "") -> None:
         """
         Get and show the details of a single collection.
         :param collection_id: The ID of the collection.
+        :param source: The driver the collection came from, if the results of all drivers are shown.
         """
-        query = self._getActiveDriver().getThingsFromCollectionQuery(str(collection_id))
-        self._executeQuery(query, is_from_collection=True)
+        driver_name = self._getSourceDriverName(source)
+        query = self._drivers[driver_name].driver.getThingsFromCollectionQuery(str(collection_id))
+        self._executeQuery(query, is_from_collection=True, driver_name=driver_name)
 
     @pyqtSlot(int, name="showThingDetails")
-    def showThingDetails(self, thing_id: int) -> None:
+    @pyqtSlot(int, str, name="showThingDetails")
+    def showThingDetails(self, thing_id: int, source: str = "") -> None:
         """
         Get and show the details of a single thing.
         :param thing_id: The ID of the thing.
+        :param source: The driver the thing came from, if the results of all drivers are shown.
         """
-        self._getActiveDriver().getThing(thing_id, self._onThingDetailsFinished, on_failed=self._onRequestFailed)
-        self._getActiveDriver().getThingFiles(thing_id, self._onThingFilesFinished, on_failed=self._onRequestFailed)
+        self._abortThingDetailsRequests()
+        driver_name = self._details_driver_name = self._getSourceDriverName(source)
+        driver = self._drivers[driver_name].driver
+        self._thing_details_request = driver.getThingDetails(
+            thing_id, self._onThingDetailsFinished, on_failed=partial(self._onRequestFailed, driver_name=driver_name))
+
+    @pyqtSlot(int, str, bool, name="prefetchThingDetails")
+    def prefetchThingDetails(self, thing_id: int, source: str, urgent: bool) -> None:
+        """
+        Load the details of a thing in the background, if enabled in the settings.
+        :param thing_id: The ID of the thing.
+        :param source: The driver the thing came from, if the results of all drivers are shown.
+        :param urgent: Load before the other things, for example because the pointer is on it.
+        """
+        if not PreferencesHelper.getSnapshot().prefetch_details:
+            return
+        self._detail_prefetcher.prefetch(self._drivers[self._getSourceDriverName(source)].driver, thing_id, urgent)
 
     @pyqtSlot(name="hideThingDetails")
     def hideThingDetails(self) -> None:
         """
         Remove the thing details. This hides the detail page in the UI.
+        Details that are still loading are aborted so they can't open the detail page after it was closed.
         """
+        self._abortThingDetailsRequests()
         self._thing_details = None
         self.activeThingChanged.emit()
 
     @pyqtSlot(int, str, name="downloadThingFile")
     def downloadThingFile(self, file_id: int, file_name: str) -> None:
         """
-        Download and load a thing file by it's ID.
+        Queue a thing file for download by it's ID.
         The downloaded object will be placed on the build plate.
         :param file_id: The ID of the file.
         :param file_name: The name of the file.
         """
-        self._is_downloading = True
-        self.downloadingStateChanged.emit()
-        self._getActiveDriver().downloadThingFile(file_id, file_name,
-                                                  on_finished=lambda data: self._onDownloadFinished(data, file_name))
+        self._download_manager.enqueue(self._getDetailsDriver(), file_id, file_name)
+
+    @pyqtSlot(name="downloadAllThingFiles")
+    def downloadAllThingFiles(self) -> None:
+        """
+        Queue all supported files of the active thing for download.
+        """
+        for thing_file in self._thing_files:
+            if thing_file.id and thing_file.name:
+                self._download_manager.enqueue(self._getDetailsDriver(), thing_file.id, thing_file.name)
+
+    @pyqtSlot(int, name="cancelDownload")
+    def cancelDownload(self, download_id: int) -> None:
+        """
+        Cancel a queued or running download.
+        :param download_id: The ID of the download in the downloads model.
+        """
+        self._download_manager.cancel(download_id)
+
+    @pyqtSlot(int, name="retryDownload")
+    def retryDownload(self, download_id: int) -> None:
+        """
+        Queue a failed or cancelled download again.
+        :param download_id: The ID of the download in the downloads model.
+        """
+        self._download_manager.retry(download_id)
+
+    @pyqtSlot(name="clearDownloads")
+    def clearDownloads(self) -> None:
+        """
+        Remove finished, failed and cancelled downloads from the downloads model.
+        """
+        self._download_manager.clearInactive()
 
     @pyqtProperty(int, notify=thingsChanged)
     def currentPage(self) -> int:
         """
-        Get the current query results page.
+        Get the last loaded query results page.
         :return: The page number, starting with 1.
         """
         return self._query_page
 
-    @pyqtSlot(name="previousPage")
-    def previousPage(self) -> None:
+    @pyqtSlot(name="nextPage")
+    def nextPage(self) -> None:
         """
-        Navigate to the previous page of query results.
-        The search is done async and the result will be populated in self._things.
-        Can not go lower than page 1.
+        Load the next page of query results and append it to the things model.
+        The next page is usually prefetched already, otherwise the result will be added async.
+        Does nothing while a page is still loading.
         """
-        if self._query_page == 1:
+        if self._federated_query:
+            self._federated_query.fetchMore()
             return
-        self._query_page -= 1
+        if self._is_querying:
+            return
+        self._query_page += 1
         self._executeQuery(is_from_collection=self._is_from_collection)
 
-    @pyqtSlot(name="nextPage")
-    def nextPage(self) -> None:
+    def _fetchNextPage(self) -> None:
         """
-        Navigate to the next page of query results.
-        The search is done async and the result will be populated in self._things.
+        Called by the things model when the list view scrolls near its end.
         """
-        self._query_page += 1
-        self._executeQuery(is_from_collection=self._is_from_collection)
+        self.nextPage()
+
+    def _runQuery(self, get_query: Callable[[AbstractApiClient], str]) -> None:
+        """
+        Run a things query on the active driver, or on all drivers at the same time in 'All sources' mode.
+        :param get_query: Function that returns the query for a driver.
+        """
+        if not self._isAllDriversActive():
+            self._executeQuery(get_query(self._getActiveDriver()))
+            return
+        self._executeFederatedQuery(lambda driver, page, on_finished, on_failed: driver.getThings(
+            query=get_query(driver), page=page, on_finished=on_finished, on_failed=on_failed))
 
-    def _executeQuery(self, new_query: Optional[str] = None, is_from_collection: Optional[bool] = False) -> None:
+    def _executeFederatedQuery(self, fetch: Fetcher, paged: bool = True) -> None:
+        """
+        Query all drivers at the same time, the results are merged into the things model as they arrive.
+        :param fetch: Function that requests a page of results from a driver.
+        :param paged: Whether the drivers return results in pages.
+        """
+        self._cancelPrefetch()
+        self._prepQuery(Settings.ALL_DRIVERS_KEY)
+        drivers = {name: driver_option.driver for name, driver_option in self._drivers.items()}
+        self._federated_query = FederatedQuery(drivers, fetch, self._things, paged=paged,
+                                               on_state_changed=self._whenCurrentQuery(self._onFederatedQueryChanged))
+        self._federated_query.start()
+
+    def _onFederatedQueryChanged(self) -> None:
+        """
+        Callback for when a driver answered the federated query, or when it started loading the next page.
+        """
+        is_querying = bool(self._federated_query and self._federated_query.isRunning)
+        if is_querying != self._is_querying:
+            self._is_querying = is_querying
+            self.queryingStateChanged.emit()
+        self.thingsChanged.emit()
+
+    def _executeQuery(self, new_query: Optional[str] = None, is_from_collection: Optional[bool] = False,
+                      driver_name: Optional[str] = None) -> None:
         """
         Internal function to query the API for things.
         :param new_query: Perform a new query instead of adding a new page to the existing one.
         :param is_from_collection: Specifies whether the resulting Things are part of a collection or not.
+        :param driver_name: The driver for a new query, defaults to the active driver.
         """
         self._prepQuery(new_query, is_from_collection)
-        self._getActiveDriver().getThings(query=self._query, page=self._query_page, on_finished=self._onQueryFinished,
-                                          on_failed=self._onRequestFailed)
+        if new_query:
+            self._query_driver_name = driver_name or self._getActiveDriverName()
+        page_key = self._getPageKey(self._query_page)
+        cached_things = self._page_cache.get(page_key)
+        if cached_things is not None:
+            self._onPageFinished(page_key, cached_things)
+            return
+        if page_key == self._prefetch_page_key:
+            # The page is already being prefetched, _onPrefetchFinished will show it when it arrives.
+            return
+        self._cancelPrefetch()
+        self._query_request = self._getQueryDriver().getThings(
+            query=self._query, page=self._query_page,
+            on_finished=self._whenCurrentQuery(lambda things: self._onPageFinished(page_key, things)),
+            on_failed=self._whenCurrentQuery(self._onQueryFailed))
+
+    def _whenCurrentQuery(self, callback: Callable[..., None]) -> Callable[..., None]:
+        """
+        Wrap a query callback so it is dropped when a newer query was started in the meantime.
+        Superseded requests are aborted as well, this guards against replies that were already being handled.
+        :param callback: The callback to wrap.
+        :return: The wrapped callback.
+        """
+        generation = self._query_generation
+
+        @StallDetector.dispatcher
+        def wrapped(*args: Any) -> None:
+            if generation == self._query_generation:
+                callback(*args)
+
+        return wrapped
+
+    def _getPageKey(self, page: int) -> PageKey:
+        """
+        Get the key under which a page of the current query is cached.
+        :param page: The page number.
+        :return: The cache key.
+        """
+        return self._query_driver_name, self._query, page, Settings.PER_PAGE
+
+    def _prefetchPage(self, page: int) -> None:
+        """
+        Speculatively fetch a page of the current query with low network priority so it can be shown instantly.
+        :param page: The page number.
+        """
+        page_key = self._getPageKey(page)
+        if page < 1 or page_key == self._prefetch_page_key or page_key in self._page_cache:
+            return
+        self._cancelPrefetch()
+        self._prefetch_page_key = page_key
+        self._prefetch_request = self._getQueryDriver().getThings(
+            query=self._query, page=page,
+            on_finished=lambda things: self._onPrefetchFinished(page_key, things),
+            on_failed=lambda *_: self._onPrefetchFailed(page_key),
+            priority=QNetworkRequest.LowPriority)
+
+    def _cancelPrefetch(self) -> None:
+        """
+        Abort the running prefetch request, if any.
+        """
+        request = self._prefetch_request
+        self._prefetch_request = None
+        self._prefetch_page_key = None
+        if request:
+            request.abort()
+
+    def _abortThingDetailsRequests(self) -> None:
+        """
+        Abort the running thing details request, if any.
+        """
+        if self._thing_details_request:
+            self._thing_details_request.abort()
+            self._thing_details_request = None
+
+    def _onPrefetchFinished(self, page_key: PageKey, things: List[Thing]) -> None:
+        """
+        Callback for receiving a prefetched page on.
+        If the user navigated to this page while it was loading, it is shown right away.
+        :param page_key: The key of the prefetched page.
+        :param things: The found things.
+        """
+        if page_key != self._prefetch_page_key:
+            return
+        self._prefetch_request = None
+        self._prefetch_page_key = None
+        self._page_cache.put(page_key, things)
+        if self._is_querying and page_key == self._getPageKey(self._query_page):
+            self._onPageFinished(page_key, things)
+
+    def _onPrefetchFailed(self, page_key: PageKey) -> None:
+        """
+        Callback for when a prefetch request failed or was aborted. Errors are only shown for user initiated requests.
+        :param page_key: The key of the prefetched page.
+        """
+        if page_key != self._prefetch_page_key:
+            return
+        self._prefetch_request = None
+        self._prefetch_page_key = None
+        if self._is_querying and page_key == self._getPageKey(self._query_page):
+            # The user is waiting for this page, so retry it as a normal request.
+            self._executeQuery(is_from_collection=self._is_from_collection)
+
+    def _onPageFinished(self, page_key: PageKey, things: List[Thing]) -> None:
+        """
+        Callback for receiving a page of thing results on.
+        The page is cached and the next page is prefetched in the background.
+        :param page_key: The key of the page.
+        :param things: The found things.
+        """
+        self._page_cache.put(page_key, things)
+        self._onQueryFinished(things)
+        if len(things) >= Settings.PER_PAGE:
+            self._prefetchPage(page_key[2] + 1)
 
     def _prepQuery(self, new_query: Optional[str] = None, is_from_collection: Optional[bool] = False) -> None:
         """
         State configuration that needs to happen before each query.
+        The previous query request is superseded by this one, so it's aborted.
         :param new_query: Perform a new query instead of adding a new page to the existing one.
         :param is_from_collection: Specifies whether the resulting Things are part of a collection or not.
         """
+        self._abortQuery()
+        self._results_before_local_hits = None
         if new_query:
             self._query = new_query
             self._clearSearchResults()
             self._query_page = 1
+            self._detail_prefetcher.clear()
         if self._is_from_collection != is_from_collection:
             self._is_from_collection = bool(is_from_collection)
             self.isFromCollectionChanged.emit()
         self._is_querying = True
         self.queryingStateChanged.emit()
 
-    def _onThingDetailsFinished(self, thing: Thing) -> None:
+    def _abortQuery(self) -> None:
         """
-        Callback for receiving thing details on.
-        :param thing: The thing.
+        Abort the running query request and drop replies of earlier queries that are already being handled.
         """
-        self._thing_details = thing
-        self.activeThingChanged.emit()
+        self._query_generation += 1
+        if self._query_request:
+            self._query_request.abort()
+            self._query_request = None
+        if self._federated_query:
+            self._federated_query.abort()
+            self._federated_query = None
 
-    def _onThingFilesFinished(self, thing_files: List[ThingFile]) -> None:
+    def _showLocalResults(self, search_term: str) -> None:
         """
-        Callback for receiving a list of thing files on. Filtered on supported file types of Cura.
-        :param thing_files: The thing files.
+        Show the things of the active driver that match the search term in the local search index.
+        :param search_term: What to search for.
+        """
+        if self._isAllDriversActive():
+            self._things.setItems(FederatedQuery.interleave(
+                FederatedQuery.withSource(driver_option.driver.searchLocal(search_term), name)
+                for name, driver_option in self._drivers.items()))
+        else:
+            self._things.setItems(self._getActiveDriver().searchLocal(search_term))
+        self.thingsChanged.emit()
+
+    def _onThingDetailsFinished(self, details: ThingDetails) -> None:
         """
+        Callback for receiving thing details on. The files are filtered on supported file types of Cura.
+        :param details: The thing and its files.
+        """
+        self._thing_details = details.thing
+        self.activeThingChanged.emit()
         self._thing_files = []
-        for file in thing_files:
-            if file.name and pathlib.Path(file.name).suffix.lower().strip(".") in self._supported_file_types:
+        for file in details.files:
+            if file.name and self._isSupportedFile(file.name):
                 self._thing_files.append(file)
         self.activeThingFilesChanged.emit()
 
-    def _onDownloadFinished(self, file_bytes: bytes, file_name: str) -> None:
+    def _isSupportedFile(self, file_name: str) -> bool:
+        return pathlib.Path(file_name).suffix.lower().strip(".") in self._supported_file_types
+
+    def _onDownloadFinished(self, file_path: str) -> None:
         """
         Callback to receive the downloaded file on and import it onto the build plate.
-        Note that we do not use any context clauses here. Even though that would be cleaner,
-        CuraApplication.getInstance() switches contexts and makes temporary dirs and files be removed by their context.
-        :param file_bytes: The file as bytes.
-        :param file_name: The file name.
-        """
-        file_path = os.path.join(tempfile.mkdtemp(), file_name)
-        tmp_file = open(file_path, "wb")
-        tmp_file.write(file_bytes)
-        tmp_file.close()
-        CuraApplication.getInstance().readLocalFile(QUrl().fromLocalFile(tmp_file.name))
-        self._is_downloading = False
-        self.downloadingStateChanged.emit()
+        ZIP archives are extracted on a worker thread first, the files in it that Cura can open are imported.
+        :param file_path: The path of the downloaded file.
+        """
+        if self._isSupportedFile(file_path) or not ArchiveExtractJob.isArchive(file_path):
+            self._loadFile(file_path)
+            return
+        job = ArchiveExtractJob(file_path, "{}.files".format(file_path), self._supported_file_types)
+        self._extract_jobs.append(job)
+        job.signals.finished.connect(lambda paths: self._onArchiveExtracted(job, file_path, paths))
+        job.signals.failed.connect(lambda message: self._onArchiveExtracted(job, file_path, [], message))
+        QThreadPool.globalInstance().start(job)
+
+    def _onArchiveExtracted(self, job: ArchiveExtractJob, archive_path: str, file_paths: List[str],
+                            error_message: Optional[str] = None) -> None:
+        """
+        Callback for when a downloaded archive was extracted.
+        :param job: The extract job.
+        :param archive_path: The path of the archive.
+        :param file_paths: The extracted files.
+        :param error_message: Why the archive could not be extracted, if it could not.
+        """
+        self._extract_jobs.remove(job)
+        if not file_paths:
+            mb = QMessageBox()
+            mb.setIcon(QMessageBox.Warning)
+            mb.setWindowTitle("Could not open archive")
+            mb.setText("{} could not be extracted: {}.".format(os.path.basename(archive_path), error_message)
+                       if error_message else
+                       "{} does not contain files that Cura can open.".format(os.path.basename(archive_path)))
+            mb.exec()
+            return
+        self._model_store.addExtractedFiles(archive_path, file_paths)
+        for file_path in file_paths:
+            self._loadFile(file_path)
+
+    @staticmethod
+    def _loadFile(file_path: str) -> None:
+        """
+        Import a file onto the build plate.
+        :param file_path: The path of the file.
+        """
+        CuraApplication.getInstance().readLocalFile(QUrl().fromLocalFile(file_path))
 
     def _onQueryFinished(self, things: List[Thing]) -> None:
         """
         Callback for receiving thing results on.
+        The first page replaces the results, later pages are appended. A full page means there might be more.
         :param things: The found things.
         """
         self._is_querying = False
         self.queryingStateChanged.emit()
-        self._things = things
+        has_more = len(things) >= Settings.PER_PAGE
+        if self._query_page == 1:
+            self._things.setItems(things, has_more=has_more)
+        else:
+            self._things.appendItems(things, has_more=has_more)
         self.thingsChanged.emit()
 
+    def _onQueryFailed(self, error: Optional[ApiError] = None, status_code: Optional[int] = None) -> None:
+        """
+        Callback for when a query request failed.
+        Loading more pages is stopped so scrolling does not keep triggering the same error.
+        :param error: An optional error object that was returned by the API.
+        :param status_code: The HTTP status code.
+        """
+        if self._query_page > 1:
+            self._query_page -= 1
+        self._things.setHasMore(False)
+        self._onRequestFailed(error, status_code)
+
     def _onCollectionsFinished(self, collections: List[Collection]) -> None:
         """
         Callback for receiving collections results on.
@@ -501,14 +984,14 @@ class ThingiBrowserService(QObject):
         """
         self._is_querying = False
         self.queryingStateChanged.emit()
-        self._things = cast(List[Thing], collections)  # we know that Thing and Collection are compatible, MyPy does not
+        self._things.setItems(collections)
         self.thingsChanged.emit()
 
     def _clearSearchResults(self) -> None:
         """
         Clear all Thing search results.
         """
-        self._things = []
+        self._things.clear()
         self._query_page = 1
         self.hideThingDetails()
         self.thingsChanged.emit()
@@ -518,6 +1001,7 @@ class ThingiBrowserService(QObject):
         Execute default search query when driver changes.
         This is needed to prevent compatibility issues with the cached query.
         """
+        self._cancelPrefetch()
         self.runDefaultQuery()
 
     def _onViewChanged(self) -> None:
@@ -528,31 +1012,54 @@ class ThingiBrowserService(QObject):
             return
         self._views[self._active_view_name].query()
 
-    def _onRequestFailed(self, error: Optional[ApiError] = None, status_code: Optional[int] = None) -> None:
+    def _onRequestFailed(self, error: Optional[ApiError] = None, status_code: Optional[int] = None,
+                         driver_name: Optional[str] = None) -> None:
         """
         Callback for when a request failed.
         :param error: An optional error object that was returned by the API.
+        :param status_code: The HTTP status code.
+        :param driver_name: The driver that sent the request, defaults to the active driver.
         """
         self._is_querying = False
         self.queryingStateChanged.emit()
+        self._showRequestError(error, status_code, driver_name)
+
+    def _onThrottledChanged(self) -> None:
+        self.throttledStateChanged.emit()
+
+    def _onNetworkTelemetryChanged(self) -> None:
+        self.networkTelemetryChanged.emit()
+
+    def _onStall(self) -> None:
+        self.stallReportChanged.emit()
+
+    def _showRequestError(self, error: Optional[ApiError] = None, status_code: Optional[int] = None,
+                          driver_name: Optional[str] = None) -> None:
+        """
+        Show the right popup for a failed request.
+        :param error: An optional error object that was returned by the API.
+        :param status_code: The HTTP status code.
+        :param driver_name: The driver that sent the request, defaults to the active driver.
+        """
         if status_code in [401, 502]:  # Thingiverse uses 502 for certain authentication errors
-            self._showAuthenticationError()
+            self._showAuthenticationError(driver_name or self._getActiveDriverName())
         else:
             self._showApiResponseError(error)
 
-    def _showAuthenticationError(self) -> None:
+    def _showAuthenticationError(self, driver_name: str) -> None:
         """
         Show a popup indicating that the user needs to sign in to call the API.
+        :param driver_name: The driver that the user needs to sign in to.
         """
         self._extension.showSettingsWindow()
         mb = QMessageBox()
         mb.setIcon(QMessageBox.Information)
         mb.setWindowTitle("Authentication Required")
         mb.setText("{0} indicated that you need to sign in. Please sign into your {0} account and try again.".format(
-            self._drivers[self.activeDriver].label))
+            self._drivers[driver_name].label))
         mb.exec()
         # Remove any existing authentication data as it's clearly incorrect.
-        self.clearAuthenticationForDriver(self.activeDriver)
+        self.clearAuthenticationForDriver(driver_name)
 
     @staticmethod
     def _showApiResponseError(error: Optional[ApiError] = None) -> None:
@@ -572,8 +1079,56 @@ class ThingiBrowserService(QObject):
         """
         Get the currently active driver.
         Sets the first available driver to active if none was set.
-        :return: The active API driver.
+        :return: The active API driver, the first driver in 'All sources' mode.
+        """
+        return self._drivers[self._getActiveDriverName()].driver
+
+    def _getActiveDriverName(self) -> str:
+        """
+        Get the name of the currently active driver.
+        Sets the first available driver to active if none was set.
+        :return: The name of the active API driver, the first driver in 'All sources' mode.
         """
         if not self._active_driver_name:
             self._active_driver_name = list(self._drivers.keys())[0]
-        return self._drivers[self._active_driver_name].driver
+        if self._active_driver_name not in self._drivers:
+            return list(self._drivers.keys())[0]
+        return self._active_driver_name
+
+    def _isAllDriversActive(self) -> bool:
+        return self._active_driver_name == Settings.ALL_DRIVERS_KEY and len(self._drivers) > 1
+
+    def _getDriversActiveFirst(self) -> Tuple[List[AbstractApiClient], List[AbstractApiClient]]:
+        """
+        Split the drivers into the ones that queries currently run on and the others.
+        :return: The active drivers (all drivers in 'All sources' mode) and the other drivers.
+        """
+        active_name = self._getActiveDriverName()
+        active_drivers = []  # type: List[AbstractApiClient]
+        other_drivers = []  # type: List[AbstractApiClient]
+        for name, option in self._drivers.items():
+            is_active = self._isAllDriversActive() or name == active_name
+            (active_drivers if is_active else other_drivers).append(option.driver)
+        return active_drivers, other_drivers
+
+    def _getSourceDriverName(self, source: str) -> str:
+        """
+        Get the driver for an item from the results.
+        :param source: The driver the item came from, empty if the item came from the active driver.
+        :return: The name of the driver.
+        """
+        return source if source in self._drivers else self._getActiveDriverName()
+
+    def _getQueryDriver(self) -> AbstractApiClient:
+        """
+        Get the driver of the current query.
+        :return: The API driver.
+        """
+        return self._drivers[self._query_driver_name or self._getActiveDriverName()].driver
+
+    def _getDetailsDriver(self) -> AbstractApiClient:
+        """
+        Get the driver of the thing that we currently see the details of.
+        :return: The API driver.
+        """
+        return self._drivers[self._details_driver_name or self._getActiveDriverName()].driver
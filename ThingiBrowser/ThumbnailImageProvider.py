@@ -0,0 +1,227 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, List, Optional
+from urllib.parse import unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt5.QtCore import QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+from PyQt5.QtQuick import QQuickAsyncImageProvider, QQuickImageResponse, QQuickTextureFactory
+
+from UM.Logger import Logger  # type: ignore
+
+from .LatencyTracker import LatencyTracker
+from .LruCache import LruCache
+from .Settings import Settings
+
+
+class ThumbnailImageResponse(QQuickImageResponse):
+    """
+    A thumbnail that is being loaded by the image provider. Finishes with a null image if it could not be loaded.
+    """
+
+    # Signal triggered on the loading thread. It is delivered to the thread of the response, so the QML engine has
+    # connected to finished by the time it is emitted, also when the image was in memory already.
+    _loaded = pyqtSignal()
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._image = QImage()
+        self._is_cancelled = False
+        self._loaded.connect(self.finished, type=Qt.QueuedConnection)  # type: ignore
+
+    @property
+    def isCancelled(self) -> bool:
+        return self._is_cancelled
+
+    def textureFactory(self) -> QQuickTextureFactory:
+        return QQuickTextureFactory.textureFactoryForImage(self._image)
+
+    def cancel(self) -> None:
+        # Called by QML when the image is no longer needed, for example when its delegate was scrolled away.
+        # The engine still waits for the finished signal to clean up the response.
+        self._is_cancelled = True
+
+    def setImage(self, image: QImage) -> None:
+        """
+        Finish the response. Can be called from any thread.
+        :param image: The loaded image.
+        """
+        self._image = image
+        self._loaded.emit()
+
+
+class ThumbnailImageProvider(QQuickAsyncImageProvider):
+    """
+    QML image provider that serves downscaled thumbnails from memory or a bounded disk cache.
+    Each remote image is downloaded only once and stored at twice the displayed height to look sharp on HiDPI screens.
+    Images are loaded on a thread pool instead of the single image reader thread of QML, so thumbnails load in
+    parallel.
+    Usage in QML: source: "image://thingithumb/" + encodeURIComponent(thumbnailUrl)
+    """
+
+    def __init__(self, directory: str, max_disk_size: int = Settings.THUMBNAIL_CACHE_MAX_SIZE,
+                 max_memory_items: int = Settings.THUMBNAIL_CACHE_MAX_MEMORY_ITEMS) -> None:
+        super().__init__()
+        self._directory = directory
+        self._max_disk_size = max_disk_size
+        self._memory_cache = LruCache(max_memory_items)  # type: LruCache[QImage]
+        self._disk_lock = threading.Lock()
+        # Thumbnails are loaded on their own pool, as loading one waits for its download attempts.
+        self._load_pool = ThreadPoolExecutor(max_workers=Settings.THUMBNAIL_LOAD_THREADS)
+        self._download_pool = ThreadPoolExecutor(max_workers=Settings.THUMBNAIL_DOWNLOAD_THREADS)
+        # Keeps connections to the thumbnail hosts open, so downloads after the first don't set up a new one.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=Settings.THUMBNAIL_DOWNLOAD_THREADS))
+        self._latencies = LatencyTracker()
+        os.makedirs(self._directory, exist_ok=True)
+        self._disk_size = sum(os.path.getsize(path) for path in self._getCachedFiles())
+
+    def requestImageResponse(self, image_id: str, requested_size: QSize) -> QQuickImageResponse:
+        """
+        Called by the QML engine to start loading an image.
+        :param image_id: The URL encoded remote thumbnail URL.
+        :param requested_size: The sourceSize from QML multiplied by the screen's device pixel ratio.
+        :return: The response that finishes when the image was loaded.
+        """
+        response = ThumbnailImageResponse()
+        self._load_pool.submit(self._load, response, unquote(image_id), QSize(requested_size))
+        return response
+
+    def getThumbnail(self, url: str) -> QImage:
+        """
+        Get a thumbnail from memory, disk or the network, in that order.
+        :param url: The remote thumbnail URL.
+        :return: The downscaled image, or a null image if it could not be loaded.
+        """
+        image = self._memory_cache.get(url)
+        if image is not None:
+            return image
+        path = self._getCachePath(url)
+        image = self._readFromDisk(path)
+        if image is None:
+            image = self._download(url)
+            if image.isNull():
+                return image
+            self._writeToDisk(path, image)
+        self._memory_cache.put(url, image)
+        return image
+
+    def warmUp(self, hosts: Iterable[str]) -> None:
+        """
+        Connect to thumbnail hosts in the background, so the first thumbnails don't wait for connection setup.
+        :param hosts: The host names.
+        """
+        for host in hosts:
+            self._download_pool.submit(self._connect, host)
+
+    def _load(self, response: ThumbnailImageResponse, url: str, requested_size: QSize) -> None:
+        """
+        Load a thumbnail at the requested height and finish its response. Runs on the load pool.
+        :param response: The response to finish.
+        :param url: The remote thumbnail URL.
+        :param requested_size: The requested size, a height of 0 for the stored height.
+        """
+        image = QImage()
+        try:
+            if not response.isCancelled:
+                image = self.getThumbnail(url)
+            if 0 < requested_size.height() < image.height():
+                image = image.scaledToHeight(requested_size.height(), Qt.SmoothTransformation)
+        except Exception as err:
+            Logger.log("e", "Could not load thumbnail %s: %s", url, err)
+        finally:
+            response.setImage(image)
+
+    def _connect(self, host: str) -> None:
+        try:
+            self._session.head("https://{}/".format(host), timeout=Settings.THUMBNAIL_CONNECT_TIMEOUT)
+        except requests.RequestException as err:
+            Logger.log("d", "Could not connect to thumbnail host %s: %s", host, err)
+
+    def _getCachePath(self, url: str) -> str:
+        return os.path.join(self._directory, "{}.png".format(hashlib.sha1(url.encode()).hexdigest()))
+
+    def _getCachedFiles(self) -> List[str]:
+        return [os.path.join(self._directory, name) for name in os.listdir(self._directory) if name.endswith(".png")]
+
+    def _download(self, url: str) -> QImage:
+        """
+        Download an image and downscale it to the stored thumbnail height.
+        When the server did not answer after the usual latency, a second attempt is started and the first answer
+        is used. Thumbnails are small, so the extra request costs little compared to a slow grid.
+        :param url: The remote image URL.
+        :return: The image, or a null image on failure.
+        """
+        attempts = [self._download_pool.submit(self._fetch, url)]
+        done, _ = wait(attempts, timeout=self._latencies.getHedgeDelay())
+        if not done:
+            attempts.append(self._download_pool.submit(self._fetch, url))
+            done, _ = wait(attempts, return_when=FIRST_COMPLETED)
+        data = next(iter(done)).result()
+        image = QImage()
+        if data is None or not image.loadFromData(data):
+            return QImage()
+        stored_height = Settings.THUMBNAIL_HEIGHT * Settings.THUMBNAIL_SCALE
+        if image.height() > stored_height:
+            image = image.scaledToHeight(stored_height, Qt.SmoothTransformation)
+        return image
+
+    def _fetch(self, url: str) -> Optional[bytes]:
+        """
+        Download an image, recording how long the server took to answer.
+        :param url: The remote image URL.
+        :return: The image data, or None on failure.
+        """
+        started_at = time.monotonic()
+        try:
+            response = self._session.get(url, timeout=(Settings.THUMBNAIL_CONNECT_TIMEOUT,
+                                                  Settings.THUMBNAIL_DOWNLOAD_TIMEOUT))
+        except requests.RequestException as err:
+            Logger.log("w", "Could not download thumbnail %s: %s", url, err)
+            return None
+        if response.status_code != 200:
+            Logger.log("w", "Could not load thumbnail %s (status %s)", url, response.status_code)
+            return None
+        self._latencies.add(time.monotonic() - started_at)
+        return response.content
+
+    def _readFromDisk(self, path: str) -> Optional[QImage]:
+        with self._disk_lock:
+            try:
+                os.utime(path)  # mark as recently used for eviction
+            except OSError:  # not cached, or just evicted
+                return None
+        image = QImage(path)
+        if image.isNull():
+            return None
+        return image
+
+    def _writeToDisk(self, path: str, image: QImage) -> None:
+        # Saved under a temporary name first, so concurrent loads of the same thumbnail don't write one file.
+        temporary_path = "{}.{}.tmp".format(path, threading.get_ident())
+        if not image.save(temporary_path, "PNG"):
+            return
+        with self._disk_lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temporary_path, path)
+            self._disk_size += os.path.getsize(path) - old_size
+            if self._disk_size > self._max_disk_size:
+                self._evict()
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used thumbnails until the disk cache is below 90% of its maximum size.
+        """
+        target_size = self._max_disk_size * 9 // 10
+        for path in sorted(self._getCachedFiles(), key=os.path.getmtime):
+            if self._disk_size <= target_size:
+                break
+            self._disk_size -= os.path.getsize(path)
+            os.remove(path)
@@ -1,15 +1,37 @@
 # Copyright (c) 2020.
 # Thingiverse plugin is released under the terms of the LGPLv3 or higher.
-from typing import List, Callable, Any, Tuple, Optional
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import List, Callable, Any, Tuple, Optional, Dict, Set, Union
 from abc import ABC, abstractmethod
 
-from PyQt5.QtCore import QUrl
-from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+from PyQt5.QtCore import QT_VERSION, QUrl, QStandardPaths, QThreadPool, QTimer
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest, QSslConfiguration
 
 from UM.Logger import Logger  # type: ignore
 
+from ..LatencyTracker import LatencyTracker
+from ..LruCache import LruCache
+from ..Settings import Settings
+from ..StallDetector import StallDetector
 from .ApiHelper import ApiHelper
-from .JsonObject import Thing, ThingFile, Collection, ApiError
+from .ApiResponseCache import ApiResponseCache
+from .FileDownload import FileDownload
+from .JsonObject import Thing, ThingDetails, ThingFile, Collection, ApiError, ApiTimeoutError
+from .ParseJob import ParseJob
+from .RateLimiter import RateLimiter
+from .RequestHandle import RequestHandle
+from .RequestTelemetry import RequestRecord, RequestTelemetry
+from .RequestTimeout import RequestTimeout
+from .ThingIndex import ThingIndex
+
+# A parser turns the status code and body of a reply into a status code and model.
+ResponseParser = Callable[[int, bytes], Tuple[int, Any]]
+
+# GET requests are identified by URL and Authorization header.
+RequestKey = Tuple[str, bytes]
 
 
 class AbstractApiClient(ABC):
@@ -18,8 +40,120 @@ class AbstractApiClient(ABC):
     # Re-usable network manager.
     _manager = QNetworkAccessManager()
 
+    # Disk cache shared by all drivers, installed on the network manager when the first request is created.
+    _cache = None  # type: Optional[ApiResponseCache]
+
+    # Local search index shared by all drivers, opened when the first results are indexed or searched.
+    _thing_index = None  # type: Optional[ThingIndex]
+
+    # Name under which the things and collections of this driver are stored in the local search index.
+    _index_name = ""  # type: str
+
+    # Recently viewed thing details of all drivers by driver and thing ID, so opening them again is instant.
+    _details_cache = LruCache(Settings.THING_DETAILS_CACHE_MAX_ITEMS,
+                              ttl=Settings.THING_DETAILS_CACHE_TTL)  # type: LruCache[ThingDetails]
+
     # Prevent auto-removing running callbacks by the Python garbage collector.
-    _anti_gc_callbacks = []  # type: List[Callable[[], None]]
+    _anti_gc_callbacks = []  # type: List[Callable[..., None]]
+
+    # Worker threads that decode and map responses, so large responses don't block the GUI thread.
+    _parse_pool = QThreadPool()
+    _parse_pool.setMaxThreadCount(Settings.PARSE_THREADS)
+
+    # Prevent auto-removing running parse jobs by the Python garbage collector.
+    _anti_gc_parse_jobs = []  # type: List[ParseJob]
+
+    # Prevent auto-removing running file downloads by the Python garbage collector.
+    _anti_gc_downloads = []  # type: List[FileDownload]
+
+    # Request handles per running or waiting GET request, by URL and Authorization header.
+    # Identical concurrent GET requests share one reply and add their handle.
+    _request_handlers = {}  # type: Dict[RequestKey, List[RequestHandle]]
+
+    # Running GET replies by URL and Authorization header, used to coalesce identical requests.
+    _in_flight = {}  # type: Dict[RequestKey, QNetworkReply]
+
+    # Rate limiters by API host, shared by all drivers.
+    _rate_limiters = {}  # type: Dict[str, RateLimiter]
+
+    # Requests waiting because an API asked to slow down, and callbacks for when that starts or stops.
+    _throttled_requests = set()  # type: Set[RequestKey]
+    _throttled_changed_callbacks = []  # type: List[Callable[[], Any]]
+
+    # Recent latencies by API host, shared by all drivers.
+    _latencies = {}  # type: Dict[str, LatencyTracker]
+
+    # Timings of the recent requests of all drivers, and of the running or waiting ones by URL and Authorization header.
+    _telemetry = RequestTelemetry()
+    _request_records = {}  # type: Dict[RequestKey, RequestRecord]
+
+    # Maximum rate of requests to the API host of this driver. Drivers can override these.
+    _rate_limit = Settings.API_RATE_LIMIT  # type: float
+    _rate_limit_burst = Settings.API_RATE_LIMIT_BURST  # type: int
+
+    # Time in seconds that cached responses are used without revalidation. Drivers can override these per endpoint.
+    _things_cache_ttl = Settings.HTTP_CACHE_TTL_THINGS  # type: int
+    _thing_cache_ttl = Settings.HTTP_CACHE_TTL_THING  # type: int
+    _thing_files_cache_ttl = Settings.HTTP_CACHE_TTL_THING_FILES  # type: int
+
+    # Deadlines of requests. Drivers can override these per endpoint.
+    _request_timeout = RequestTimeout(Settings.API_FIRST_BYTE_TIMEOUT, Settings.API_TOTAL_TIMEOUT)  # type: RequestTimeout
+    _things_timeout = _request_timeout  # type: RequestTimeout
+    _thing_timeout = _request_timeout  # type: RequestTimeout
+    _thing_files_timeout = _request_timeout  # type: RequestTimeout
+
+    # Number of API requests that _requestThingDetails makes. Drivers that get both from one response override this.
+    _thing_details_requests = 2  # type: int
+
+    # Hosts of this driver's thumbnails, connected to when the browser opens. The API host follows from _root_url.
+    _thumbnail_hosts = ()  # type: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        """
+        Get the name under which things and files of this driver are stored locally.
+        :return: The name.
+        """
+        return self._index_name
+
+    @property
+    def hosts(self) -> List[str]:
+        """
+        Get the hosts that the API requests of this driver go to.
+        :return: The host names.
+        """
+        return [QUrl(self._root_url).host()]
+
+    @property
+    def thing_details_requests(self) -> int:
+        """
+        Get the number of API requests that getThingDetails makes when the details are not in memory.
+        :return: The number of requests.
+        """
+        return self._thing_details_requests
+
+    @property
+    def thumbnail_hosts(self) -> List[str]:
+        """
+        Get the hosts that the thumbnails of this driver are loaded from.
+        :return: The host names.
+        """
+        return list(self._thumbnail_hosts)
+
+    def warmUp(self) -> None:
+        """
+        Connect to the API hosts of this driver ahead of the first request.
+        The network manager keeps the connections open for a while, so the first requests don't wait for DNS, TCP
+        and TLS setup. HTTP/2 is offered, so requests made later can share the connection.
+        """
+        if QT_VERSION < 0x050D00:  # the overload taking an SSL configuration was added in Qt 5.13
+            for host in self.hosts:
+                self._manager.connectToHostEncrypted(host, 443)
+            return
+        ssl_configuration = QSslConfiguration.defaultConfiguration()
+        ssl_configuration.setAllowedNextProtocols([b"h2", QSslConfiguration.NextProtocolHttp1_1])
+        for host in self.hosts:
+            self._manager.connectToHostEncrypted(host, 443, ssl_configuration)
 
     @abstractmethod
     def authenticate(self) -> None:
@@ -102,58 +236,158 @@ class AbstractApiClient(ABC):
 
     @abstractmethod
     def getCollections(self, on_finished: Callable[[List[Collection]], Any],
-                       on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]]) -> None:
+                       on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]]) -> RequestHandle:
         """
         Get user's collections.
         :param on_finished: Callback with user's collections.
         :param on_failed: Callback with server response.
+        :return: The request handle, which can be aborted.
         """
         raise NotImplementedError("getCollections must be implemented")
 
     @abstractmethod
     def getThing(self, thing_id: int, on_finished: Callable[[Thing], Any],
-                 on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]] = None) -> None:
+                 on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]] = None,
+                 priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         """
         Get a single thing by ID.
         :param thing_id: The thing ID.
         :param on_finished: Callback method to receive the async result on.
         :param on_failed: Callback method to receive failed request on.
+        :param priority: The network priority, use LowPriority for speculative requests.
+        :return: The request handle, which can be aborted.
         """
         raise NotImplementedError("getThing must be implemented")
 
     @abstractmethod
     def getThingFiles(self, thing_id: int, on_finished: Callable[[List[ThingFile]], Any],
-                      on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]] = None) -> None:
+                      on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]] = None,
+                      priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         """
         Get a thing's files by ID.
         :param thing_id: The thing ID.
         :param on_finished: Callback method to receive the async result on.
         :param on_failed: Callback method to receive failed request on.
+        :param priority: The network priority, use LowPriority for speculative requests.
+        :return: The request handle, which can be aborted.
         """
         raise NotImplementedError("getThingFiles must be implemented")
 
     @abstractmethod
-    def downloadThingFile(self, file_id: int, file_name: str, on_finished: Callable[[bytes], Any]) -> None:
+    def downloadThingFile(self, file_id: int, file_name: str, file_path: str,
+                          on_finished: Callable[[str, str], Any],
+                          on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                          on_progress: Optional[Callable[[int, int], Any]] = None) -> RequestHandle:
         """
-        Download a thing file by its ID.
+        Download a thing file by its ID. The file is streamed to disk while it's being received.
         :param file_id: The file ID to download.
         :param file_name: The file's name including extension.
-        :param on_finished: Callback method to receive the async result on as bytes.
+        :param file_path: The path to write the file to.
+        :param on_finished: Callback method to receive the path and SHA-256 hash of the downloaded file on.
+        :param on_failed: Callback method to receive failed request on.
+        :param on_progress: Callback method to receive the bytes received and total bytes on (total is -1 if unknown).
+        :return: The request handle, which can be aborted.
         """
         raise NotImplementedError("downloadThingFile must be implemented")
 
     @abstractmethod
     def getThings(self, query: str, page: int, on_finished: Callable[[List[Thing]], Any],
-                  on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]] = None) -> None:
+                  on_failed: Optional[Callable[[Optional[ApiError],Optional[int]], Any]] = None,
+                  priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         """
         Get things by query.
         :param query: The things to get.
         :param page: Page number of query results (for pagination).
         :param on_finished: Callback method to receive the async result on.
         :param on_failed: Callback method to receive failed request on.
+        :param priority: The network priority, use LowPriority for speculative requests.
+        :return: The request handle, which can be aborted.
         """
         raise NotImplementedError("get must be implemented")
 
+    def getThingDetails(self, thing_id: int, on_finished: Callable[[ThingDetails], Any],
+                        on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                        priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
+        """
+        Get a single thing and its files by ID.
+        Recently viewed details are returned from memory right away, without network requests.
+        :param thing_id: The thing ID.
+        :param on_finished: Callback method to receive the thing details on.
+        :param on_failed: Callback method to receive failed request on.
+        :param priority: The network priority, use LowPriority for speculative requests.
+        :return: The request handle, which can be aborted.
+        """
+        key = (self._index_name, thing_id)
+        details = self._details_cache.get(key)
+        if details:
+            handle = RequestHandle(None, on_finished, on_failed)
+            handle.finish()
+            on_finished(details)
+            return handle
+
+        @StallDetector.dispatcher
+        def on_details(received: ThingDetails) -> None:
+            self._details_cache.put(key, received)
+            on_finished(received)
+
+        return self._requestThingDetails(thing_id, on_details, on_failed, priority)
+
+    def hasThingDetails(self, thing_id: int) -> bool:
+        """
+        Check if the details of a thing are in memory, so getThingDetails will not make network requests.
+        :param thing_id: The thing ID.
+        :return: True if the details are in memory.
+        """
+        return (self._index_name, thing_id) in self._details_cache
+
+    def _requestThingDetails(self, thing_id: int, on_finished: Callable[[ThingDetails], Any],
+                             on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                             priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
+        """
+        Request a thing and its files from the API.
+        By default the thing and the files are requested separately. Drivers that get both from one response override
+        this to make a single request.
+        :param thing_id: The thing ID.
+        :param on_finished: Callback method to receive the thing details on.
+        :param on_failed: Callback method to receive failed request on.
+        :param priority: The network priority.
+        :return: The request handle, which can be aborted.
+        """
+        received = {}  # type: Dict[str, Any]
+        requests = []  # type: List[RequestHandle]
+
+        @StallDetector.dispatcher
+        def on_part(name: str, value: Any) -> None:
+            received[name] = value
+            if len(received) == 2:
+                handle.finish()
+                on_finished(ThingDetails({"thing": received["thing"], "files": received["files"]}))
+
+        @StallDetector.dispatcher
+        def on_part_failed(error: Optional[ApiError], status_code: Optional[int]) -> None:
+            # Report the first failure only, the other request is not needed anymore.
+            if handle.isRunning:
+                handle.abort()
+                if on_failed:
+                    on_failed(error, status_code)
+
+        def on_abort(_: RequestHandle) -> None:
+            for request in requests:
+                request.abort()
+
+        handle = RequestHandle(None, on_finished, on_failed, on_abort=on_abort)
+        requests.append(self.getThing(thing_id, lambda thing: on_part("thing", thing), on_part_failed, priority))
+        requests.append(self.getThingFiles(thing_id, lambda files: on_part("files", files), on_part_failed, priority))
+        return handle
+
+    def searchLocal(self, search_terms: str) -> List[Union[Thing, Collection]]:
+        """
+        Search the things and collections of this driver that were received before, without network requests.
+        :param search_terms: What to search for.
+        :return: The matching things and collections, best match first.
+        """
+        return self._getThingIndex().search(search_terms, self._index_name)
+
     @property
     @abstractmethod
     def _root_url(self) -> str:
@@ -170,44 +404,468 @@ class AbstractApiClient(ABC):
         """
         raise NotImplementedError("_setAuth must be implemented")
 
-    def _createEmptyRequest(self, url: str, content_type: str = "application/json") -> QNetworkRequest:
+    def _createEmptyRequest(self, url: str, content_type: str = "application/json", cache_ttl: Optional[int] = None,
+                            use_cache: bool = True,
+                            priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> QNetworkRequest:
         """
         Create a new network request with the needed HTTP headers.
         :param url: The full URL to do the request on.
         :param content_type: Content-Type header value
+        :param cache_ttl: Time in seconds the response may be served from cache without revalidation.
+        :param use_cache: Whether the response may be read from or stored in the cache at all (disable for downloads).
+        :param priority: The network priority of the request.
         :return: The QNetworkRequest.
         """
+        cache = self._getCache()
         request = QNetworkRequest(QUrl(url))
+        request.setPriority(priority)
         request.setHeader(QNetworkRequest.ContentTypeHeader, content_type)
         request.setAttribute(QNetworkRequest.RedirectPolicyAttribute, True)  # file downloads reply with a 302 first
+        request.setAttribute(QNetworkRequest.Http2AllowedAttribute, True)  # used when the server supports it
         self._setAuth(request)
+        if not use_cache:
+            request.setAttribute(QNetworkRequest.CacheLoadControlAttribute, QNetworkRequest.AlwaysNetwork)
+            request.setAttribute(QNetworkRequest.CacheSaveControlAttribute, False)
+        elif cache_ttl is not None:
+            cache.setTimeToLive(request.url(), cache_ttl)  # after _setAuth as that might change the URL
         return request
 
-    def _addCallback(self, reply: QNetworkReply,
-                     on_finished: Callable[[Any], Any],
-                     on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
-                     parser: Optional[Callable[[QNetworkReply], Tuple[int, Any]]] = None) -> None:
+    def _getEndpoint(self, url: QUrl) -> str:
+        """
+        Get the endpoint of a request URL for the telemetry, without the identifiers and query, like /things/{}/files.
+        Paths of REST APIs alternate between names and identifiers, so every second segment is replaced.
+        Drivers with other URL schemes can override this.
+        :param url: The request URL.
+        :return: The endpoint.
+        """
+        path = url.path()
+        root_path = QUrl(self._root_url).path().rstrip("/")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        segments = path.strip("/").split("/")
+        return "/" + "/".join("{}" if index % 2 else segment for index, segment in enumerate(segments))
+
+    @classmethod
+    def _getCache(cls) -> ApiResponseCache:
+        """
+        Get the shared response cache, installing it on the network manager if that did not happen yet.
+        :return: The response cache.
+        """
+        if not AbstractApiClient._cache:
+            cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            directory = os.path.join(cache_root, Settings.HTTP_CACHE_DIRECTORY)
+            AbstractApiClient._cache = ApiResponseCache(directory, Settings.HTTP_CACHE_MAX_SIZE)
+            cls._manager.setCache(AbstractApiClient._cache)
+        return AbstractApiClient._cache
+
+    @classmethod
+    def _getThingIndex(cls) -> ThingIndex:
         """
-        Creates a callback function so that it includes the parsing of the response into the correct model.
-        The callback is added to the 'finished' signal of the reply.
-        :param reply: The reply that should be listened to.
+        Get the shared local search index, opening it if that did not happen yet.
+        :return: The local search index.
+        """
+        if not AbstractApiClient._thing_index:
+            cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            AbstractApiClient._thing_index = ThingIndex(os.path.join(cache_root, Settings.THING_INDEX_FILE))
+        return AbstractApiClient._thing_index
+
+    def _indexed(self, parser: ResponseParser) -> ResponseParser:
+        """
+        Wrap a parser so the things or collections it returns are added to the local search index.
+        The parser runs on a worker thread, so indexing does not block the GUI thread either.
+        :param parser: The parser that returns a thing, a collection or a list of them.
+        :return: The wrapped parser.
+        """
+        index = self._getThingIndex()
+        index_name = self._index_name
+
+        def indexing_parser(status_code: int, body: bytes) -> Tuple[int, Any]:
+            status_code, result = parser(status_code, body)
+            if result and 200 <= status_code < 300:
+                items = result if isinstance(result, list) else [result]
+                index.addItems(index_name, [item.thing if isinstance(item, ThingDetails) else item for item in items])
+            return status_code, result
+
+        return indexing_parser
+
+    def _get(self, request: QNetworkRequest,
+             on_finished: Callable[[Any], Any],
+             on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+             parser: Optional[ResponseParser] = None,
+             timeout: Optional[RequestTimeout] = None,
+             hedge: bool = False) -> RequestHandle:
+        """
+        Perform a GET request and handle its response.
+        When an identical request (same URL and authorization) is already running, no new request is made.
+        The running reply is shared instead and the response is parsed and handled separately for each caller.
+        Requests are rate limited per API host. Requests that fail because the API is busy or unreachable are retried
+        with exponential backoff, callers only get the response of the last attempt.
+        Requests that miss a deadline are aborted and fail with an ApiTimeoutError.
+        The response is parsed on a worker thread, the callbacks are called on the GUI thread.
+        :param request: The request to perform.
         :param on_finished: The callback in case the request is successful.
         :param on_failed: The callback in case the request fails.
         :param parser: A custom parser for the response data, defaults to a JSON parser.
-        """
-        def parse() -> None:
-            self._anti_gc_callbacks.remove(parse)
-            status_code, response = parser(reply) if parser else ApiHelper.parseReplyAsJson(reply)
-            if not status_code or status_code >= 400 or response is None:
-                Logger.warning("API returned with status {} and body {}".format(status_code, response))
-                if on_failed:
-                    error_response = None
-                    if isinstance(response, dict):
-                        error_response = ApiError(response)
-                    on_failed(error_response, status_code)
-            else:
-                on_finished(response)
+        :param timeout: The deadlines of the request, defaults to the deadlines of this driver.
+        :param hedge: Start a second attempt when the first is slower than usual, for small idempotent requests.
+        :return: The request handle for this caller, which can be aborted.
+        """
+        key = (request.url().toString(), bytes(request.rawHeader(b"Authorization")))
+        handle = RequestHandle(self._in_flight.get(key), on_finished, on_failed, parser,
+                               on_abort=lambda aborted: self._abortHandle(key, aborted))
+        handles = self._request_handlers.get(key)
+        if handles is not None:
+            handles.append(handle)
+            if key in self._request_records:
+                self._request_records[key].callers += 1
+            return handle
+        self._request_handlers[key] = [handle]
+        self._request_records[key] = RequestRecord(self._index_name, self._getEndpoint(request.url()))
+        self._send(request, key, timeout or self._request_timeout, hedge)
+        return handle
+
+    def _send(self, request: QNetworkRequest, key: RequestKey, timeout: RequestTimeout, hedge: bool,
+              attempt: int = 0, delay: float = 0) -> None:
+        """
+        Start a request as soon as the rate limiter of its API host allows it.
+        :param request: The request to perform.
+        :param key: The URL and Authorization header of the request.
+        :param timeout: The deadlines of the request.
+        :param hedge: Whether to start a second attempt when the first is slower than usual.
+        :param attempt: The number of earlier attempts of this request.
+        :param delay: The minimum time in seconds to wait, for retries.
+        """
+        rate_limiter = self._getRateLimiter(request.url().host())
+        wait = max(delay, rate_limiter.reserve())
+        if wait <= 0:
+            self._startRequest(request, key, timeout, hedge, attempt)
+            return
+        self._setThrottled(key, rate_limiter.isPaused)
+        QTimer.singleShot(int(wait * 1000), lambda: self._startRequest(request, key, timeout, hedge, attempt))
+
+    def _startRequest(self, request: QNetworkRequest, key: RequestKey, timeout: RequestTimeout, hedge: bool,
+                      attempt: int) -> None:
+        """
+        Start a request and handle its reply, unless all of its callers aborted while it was waiting.
+        A hedged request starts a second reply when the first did not start replying after the usual latency of the
+        host. The first reply to finish is used and the other one is aborted.
+        :param request: The request to perform.
+        :param key: The URL and Authorization header of the request.
+        :param timeout: The deadlines of the request.
+        :param hedge: Whether to start a second attempt when the first is slower than usual.
+        :param attempt: The number of earlier attempts of this request.
+        """
+        self._setThrottled(key, False)
+        handles = self._request_handlers.get(key)
+        if not handles or key in self._in_flight:
+            return
+        host = request.url().host()
+        latencies = self._getLatencyTracker(host)
+        started_at = time.monotonic()
+        record = self._request_records[key]
+        if attempt == 0:
+            record.queue_time = record.getElapsedTime()
+        record.retries = attempt
+        replies = []  # type: List[QNetworkReply]
+        timed_out = False
+        is_done = False
+
+        def start_reply() -> None:
+            reply = self._manager.get(request)
+            replies.append(reply)
+            reply.metaDataChanged.connect(lambda: on_first_byte(reply))  # type: ignore
+            reply.finished.connect(lambda: on_reply_finished(reply))  # type: ignore
+
+        def start_hedge() -> None:
+            if self._getRateLimiter(host).tryAcquire():
+                Logger.log("d", "Hedging %s, no response after %.1f seconds", request.url().path(),
+                           time.monotonic() - started_at)
+                record.hedged = True
+                start_reply()
+
+        def on_first_byte(reply: QNetworkReply) -> None:
+            if first_byte_timer.isActive():
+                record.first_byte_time = time.monotonic() - started_at
+                if not reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute):
+                    latencies.add(record.first_byte_time)
+            first_byte_timer.stop()
+            hedge_timer.stop()
+
+        def on_timeout() -> None:
+            nonlocal timed_out
+            timed_out = True
+            replies[0].abort()
+
+        @StallDetector.dispatcher
+        def on_reply_finished(reply: QNetworkReply) -> None:
+            nonlocal is_done
             reply.deleteLater()
+            if is_done:
+                return  # the other attempt of a hedged request was used
+            is_done = True
+            self._anti_gc_callbacks.remove(on_reply_finished)
+            for timer in (first_byte_timer, total_timer, hedge_timer):
+                timer.stop()
+            self._in_flight.pop(key, None)
+            for other_reply in replies:
+                if other_reply is not reply:
+                    other_reply.abort()
+            if not self._request_handlers.get(key):
+                return  # all callers aborted
+            if timed_out:
+                Logger.log("w", "Request to %s timed out", request.url().path())
+                self._telemetry.add(self._request_records.pop(key), error="timeout")
+                self._failHandles(self._request_handlers.pop(key), ApiTimeoutError({"error": "Request timed out"}))
+                return
+            status_code, body = ApiHelper.readReply(reply)
+            record.status_code = status_code
+            record.bytes_received = len(body)
+            record.from_cache = bool(reply.attribute(QNetworkRequest.SourceIsFromCacheAttribute))
+            retry_delay = self._getRetryDelay(reply, status_code, attempt)
+            if retry_delay is not None:
+                Logger.log("w", "Retrying %s in %.1f seconds, the API returned with status %s",
+                           request.url().path(), retry_delay, status_code)
+                if status_code in Settings.API_THROTTLE_STATUS_CODES:
+                    self._getRateLimiter(host).pause(retry_delay)
+                self._send(request, key, timeout, hedge, attempt + 1, retry_delay)
+                return
+            if status_code is None:
+                record.error = "no response"
+            self._parseInBackground(status_code, body, self._request_handlers.pop(key), self._request_records.pop(key))
 
-        self._anti_gc_callbacks.append(parse)
-        reply.finished.connect(parse)  # type: ignore
+        first_byte_timer = self._startTimer(timeout.first_byte, on_timeout)
+        total_timer = self._startTimer(timeout.total, on_timeout)
+        hedge_timer = self._startTimer(latencies.getHedgeDelay(), start_hedge, active=hedge and attempt == 0)
+        self._anti_gc_callbacks.append(on_reply_finished)
+        start_reply()
+        self._in_flight[key] = replies[0]
+        for handle in handles:
+            handle.setReply(replies[0])
+
+    @staticmethod
+    def _startTimer(seconds: float, callback: Callable[[], Any], active: bool = True) -> QTimer:
+        """
+        Create a single shot timer.
+        :param seconds: The time until the timer fires.
+        :param callback: The callback to call when it fires.
+        :param active: Whether to start the timer right away.
+        :return: The timer.
+        """
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.timeout.connect(callback)  # type: ignore
+        if active:
+            timer.start(int(seconds * 1000))
+        return timer
+
+    @staticmethod
+    def _failHandles(handles: List[RequestHandle], error: ApiError) -> None:
+        """
+        Report a request that failed without a response to its callers.
+        :param handles: The handles waiting for the request.
+        :param error: The error.
+        """
+        for handle in handles:
+            handle.finish()
+            if handle.on_failed:
+                handle.on_failed(error, None)
+
+    def _getLatencyTracker(self, host: str) -> LatencyTracker:
+        """
+        Get the recent latencies of an API host, used to decide when to hedge a request.
+        :param host: The host name.
+        :return: The latency tracker.
+        """
+        if host not in self._latencies:
+            self._latencies[host] = LatencyTracker()
+        return self._latencies[host]
+
+    def _getRateLimiter(self, host: str) -> RateLimiter:
+        """
+        Get the rate limiter of an API host, creating it with the limits of this driver if there is none yet.
+        :param host: The host name.
+        :return: The rate limiter.
+        """
+        if host not in self._rate_limiters:
+            self._rate_limiters[host] = RateLimiter(self._rate_limit, self._rate_limit_burst)
+        return self._rate_limiters[host]
+
+    @classmethod
+    def _getRetryDelay(cls, reply: QNetworkReply, status_code: Optional[int], attempt: int) -> Optional[float]:
+        """
+        Get the time to wait before retrying a request that failed because the API was busy or unreachable.
+        A delay asked for by the API in the Retry-After header is used when present, otherwise the delay is doubled
+        for every attempt. A random part is added so clients that failed at the same time don't retry at once.
+        :param reply: The finished reply.
+        :param status_code: The HTTP status code of the reply, None when there was no response at all.
+        :param attempt: The number of earlier attempts of this request.
+        :return: The delay in seconds, or None if the request should not be retried.
+        """
+        if attempt >= Settings.API_MAX_RETRIES:
+            return None
+        if status_code:
+            if status_code not in Settings.API_RETRY_STATUS_CODES:
+                return None
+        elif reply.error() in (QNetworkReply.NoError, QNetworkReply.OperationCanceledError):  # type: ignore
+            return None
+        retry_after = cls._parseRetryAfter(bytes(reply.rawHeader(b"Retry-After")))
+        if retry_after is None:
+            backoff = Settings.API_RETRY_BASE_DELAY * 2 ** attempt
+            retry_after = min(random.uniform(backoff / 2, backoff), Settings.API_MAX_RETRY_DELAY)
+        return retry_after if retry_after <= Settings.API_MAX_RETRY_DELAY else None
+
+    @staticmethod
+    def _parseRetryAfter(value: bytes) -> Optional[float]:
+        """
+        Parse a Retry-After header, which has either a number of seconds or an HTTP date.
+        :param value: The header value.
+        :return: The time to wait in seconds, or None if the header is missing or invalid.
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value.decode("latin-1")).timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    @classmethod
+    def isThrottled(cls) -> bool:
+        """
+        Check if requests are waiting because an API asked to slow down.
+        :return: True if requests are waiting.
+        """
+        return bool(cls._throttled_requests)
+
+    @classmethod
+    def getTelemetry(cls) -> RequestTelemetry:
+        """
+        Get the timings of the recent requests of all drivers.
+        :return: The request telemetry.
+        """
+        return cls._telemetry
+
+    @classmethod
+    def addThrottledChangedCallback(cls, callback: Callable[[], Any]) -> None:
+        """
+        Add a callback for when requests start or stop waiting because an API asked to slow down.
+        :param callback: The callback.
+        """
+        cls._throttled_changed_callbacks.append(callback)
+
+    @classmethod
+    def _setThrottled(cls, key: RequestKey, throttled: bool) -> None:
+        was_throttled = cls.isThrottled()
+        if throttled:
+            cls._throttled_requests.add(key)
+        else:
+            cls._throttled_requests.discard(key)
+        if cls.isThrottled() != was_throttled:
+            for callback in cls._throttled_changed_callbacks:
+                callback()
+
+    def _parseInBackground(self, status_code: int, body: bytes, handles: List[RequestHandle],
+                           record: Optional[RequestRecord] = None) -> None:
+        """
+        Parse a response body for each handle on a worker thread and handle the results on the GUI thread.
+        Handles that are aborted while their response is being parsed are skipped.
+        :param status_code: The HTTP status code of the reply.
+        :param body: The response body.
+        :param handles: The handles waiting for this response.
+        :param record: The timings of the request, added to the telemetry once all callbacks are done.
+        """
+        job = ParseJob(status_code, body, [handle.parser for handle in handles])
+
+        @StallDetector.dispatcher
+        def on_parsed(results: List[Tuple[int, Any]]) -> None:
+            self._anti_gc_parse_jobs.remove(job)
+            for handle, (parsed_status_code, response) in zip(handles, results):
+                if handle.isAborted:
+                    continue
+                handle.finish()
+                self._handleResponse(parsed_status_code, response, handle.on_finished, handle.on_failed)
+            if record:
+                record.parse_time = job.parse_time
+                self._telemetry.add(record)
+
+        job.signals.finished.connect(on_parsed)
+        self._anti_gc_parse_jobs.append(job)
+        self._parse_pool.start(job)
+
+    @classmethod
+    def _abortHandle(cls, key: RequestKey, handle: RequestHandle) -> None:
+        """
+        Drop the callbacks of an aborted handle. The request is aborted when no other handle is waiting for it.
+        :param key: The URL and Authorization header of the request.
+        :param handle: The aborted handle.
+        """
+        handles = cls._request_handlers.get(key)
+        if handles is None or handle not in handles:
+            return
+        handles.remove(handle)
+        if handles:
+            return
+        del cls._request_handlers[key]
+        cls._setThrottled(key, False)
+        record = cls._request_records.pop(key, None)
+        if record:
+            cls._telemetry.add(record, error="aborted")
+        reply = cls._in_flight.get(key)
+        if reply:
+            reply.abort()
+
+    def _download(self, request: QNetworkRequest, file_path: str,
+                  on_finished: Callable[[str, str], Any],
+                  on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                  on_progress: Optional[Callable[[int, int], Any]] = None) -> RequestHandle:
+        """
+        Perform a GET request and stream the response body into a file.
+        Downloads are never coalesced as every caller wants its own file. They have no total deadline as files can
+        be large, but fail when no data is received for a while.
+        :param request: The request to perform.
+        :param file_path: The path to write the response body to.
+        :param on_finished: The callback with the file path and hash in case the download is successful.
+        :param on_failed: The callback in case the download fails.
+        :param on_progress: The callback with the bytes received and total bytes.
+        :return: The request handle, which can be aborted.
+        """
+        if hasattr(request, "setTransferTimeout"):  # Qt 5.15 and newer
+            request.setTransferTimeout(Settings.DOWNLOAD_STALL_TIMEOUT * 1000)
+        reply = self._manager.get(request)
+        download = FileDownload(reply, file_path, on_finished, on_failed, on_progress)
+        self._anti_gc_downloads.append(download)
+        handle = RequestHandle(reply, on_finished, on_failed, on_abort=lambda _: download.abort())
+
+        def cleanup() -> None:
+            self._anti_gc_callbacks.remove(cleanup)
+            self._anti_gc_downloads.remove(download)
+            handle.finish()
+
+        self._anti_gc_callbacks.append(cleanup)
+        reply.finished.connect(cleanup)  # type: ignore
+        return handle
+
+    @staticmethod
+    @StallDetector.dispatcher
+    def _handleResponse(status_code: int, response: Any,
+                        on_finished: Callable[[Any], Any],
+                        on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+        """
+        Pass a parsed response to the right callback.
+        :param status_code: The HTTP status code of the reply.
+        :param response: The parsed response.
+        :param on_finished: The callback in case the request is successful.
+        :param on_failed: The callback in case the request fails.
+        """
+        if not status_code or status_code >= 400 or response is None:
+            Logger.warning("API returned with status {} and body {}".format(status_code, response))
+            if on_failed:
+                error_response = None
+                if isinstance(response, dict):
+                    error_response = ApiError(response)
+                on_failed(error_response, status_code)
+        else:
+            on_finished(response)
@@ -1,27 +1,37 @@
 # Copyright (c) 2020.
 # Thingiverse plugin is released under the terms of the LGPLv3 or higher.
+import os
 import uuid
-from urllib.parse import urlencode
+import zlib
 from typing import Dict, Any
 
-import requests
-from PyQt5.QtCore import pyqtSlot, QObject
+from PyQt5.QtCore import pyqtSlot, QObject, QStandardPaths
 
-from UM.Logger import Logger  # type: ignore
 from cura.CuraApplication import CuraApplication  # type: ignore
 
+from .AnalyticsQueue import AnalyticsQueue
 from ..PreferencesHelper import PreferencesHelper
 from ..Settings import Settings
 
 
 class Analytics(QObject):
-    """ The analytics service connects our app to Google Analytics. """
+    """
+    The analytics service connects our app to Google Analytics.
+    Hits are queued and sent in batches from a background thread, the UI thread never waits for the network.
+    """
 
     def __init__(self, parent = None):
         super().__init__(parent)
         application = CuraApplication.getInstance()
         self._client_id = PreferencesHelper.initSetting(Settings.ANALYTICS_CLIENT_ID_PREFERENCES_KEY, str(uuid.uuid4()))
-        self._user_agent = "{}/{}".format(application.getApplicationName(), application.getVersion())
+        user_agent = "{}/{}".format(application.getApplicationName(), application.getVersion())
+        storage_path = os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation),
+                                    Settings.ANALYTICS_STORAGE_FILE)
+        self._queue = AnalyticsQueue(storage_path, user_agent)
+        self._is_sampled = self._isSampled(self._client_id, Settings.ANALYTICS_SAMPLE_RATE)
+        if self._is_sampled:
+            self._queue.start()
+        application.applicationShuttingDown.connect(self._queue.stop)
 
     @pyqtSlot(str, name="trackScreen")
     def trackScreen(self, screen_name: str) -> None:
@@ -31,7 +41,20 @@ class Analytics(QObject):
     def trackEvent(self, category: str, event_name: str) -> None:
         self._send({"t": "event", "ec": category, "ea": event_name, "ev": 0})
 
+    @staticmethod
+    def _isSampled(client_id: str, sample_rate: float) -> bool:
+        """
+        Decide whether a client sends hits. The decision is based on the client ID,
+        so a client is either sampled for all its sessions or not at all.
+        :param client_id: The client ID.
+        :param sample_rate: The fraction of clients that is sampled.
+        :return: True if the client sends hits.
+        """
+        return zlib.crc32(str(client_id).encode()) % 10000 < sample_rate * 10000
+
     def _send(self, data: Dict[str, Any]):
+        if not self._is_sampled:
+            return
         params = {
             "v": 1,
             "tid": Settings.ANALYTICS_ID,
@@ -39,9 +62,4 @@ class Analytics(QObject):
             "av": Settings.VERSION,
             "an": "ThingiVerse plugin"
         }
-        headers = {"User-Agent": self._user_agent}
-        url = "https://www.google-analytics.com/collect?{}".format(urlencode({**params, **data}))
-        try:
-            requests.post(url, headers=headers)
-        except Exception as err:
-            Logger.log("w", "Could not call Analytics API: %s", err)
+        self._queue.add({**params, **data})
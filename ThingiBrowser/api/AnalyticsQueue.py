@@ -0,0 +1,172 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+
+from UM.Logger import Logger  # type: ignore
+
+from ..Settings import Settings
+
+
+class AnalyticsQueue:
+    """
+    Collects analytics hits in memory and sends them in batches from a background thread.
+    A batch is sent when it's full or when the flush interval passed. Hits that could not be sent are kept
+    (up to a maximum, the oldest are dropped first) and stored on disk when the plugin stops, so they are sent after
+    the next start. A batch that is being sent while stopping is stored as well, until the request succeeded.
+    """
+
+    # Google drops hits that are queued for longer than 4 hours.
+    MAX_QUEUE_TIME = 4 * 60 * 60  # in seconds
+
+    def __init__(self, storage_path: str, user_agent: str,
+                 batch_size: int = Settings.ANALYTICS_BATCH_SIZE,
+                 flush_interval: float = Settings.ANALYTICS_FLUSH_INTERVAL,
+                 max_hits: int = Settings.ANALYTICS_MAX_QUEUED_HITS) -> None:
+        self._storage_path = storage_path
+        self._user_agent = user_agent
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_hits = max_hits
+        self._hits = deque()  # type: Deque[Dict[str, Any]]  # oldest first
+        self._sending = []  # type: List[Dict[str, Any]]
+        self._condition = threading.Condition()
+        self._thread = None  # type: Optional[threading.Thread]
+        self._is_stopping = False
+
+    def start(self) -> None:
+        """
+        Start the worker thread, which first queues the hits that were stored by the previous session.
+        """
+        with self._condition:
+            if self._thread or self._is_stopping:
+                return
+            self._thread = threading.Thread(target=self._run, name="ThingiBrowserAnalytics", daemon=True)
+            self._thread.start()
+
+    def add(self, hit: Dict[str, Any]) -> None:
+        """
+        Queue a hit. Never blocks on I/O, the worker thread is started if that did not happen yet.
+        :param hit: The Measurement Protocol parameters of the hit.
+        """
+        with self._condition:
+            if self._is_stopping:
+                return
+            self._hits.append(dict(hit, _time=time.time()))
+            self._trim()
+            self.start()
+            if len(self._hits) >= self._batch_size:
+                self._condition.notify()
+
+    def stop(self, timeout: float = Settings.ANALYTICS_STOP_TIMEOUT) -> None:
+        """
+        Stop the worker thread and store the hits that were not sent yet.
+        Called on the GUI thread while Cura shuts down, so a running batch request is only waited for shortly. If it
+        is still running, its hits are stored too, and stored again without them by the worker once they were sent.
+        :param timeout: The maximum time in seconds to wait for a running batch request.
+        """
+        with self._condition:
+            self._is_stopping = True
+            self._condition.notify()
+        if not self._thread:
+            return
+        self._thread.join(timeout)
+        with self._condition:
+            hits = self._sending + list(self._hits)
+            if self._thread.is_alive() and hits:
+                self._store(hits)
+
+    def _run(self) -> None:
+        self._load()
+        while True:
+            with self._condition:
+                if len(self._hits) < self._batch_size and not self._is_stopping:
+                    self._condition.wait(self._flush_interval)
+                if self._is_stopping:
+                    self._store(list(self._hits))
+                    return
+                self._sending = [self._hits.popleft() for _ in range(min(self._batch_size, len(self._hits)))]
+            is_sent = self._sendBatch(self._sending) if self._sending else True
+            with self._condition:
+                if not is_sent:
+                    # Put the hits back in front of the queue and wait for the next interval before trying again.
+                    self._hits.extendleft(reversed(self._sending))
+                    self._trim()
+                self._sending = []
+                if self._is_stopping:
+                    self._store(list(self._hits))
+                    return
+                if not is_sent:
+                    self._condition.wait(self._flush_interval)
+
+    def _sendBatch(self, batch: List[Dict[str, Any]]) -> bool:
+        """
+        Send a batch of hits in a single request.
+        :param batch: The hits.
+        :return: False if the hits should be retried later, True otherwise.
+        """
+        now = time.time()
+        lines = []
+        for hit in batch:
+            queue_time = now - hit["_time"]
+            if queue_time > self.MAX_QUEUE_TIME:
+                continue
+            params = {key: value for key, value in hit.items() if key != "_time"}
+            params["qt"] = int(queue_time * 1000)
+            lines.append(urlencode(params))
+        if not lines:
+            return True
+        try:
+            response = requests.post(Settings.ANALYTICS_BATCH_URL, data="\n".join(lines),
+                                     headers={"User-Agent": self._user_agent}, timeout=Settings.ANALYTICS_TIMEOUT)
+            return response.status_code < 500
+        except requests.RequestException as err:
+            Logger.log("w", "Could not call Analytics API: %s", err)
+            return False
+
+    def _load(self) -> None:
+        """
+        Queue the hits that were stored by the previous session.
+        """
+        if not os.path.exists(self._storage_path):
+            return
+        try:
+            with open(self._storage_path, "r") as storage_file:
+                stored_hits = json.load(storage_file)
+            os.remove(self._storage_path)
+        except (OSError, ValueError) as err:
+            Logger.log("w", "Could not load stored analytics hits: %s", err)
+            return
+        with self._condition:
+            self._hits.extendleft(reversed(stored_hits))
+            self._trim()
+
+    def _trim(self) -> None:
+        """
+        Drop the oldest hits above the maximum. Must be called while holding the lock.
+        """
+        while len(self._hits) > self._max_hits:
+            self._hits.popleft()
+
+    def _store(self, hits: List[Dict[str, Any]]) -> None:
+        """
+        Store hits to send after the next start, replacing the ones stored before.
+        :param hits: The hits, stored hits are removed if this is empty.
+        """
+        try:
+            if not hits:
+                if os.path.exists(self._storage_path):
+                    os.remove(self._storage_path)
+                return
+            os.makedirs(os.path.dirname(self._storage_path), exist_ok=True)
+            with open(self._storage_path, "w") as storage_file:
+                json.dump(hits, storage_file)
+        except OSError as err:
+            Logger.log("w", "Could not store analytics hits: %s", err)
@@ -0,0 +1,118 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import time
+from typing import Dict, List, Tuple
+
+from PyQt5.QtCore import QDateTime, QUrl, QIODevice
+from PyQt5.QtNetwork import QNetworkDiskCache, QNetworkCacheMetaData
+
+
+class ApiResponseCache(QNetworkDiskCache):
+    """
+    Size-bounded disk cache for API responses.
+    Entries are evicted least recently used first. Drivers can give a URL a time-to-live in which the cached
+    response is used without touching the network. Once expired, Qt revalidates the entry with a conditional
+    request (If-None-Match / If-Modified-Since) so an unchanged resource only costs a 304.
+    """
+
+    # Cache-Control directives that force Qt to revalidate on every request, ignoring our time-to-live.
+    _REVALIDATE_DIRECTIVES = {b"no-cache", b"must-revalidate", b"max-age=0"}
+
+    # Time-to-lives of responses that never arrive are not used, only this many of the newest ones are kept.
+    _MAX_PENDING_TIME_TO_LIVES = 1000
+
+    def __init__(self, directory: str, max_size: int, parent = None) -> None:
+        super().__init__(parent)
+        self._time_to_live = {}  # type: Dict[str, int]
+        self._last_access = {}  # type: Dict[str, float]
+        self.setCacheDirectory(directory)
+        self.setMaximumCacheSize(max_size)
+
+    def setTimeToLive(self, url: QUrl, seconds: int) -> None:
+        """
+        Set how long the response for the given URL may be served from cache without revalidation.
+        :param url: The full request URL.
+        :param seconds: The time-to-live in seconds.
+        """
+        self._time_to_live.pop(url.toString(), None)
+        self._time_to_live[url.toString()] = seconds
+        if len(self._time_to_live) > self._MAX_PENDING_TIME_TO_LIVES:
+            del self._time_to_live[next(iter(self._time_to_live))]
+
+    def prepare(self, meta_data: QNetworkCacheMetaData) -> QIODevice:
+        self._touch(meta_data.url())
+        return super().prepare(self._applyTimeToLive(meta_data))
+
+    def updateMetaData(self, meta_data: QNetworkCacheMetaData) -> None:
+        # Called by Qt after a 304 response, so a successful revalidation also renews the time-to-live.
+        self._touch(meta_data.url())
+        super().updateMetaData(self._applyTimeToLive(meta_data))
+
+    def data(self, url: QUrl) -> QIODevice:
+        device = super().data(url)
+        if device:
+            self._touch(url)
+        return device
+
+    def remove(self, url: QUrl) -> bool:
+        self._last_access.pop(url.toString(), None)
+        self._time_to_live.pop(url.toString(), None)
+        return super().remove(url)
+
+    def expire(self) -> int:
+        """
+        Remove the least recently used entries until the cache is below 90% of its maximum size.
+        Entries not accessed during this session are ranked by their file modification time.
+        Access times of entries that are no longer cached are forgotten.
+        :return: The new size of the cache in bytes.
+        """
+        entries = []  # type: List[Tuple[float, str, str, int]]
+        total_size = 0
+        for root, _, file_names in os.walk(self.cacheDirectory()):
+            for file_name in file_names:
+                if not file_name.endswith(".d"):
+                    continue
+                path = os.path.join(root, file_name)
+                size = os.path.getsize(path)
+                url = self.fileMetaData(path).url().toString()
+                last_access = self._last_access.get(url, os.path.getmtime(path))
+                entries.append((last_access, path, url, size))
+                total_size += size
+        cached_urls = {url for _, _, url, _ in entries}
+        target_size = self.maximumCacheSize() * 9 // 10 if total_size > self.maximumCacheSize() else total_size
+        for _, path, url, size in sorted(entries):
+            if total_size <= target_size:
+                break
+            os.remove(path)
+            cached_urls.discard(url)
+            total_size -= size
+        self._last_access = {url: last_access for url, last_access in self._last_access.items()
+                             if url in cached_urls}
+        return total_size
+
+    def _touch(self, url: QUrl) -> None:
+        self._last_access[url.toString()] = time.time()
+
+    def _applyTimeToLive(self, meta_data: QNetworkCacheMetaData) -> QNetworkCacheMetaData:
+        """
+        Override the expiration date of a response with the time-to-live configured for its URL.
+        Directives that would make Qt skip the freshness check are dropped, other headers are kept as-is.
+        :param meta_data: The meta data as received from the server.
+        :return: The meta data to store.
+        """
+        seconds = self._time_to_live.pop(meta_data.url().toString(), None)
+        if seconds is None or not meta_data.saveToDisk():
+            return meta_data
+        meta_data.setExpirationDate(QDateTime.currentDateTimeUtc().addSecs(seconds))
+        raw_headers = []
+        for name, value in meta_data.rawHeaders():
+            header_value = bytes(value)
+            if bytes(name).lower() == b"cache-control":
+                directives = [directive.strip() for directive in header_value.split(b",")]
+                header_value = b", ".join(d for d in directives if d.lower() not in self._REVALIDATE_DIRECTIVES)
+                if not header_value:
+                    continue
+            raw_headers.append((bytes(name), header_value))
+        meta_data.setRawHeaders(raw_headers)
+        return meta_data
@@ -0,0 +1,90 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import hashlib
+import os
+from typing import Any, Callable, Optional
+
+from PyQt5.QtNetwork import QNetworkReply, QNetworkRequest
+
+from UM.Logger import Logger  # type: ignore
+
+from .ApiHelper import ApiHelper
+from .JsonObject import ApiError
+
+
+class FileDownload:
+    """
+    Streams the body of a network reply into a file while it is being received.
+    Only the chunk that is currently available is held in memory, so the size of the downloaded file does not matter.
+    The SHA-256 hash of the content is computed while it's written, so the file does not have to be read again.
+    Error responses are not written to the file, the partial file is removed when the download fails or is aborted.
+    """
+
+    def __init__(self, reply: QNetworkReply, file_path: str,
+                 on_finished: Callable[[str, str], Any],
+                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                 on_progress: Optional[Callable[[int, int], Any]] = None) -> None:
+        self._reply = reply
+        self._file_path = file_path
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+        self._on_progress = on_progress
+        self._file = open(file_path, "wb")
+        self._hash = hashlib.sha256()
+        self._is_finished = False
+        self._is_aborted = False
+        reply.readyRead.connect(self._onReadyRead)
+        reply.downloadProgress.connect(self._onDownloadProgress)
+        reply.finished.connect(self._onFinished)
+
+    @property
+    def file_path(self) -> str:
+        return self._file_path
+
+    def abort(self) -> None:
+        """
+        Abort the download and remove the partial file. None of the callbacks will be called after this.
+        """
+        if self._is_finished or self._is_aborted:
+            return
+        self._is_aborted = True
+        self._reply.abort()
+
+    def _isSuccessful(self) -> bool:
+        status_code = self._reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        return bool(status_code) and status_code < 400
+
+    def _onReadyRead(self) -> None:
+        # Error bodies stay in the reply buffer so they can be parsed when the reply is finished.
+        if self._isSuccessful():
+            self._write(self._reply.readAll().data())
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._hash.update(data)
+
+    def _onDownloadProgress(self, bytes_received: int, bytes_total: int) -> None:
+        if self._on_progress and not self._is_aborted:
+            self._on_progress(bytes_received, bytes_total)
+
+    def _onFinished(self) -> None:
+        self._is_finished = True
+        status_code = self._reply.attribute(QNetworkRequest.HttpStatusCodeAttribute)
+        is_successful = not self._is_aborted and self._isSuccessful()
+        if is_successful:
+            self._write(self._reply.readAll().data())
+            self._file.close()
+        else:
+            self._file.close()
+            os.remove(self._file_path)
+        body = self._reply.readAll().data()
+        self._reply.deleteLater()
+        if self._is_aborted:
+            return
+        if is_successful:
+            self._on_finished(self._file_path, self._hash.hexdigest())
+            return
+        Logger.warning("Download of {} failed with status {}".format(self._file_path, status_code))
+        if self._on_failed:
+            _, response = ApiHelper.parseReplyAsJson(status_code, body) if body else (status_code, None)
+            self._on_failed(ApiError(response) if isinstance(response, dict) else None, status_code)
@@ -1,67 +1,130 @@
 # Copyright (c) 2020.
 # ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
 
-from PyQt5.QtCore import QObject
 
+class JsonObject:
+    """
+    Simple immutable record that converts a JSON object to a Python model.
+    Fields are declared in __slots__ by the subclasses, keys in the JSON object that are not a field are ignored.
+    """
 
-class JsonObject(QObject):
-    """ Simple class that converts a JSON object to a Python model. """
-    def __init__(self, _dict: Dict[str, Any]):
-        self.type = self.__class__.__name__
-        if _dict:
-            vars(self).update(_dict)
-        super().__init__()
+    __slots__ = ("_struct",)
+
+    # The types of the slots, only declared for type checking as class attributes would conflict with the slots.
+    if TYPE_CHECKING:
+        _struct = None  # type: Optional[Dict[str, Any]]
+
+    # All fields of the record, collected from the __slots__ of the class and its bases.
+    _fields = ()  # type: Tuple[str, ...]
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = cls._fields + tuple(getattr(cls, "__slots__", ()))
+
+    def __init__(self, _dict: Optional[Dict[str, Any]]) -> None:
+        values = _dict or {}
+        for field in self._fields:
+            object.__setattr__(self, field, values.get(field))
+        object.__setattr__(self, "_struct", None)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("{} is immutable".format(self.__class__.__name__))
+
+    def __repr__(self) -> str:
+        return "{}({})".format(self.type, ", ".join("{}={!r}".format(f, getattr(self, f)) for f in self._fields))
+
+    @property
+    def type(self) -> str:
+        return self.__class__.__name__
 
     def toStruct(self) -> Dict[str, Any]:
         """
         Get a dict representation of the object.
+        The dict is built once, callers get a copy so they cannot change the record.
         :return: The dict.
         """
-        return self.__dict__
+        struct = self._struct
+        if struct is None:
+            struct = {field: getattr(self, field) for field in self._fields}
+            struct["type"] = self.type
+            object.__setattr__(self, "_struct", struct)
+        return dict(struct)
 
 
 class ApiError(JsonObject):
-    """ Class representing an API error. """
-    def __init__(self, _dict: Dict[str, Any]):
-        self.error = None
-        super().__init__(_dict)
+    """ Class representing an API error. The full error response is kept for showing the details. """
+
+    __slots__ = ("error", "response")
+
+    if TYPE_CHECKING:
+        error = None  # type: Optional[str]
+        response = None  # type: Optional[Dict[str, Any]]
+
+    def __init__(self, _dict: Optional[Dict[str, Any]]) -> None:
+        super().__init__(dict(_dict or {}, response=_dict))
+
+
+class ApiTimeoutError(ApiError):
+    """ Class representing a request that was aborted because the API did not answer in time. """
+
+    __slots__ = ()
 
 
 class Thing(JsonObject):
-    """ Class representing a thing. """
-    def __init__(self, _dict: Dict[str, Any]):
-        self.id = None
-        self.thumbnail = None
-        self.name = None
-        self.url = None
-        self.description = None
-        super().__init__(_dict)
+    """ Class representing a thing. The source is the driver it came from, only set when results of drivers are mixed. """
+
+    __slots__ = ("id", "thumbnail", "name", "url", "description", "source")
+
+    if TYPE_CHECKING:
+        id = None  # type: Optional[int]
+        thumbnail = None  # type: Optional[str]
+        name = None  # type: Optional[str]
+        url = None  # type: Optional[str]
+        description = None  # type: Optional[str]
+        source = None  # type: Optional[str]
 
 
 class Collection(JsonObject):
-    """ Class representing a collection. """
-    def __init__(self, _dict: Dict[str, Any]):
-        self.id = None
-        self.thumbnail = None
-        self.name = None
-        self.url = None
-        self.description = None
-        super().__init__(_dict)
+    """ Class representing a collection. The source is the driver it came from, only set when results of drivers are mixed. """
+
+    __slots__ = ("id", "thumbnail", "name", "url", "description", "source")
+
+    if TYPE_CHECKING:
+        id = None  # type: Optional[int]
+        thumbnail = None  # type: Optional[str]
+        name = None  # type: Optional[str]
+        url = None  # type: Optional[str]
+        description = None  # type: Optional[str]
+        source = None  # type: Optional[str]
 
 
 class ThingFile(JsonObject):
     """ Class representing a thing file. """
-    def __init__(self, _dict: Dict[str, Any]):
-        self.id = None
-        self.thumbnail = None
-        self.name = None
-        self.url = None
-        super().__init__(_dict)
+
+    __slots__ = ("id", "thumbnail", "name", "url")
+
+    if TYPE_CHECKING:
+        id = None  # type: Optional[int]
+        thumbnail = None  # type: Optional[str]
+        name = None  # type: Optional[str]
+        url = None  # type: Optional[str]
+
+
+class ThingDetails(JsonObject):
+    """ Class representing a thing together with its files, as shown on the details page. """
+
+    __slots__ = ("thing", "files")
+
+    if TYPE_CHECKING:
+        thing = Thing(None)  # type: Thing
+        files = []  # type: List[ThingFile]
 
 
 class UserData(JsonObject):
     """ Class representing user data. """
-    def __init__(self, _dict: Dict[str, Any]):
-        self.username = None
-        super().__init__(_dict)
+
+    __slots__ = ("username",)
+
+    if TYPE_CHECKING:
+        username = None  # type: Optional[str]
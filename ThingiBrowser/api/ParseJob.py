@@ -0,0 +1,48 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+from UM.Logger import Logger  # type: ignore
+
+from .ApiHelper import ApiHelper
+
+
+class ParseJobSignals(QObject):
+    """ Signals of a parse job. QRunnable is not a QObject, so it can't have signals itself. """
+
+    # Signal triggered with the list of (status code, parsed response) tuples, one per parser.
+    finished = pyqtSignal(object)
+
+
+class ParseJob(QRunnable):
+    """
+    Decodes a response body and maps it to models on a worker thread.
+    The results are delivered by a signal, which Qt queues to the thread that connected to it.
+    The time the parsers took is available once the results are delivered.
+    """
+
+    def __init__(self, status_code: int, body: bytes,
+                 parsers: List[Optional[Callable[[int, bytes], Tuple[int, Any]]]]) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = ParseJobSignals()
+        self._status_code = status_code
+        self._body = body
+        self._parsers = parsers
+        self.parse_time = 0.0  # type: float
+
+    def run(self) -> None:
+        started_at = time.perf_counter()
+        results = []  # type: List[Tuple[int, Any]]
+        for parser in self._parsers:
+            try:
+                results.append(parser(self._status_code, self._body) if parser
+                               else ApiHelper.parseReplyAsJson(self._status_code, self._body))
+            except Exception as err:  # an exception would otherwise be lost on the worker thread
+                Logger.log("e", "Could not parse the API response: %s", err)
+                results.append((self._status_code, None))
+        self.parse_time = time.perf_counter() - started_at
+        self.signals.finished.emit(results)
@@ -0,0 +1,61 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket that limits the rate of requests to one API host.
+    Up to 'burst' requests can start right away, after that they start at 'rate' requests per second.
+    When the API asks to slow down, all requests to the host are paused until the time it asked for.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+    @property
+    def isPaused(self) -> bool:
+        return time.monotonic() < self._paused_until
+
+    def reserve(self) -> float:
+        """
+        Take a token for a request. Tokens go negative while requests are waiting, so they start one after another.
+        :return: The time in seconds to wait before starting the request, 0 if it can start right away.
+        """
+        now = self._refill()
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self._rate, self._paused_until - now)
+
+    def tryAcquire(self) -> bool:
+        """
+        Take a token only if a request can start right away, for optional requests.
+        :return: True if a token was taken.
+        """
+        if self.isPaused:
+            return False
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def pause(self, duration: float) -> None:
+        """
+        Pause all requests, for example because the API responded with 429 Too Many Requests.
+        :param duration: The time in seconds to pause.
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + duration)
+
+    def _refill(self) -> float:
+        """
+        Add the tokens for the time since the last refill.
+        :return: The current time.
+        """
+        now = time.monotonic()
+        self._tokens = min(float(self._burst), self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        return now
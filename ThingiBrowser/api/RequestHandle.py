@@ -0,0 +1,77 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Any, Callable, Optional, Tuple
+
+from PyQt5.QtNetwork import QNetworkReply
+
+from .JsonObject import ApiError
+
+
+class RequestHandle:
+    """
+    Handle to a running API request, returned by the driver methods.
+    The reply might be shared with other callers, so aborting a handle only drops this caller's callbacks.
+    The network request itself is aborted once no caller is waiting for it anymore.
+    Handles that combine other requests or that were answered from memory have no reply of their own.
+    Requests that wait for the rate limiter have no reply yet, retried requests get a new reply.
+    """
+
+    def __init__(self, reply: Optional[QNetworkReply],
+                 on_finished: Callable[..., Any],
+                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                 parser: Optional[Callable[[int, bytes], Tuple[int, Any]]] = None,
+                 on_abort: Optional[Callable[["RequestHandle"], None]] = None) -> None:
+        self._reply = reply
+        self._on_finished = on_finished
+        self._on_failed = on_failed
+        self._parser = parser
+        self._on_abort = on_abort
+        self._is_finished = False
+        self._is_aborted = False
+
+    @property
+    def reply(self) -> Optional[QNetworkReply]:
+        return self._reply
+
+    def setReply(self, reply: Optional[QNetworkReply]) -> None:
+        """
+        Set the reply that is currently running for this request. Called by the API client when the request starts.
+        :param reply: The reply.
+        """
+        self._reply = reply
+
+    @property
+    def on_finished(self) -> Callable[..., Any]:
+        return self._on_finished
+
+    @property
+    def on_failed(self) -> Optional[Callable[[Optional[ApiError], Optional[int]], Any]]:
+        return self._on_failed
+
+    @property
+    def parser(self) -> Optional[Callable[[int, bytes], Tuple[int, Any]]]:
+        return self._parser
+
+    @property
+    def isRunning(self) -> bool:
+        return not self._is_finished and not self._is_aborted
+
+    @property
+    def isAborted(self) -> bool:
+        return self._is_aborted
+
+    def finish(self) -> None:
+        """
+        Mark the request as finished. Called by the API client right before the callbacks run.
+        """
+        self._is_finished = True
+
+    def abort(self) -> None:
+        """
+        Abort the request. None of the callbacks will be called after this.
+        """
+        if not self.isRunning:
+            return
+        self._is_aborted = True
+        if self._on_abort:
+            self._on_abort(self)
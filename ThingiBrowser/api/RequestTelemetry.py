@@ -0,0 +1,146 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import json
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from UM.Logger import Logger  # type: ignore
+
+from ..Settings import Settings
+
+
+class RequestRecord:
+    """
+    Timings and outcome of one API request, from the first caller asking for it until all callers got the result.
+    Times are in seconds, None when the request did not get that far.
+    """
+
+    def __init__(self, driver: str, endpoint: str) -> None:
+        self.driver = driver  # type: str
+        self.endpoint = endpoint  # type: str
+        self.started_at = time.time()  # type: float
+        self.queue_time = None  # type: Optional[float]  # waiting for the rate limiter
+        self.first_byte_time = None  # type: Optional[float]  # from sending the last attempt until the response starts
+        self.total_time = None  # type: Optional[float]  # until the callbacks of all callers are done
+        self.parse_time = None  # type: Optional[float]  # on the worker thread
+        self.bytes_received = 0  # type: int
+        self.from_cache = False  # type: bool
+        self.retries = 0  # type: int
+        self.hedged = False  # type: bool
+        self.callers = 1  # type: int
+        self.status_code = None  # type: Optional[int]
+        self.error = None  # type: Optional[str]
+        self._created_at = time.monotonic()
+
+    def getElapsedTime(self) -> float:
+        """
+        Get the time since the first caller asked for the request.
+        :return: The time in seconds.
+        """
+        return time.monotonic() - self._created_at
+
+    def toDict(self) -> Dict[str, Any]:
+        def milliseconds(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        return {
+            "driver": self.driver,
+            "endpoint": self.endpoint,
+            "started_at": round(self.started_at, 3),
+            "status_code": self.status_code,
+            "error": self.error,
+            "queue_ms": milliseconds(self.queue_time),
+            "first_byte_ms": milliseconds(self.first_byte_time),
+            "total_ms": milliseconds(self.total_time),
+            "parse_ms": milliseconds(self.parse_time),
+            "bytes": self.bytes_received,
+            "from_cache": self.from_cache,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "callers": self.callers,
+        }
+
+
+class RequestTelemetry:
+    """
+    Bounded record of the most recent API requests, to find out whether the time goes to waiting, the network, the
+    API, parsing or the UI when browsing feels slow. Percentiles are available per driver and endpoint.
+    Requests are added on the GUI thread. File downloads are not recorded, their time depends on the file size.
+    """
+
+    PERCENTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+    TIMINGS = ("queue_ms", "first_byte_ms", "total_ms", "parse_ms")
+
+    def __init__(self, max_records: int = Settings.TELEMETRY_MAX_RECORDS) -> None:
+        self._records = deque(maxlen=max_records)  # type: Deque[RequestRecord]
+        self._callbacks = []  # type: List[Callable[[], Any]]
+        self._is_logging = False
+
+    @property
+    def records(self) -> List[RequestRecord]:
+        return list(self._records)
+
+    def setLogging(self, enabled: bool) -> None:
+        """
+        Set whether every finished request is written to the log.
+        :param enabled: True to log requests.
+        """
+        self._is_logging = enabled
+
+    def addCallback(self, callback: Callable[[], Any]) -> None:
+        """
+        Add a callback for when a request was added.
+        :param callback: The callback.
+        """
+        self._callbacks.append(callback)
+
+    def add(self, record: RequestRecord, error: Optional[str] = None) -> None:
+        """
+        Add a request that finished now, dropping the oldest one when there are too many.
+        :param record: The request.
+        :param error: What went wrong if the request did not get a response, for example "timeout".
+        """
+        record.total_time = record.getElapsedTime()
+        record.error = error or record.error
+        self._records.append(record)
+        if self._is_logging:
+            Logger.log("d", "Request %s", json.dumps(record.toDict()))
+        for callback in self._callbacks:
+            callback()
+
+    def getSummary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get aggregates of the recorded requests per driver and endpoint. Timings are of the requests that got a
+        response, so aborted and timed out requests don't distort them.
+        :return: The aggregates by "driver endpoint".
+        """
+        groups = {}  # type: Dict[str, List[Dict[str, Any]]]
+        for record in self._records:
+            groups.setdefault("{} {}".format(record.driver, record.endpoint), []).append(record.toDict())
+        summary = {}  # type: Dict[str, Dict[str, Any]]
+        for name, records in groups.items():
+            answered = [record for record in records if not record["error"]]
+            summary[name] = {
+                "count": len(records),
+                "errors": sum(1 for record in records if record["error"] or (record["status_code"] or 0) >= 400),
+                "cache_hits": sum(1 for record in records if record["from_cache"]),
+                "retries": sum(record["retries"] for record in records),
+                "hedged": sum(1 for record in records if record["hedged"]),
+                "bytes": sum(record["bytes"] for record in records),
+            }
+            for timing in self.TIMINGS:
+                samples = sorted(record[timing] for record in answered if record[timing] is not None)
+                summary[name][timing] = {label: samples[min(len(samples) - 1, int(len(samples) * fraction))]
+                                         for label, fraction in self.PERCENTILES} if samples else None
+        return summary
+
+    def toJson(self) -> str:
+        """
+        Get the recorded requests and their aggregates as JSON, for example to attach to a bug report.
+        :return: The JSON document.
+        """
+        return json.dumps({
+            "summary": self.getSummary(),
+            "requests": [record.toDict() for record in self._records],
+        }, indent=2)
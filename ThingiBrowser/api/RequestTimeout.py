@@ -0,0 +1,21 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+
+
+class RequestTimeout:
+    """
+    Deadlines of an API request in seconds. The first byte deadline includes connecting to the server, Qt does not
+    report when the connection is made.
+    """
+
+    def __init__(self, first_byte: float, total: float) -> None:
+        self._first_byte = first_byte
+        self._total = total
+
+    @property
+    def first_byte(self) -> float:
+        return self._first_byte
+
+    @property
+    def total(self) -> float:
+        return self._total
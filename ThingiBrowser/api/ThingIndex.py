@@ -0,0 +1,230 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from UM.Logger import Logger  # type: ignore
+
+from .JsonObject import Thing, Collection
+from ..Settings import Settings
+
+IndexItem = Union[Thing, Collection]
+
+
+class ThingIndex:
+    """
+    Local full-text index (SQLite FTS5) of the things and collections that were received from the drivers.
+    Searching it takes milliseconds and works offline, so local hits can be shown while a remote search is running.
+    The number of indexed items is bounded, the items that were least recently seen are evicted first.
+    Items are added from the parse worker threads, so all access goes through a single connection and lock.
+    """
+
+    # Every driver gets its own range of row IDs. FTS5 can limit a search to a row ID range while it reads the index,
+    # which is much cheaper than matching a driver column for every hit.
+    _DRIVER_ID_BITS = 40
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS drivers (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY,
+            driver_id INTEGER NOT NULL REFERENCES drivers (id),
+            type TEXT NOT NULL,
+            item_id INTEGER NOT NULL,
+            name TEXT,
+            description TEXT,
+            url TEXT,
+            thumbnail TEXT,
+            last_seen REAL NOT NULL,
+            UNIQUE (driver_id, type, item_id)
+        );
+        CREATE INDEX IF NOT EXISTS items_last_seen ON items (last_seen);
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            name, description, content='items', content_rowid='id', tokenize='unicode61'
+        );
+        CREATE TRIGGER IF NOT EXISTS items_insert AFTER INSERT ON items BEGIN
+            INSERT INTO items_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS items_delete AFTER DELETE ON items BEGIN
+            INSERT INTO items_fts (items_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS items_update AFTER UPDATE OF name, description ON items BEGIN
+            INSERT INTO items_fts (items_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO items_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+        END;
+    """
+
+    _UPSERT = """
+        INSERT INTO items (id, driver_id, type, item_id, name, description, url, thumbnail, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (driver_id, type, item_id) DO UPDATE SET
+            name = excluded.name, description = excluded.description, url = excluded.url,
+            thumbnail = excluded.thumbnail, last_seen = excluded.last_seen
+    """
+
+    # Only the best matches are joined with the items table. Matches in the name count ten times as much.
+    _SEARCH = """
+        SELECT items.type, items.item_id, items.name, items.description, items.url, items.thumbnail
+        FROM (
+            SELECT rowid, bm25(items_fts, 10.0, 1.0) AS score FROM items_fts
+            WHERE items_fts MATCH ? AND rowid BETWEEN ? AND ?
+            ORDER BY score LIMIT ?
+        ) AS hits JOIN items ON items.id = hits.rowid
+        ORDER BY hits.score
+    """
+
+    # Descriptions can be long HTML documents, only the text at the start is indexed.
+    _TAGS = re.compile(r"<[^>]*>")
+    _WORDS = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, path: str, max_items: int = Settings.THING_INDEX_MAX_ITEMS) -> None:
+        self._max_items = max_items
+        self._lock = threading.Lock()
+        self._connection = None  # type: Optional[sqlite3.Connection]
+        self._driver_ids = {}  # type: Dict[str, int]
+        try:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(self._SCHEMA)
+            self._connection = connection
+        except (OSError, sqlite3.Error) as err:
+            Logger.log("w", "Local search index is not available: %s", err)
+
+    def addItems(self, driver: str, items: Sequence[IndexItem]) -> None:
+        """
+        Add or update things and collections. Items without an ID are skipped.
+        When the index is full, the least recently seen items are removed.
+        :param driver: The name of the driver the items came from.
+        :param items: The items.
+        """
+        items = [item for item in items if item.id is not None]
+        connection = self._connection
+        if not items or not connection:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                connection.execute("BEGIN")
+                try:
+                    driver_id = self._getDriverId(connection, driver, create=True) or 0
+                    first_id, last_id = self._getRowIdRange(driver_id)
+                    max_id = connection.execute("SELECT max(id) FROM items WHERE id BETWEEN ? AND ?",
+                                                (first_id, last_id)).fetchone()[0]
+                    next_id = first_id if max_id is None else max_id + 1
+                    connection.executemany(self._UPSERT, [(
+                        next_id + offset, driver_id, item.type, item.id, item.name,
+                        self._getIndexedDescription(item.description), item.url, item.thumbnail, now
+                    ) for offset, item in enumerate(items)])
+                    self._evict(connection)
+                    connection.execute("COMMIT")
+                except sqlite3.Error:
+                    connection.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as err:
+            Logger.log("w", "Could not add items to the local search index: %s", err)
+
+    def search(self, search_terms: str, driver: str, limit: int = Settings.PER_PAGE) -> List[IndexItem]:
+        """
+        Find indexed things and collections of a driver. Every word must match the start of a word in the name
+        or description. Items with a matching name come first.
+        :param search_terms: What to search for.
+        :param driver: The name of the driver.
+        :param limit: The maximum number of results.
+        :return: The matching items, best match first.
+        """
+        match = self._getMatchExpression(search_terms)
+        connection = self._connection
+        if not match or not connection:
+            return []
+        try:
+            with self._lock:
+                driver_id = self._getDriverId(connection, driver, create=False)
+                if driver_id is None:
+                    return []
+                first_id, last_id = self._getRowIdRange(driver_id)
+                # Search the names first. Ranking is the expensive part of a search and broad queries like the
+                # first letters of a word already match plenty of names, so descriptions are only searched to fill up.
+                name_match = "name : ({})".format(match)
+                rows = connection.execute(self._SEARCH, (name_match, first_id, last_id, limit)).fetchall()
+                if len(rows) < limit:
+                    more_rows = connection.execute(self._SEARCH, (match, first_id, last_id, limit + len(rows)))
+                    rows += [row for row in more_rows if row not in rows][:limit - len(rows)]
+        except sqlite3.Error as err:
+            Logger.log("w", "Could not search the local search index: %s", err)
+            return []
+        return [(Collection if item_type == "Collection" else Thing)({
+            "id": item_id,
+            "name": name,
+            "description": description,
+            "url": url,
+            "thumbnail": thumbnail,
+        }) for item_type, item_id, name, description, url, thumbnail in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    def _getDriverId(self, connection: sqlite3.Connection, driver: str, create: bool) -> Optional[int]:
+        """
+        Get the ID of a driver in the index.
+        :param connection: The database connection.
+        :param driver: The name of the driver.
+        :param create: Whether to add the driver if it's not in the index yet.
+        :return: The ID, or None if the driver is not in the index and should not be added.
+        """
+        driver_id = self._driver_ids.get(driver)
+        if driver_id is None:
+            if create:
+                connection.execute("INSERT OR IGNORE INTO drivers (name) VALUES (?)", (driver,))
+            row = connection.execute("SELECT id FROM drivers WHERE name = ?", (driver,)).fetchone()
+            if row is None:
+                return None
+            driver_id = self._driver_ids[driver] = row[0]
+        return driver_id
+
+    @classmethod
+    def _getRowIdRange(cls, driver_id: int) -> Tuple[int, int]:
+        first_id = driver_id << cls._DRIVER_ID_BITS
+        return first_id, first_id + (1 << cls._DRIVER_ID_BITS) - 1
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """
+        Remove the least recently seen items until the index is at 90% of its maximum size.
+        :param connection: The database connection, in a transaction.
+        """
+        count = connection.execute("SELECT count(*) FROM items").fetchone()[0]
+        if count <= self._max_items:
+            return
+        connection.execute(
+            "DELETE FROM items WHERE id IN (SELECT id FROM items ORDER BY last_seen LIMIT ?)",
+            (count - int(self._max_items * 0.9),))
+
+    @classmethod
+    def _getIndexedDescription(cls, description: Optional[str]) -> Optional[str]:
+        if not description:
+            return description
+        max_length = Settings.THING_INDEX_MAX_DESCRIPTION_LENGTH
+        return cls._TAGS.sub(" ", description[:max_length * 2])[:max_length]
+
+    @classmethod
+    def _getMatchExpression(cls, search_terms: str) -> str:
+        """
+        Turn user input into an FTS5 query where every word is a prefix match, so partial input matches as well.
+        Words are quoted, so characters with a meaning in the FTS5 query syntax are not interpreted.
+        :param search_terms: The user input.
+        :return: The match expression, empty if there are no words.
+        """
+        return " ".join('"{}"*'.format(word) for word in cls._WORDS.findall(search_terms.lower()))
@@ -5,19 +5,24 @@ from typing import List, Callable, Any, Optional, Tuple
 from urllib.parse import urlencode
 
 from PyQt5.QtCore import QUrl
-from PyQt5.QtNetwork import QNetworkRequest, QNetworkReply
+from PyQt5.QtNetwork import QNetworkRequest
 
 from ...Settings import Settings
 from ...PreferencesHelper import PreferencesHelper
 from ...api.ApiHelper import ApiHelper
 from ...api.AbstractApiClient import AbstractApiClient
-from ...api.JsonObject import ApiError, Collection, Thing, ThingFile, UserData
+from ...api.JsonObject import ApiError, Collection, Thing, ThingDetails, ThingFile, UserData
 from ...api.LocalAuthService import LocalAuthService
+from ...api.RequestHandle import RequestHandle
 
 
 class MyMiniFactoryApiClient(AbstractApiClient):
     """ Client for interacting with the MyMiniFactory API. """
 
+    _index_name = "myminifactory"
+    _thumbnail_hosts = ("dl.myminifactory.com",)
+    _thing_details_requests = 1
+
     def __init__(self) -> None:
         self._username = None  # type: Optional[str]
         self._auth_state = None  # type: Optional[str]
@@ -52,13 +57,13 @@ class MyMiniFactoryApiClient(AbstractApiClient):
 
     def _getUserData(self) -> None:
         url = "{}/user".format(self._root_url)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, self._onGetUserData, parser=self._parseGetUserData)
+        request = self._createEmptyRequest(url)
+        self._get(request, self._onGetUserData, parser=self._parseGetUserData)
         # TODO: handle error response
 
     @staticmethod
-    def _parseGetUserData(reply: QNetworkReply) -> Tuple[int, Optional[UserData]]:
-        status_code, data = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetUserData(status_code: int, body: bytes) -> Tuple[int, Optional[UserData]]:
+        status_code, data = ApiHelper.parseReplyAsJson(status_code, body)
         if not data or not isinstance(data, dict):
             return status_code, None
         return status_code, UserData({"username": data.get("username", "")})
@@ -91,17 +96,23 @@ class MyMiniFactoryApiClient(AbstractApiClient):
         return "search?q={}".format(search_terms)
 
     def getThing(self, thing_id: int, on_finished: Callable[[Thing], Any],
-                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                 priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         url = "{}/objects/{}".format(self._root_url, thing_id)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetThing)
+        request = self._createEmptyRequest(url, cache_ttl=self._thing_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetThing),
+                         timeout=self._thing_timeout)
 
-    @staticmethod
-    def _parseGetThing(reply: QNetworkReply) -> Tuple[int, Optional[Thing]]:
-        status_code, item = ApiHelper.parseReplyAsJson(reply)
+    @classmethod
+    def _parseGetThing(cls, status_code: int, body: bytes) -> Tuple[int, Optional[Thing]]:
+        status_code, item = ApiHelper.parseReplyAsJson(status_code, body)
         if not item or not isinstance(item, dict):
             return status_code, None
-        return status_code, Thing({
+        return status_code, cls._mapThing(item)
+
+    @staticmethod
+    def _mapThing(item: dict) -> Thing:
+        return Thing({
             "id": item.get("id"),
             "thumbnail": item.get("images", [])[0].get("thumbnail", {}).get("url") if item.get("images") else None,
             "name": item.get("name"),
@@ -109,15 +120,32 @@ class MyMiniFactoryApiClient(AbstractApiClient):
             "description": item.get("description")
         })
 
+    def _requestThingDetails(self, thing_id: int, on_finished: Callable[[ThingDetails], Any],
+                             on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                             priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
+        # The thing and its files are in the same response, so one request is enough.
+        url = "{}/objects/{}".format(self._root_url, thing_id)
+        request = self._createEmptyRequest(url, cache_ttl=self._thing_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetThingDetails),
+                         timeout=self._thing_timeout)
+
+    @classmethod
+    def _parseGetThingDetails(cls, status_code: int, body: bytes) -> Tuple[int, Optional[ThingDetails]]:
+        status_code, item = ApiHelper.parseReplyAsJson(status_code, body)
+        if not item or not isinstance(item, dict):
+            return status_code, None
+        return status_code, ThingDetails({"thing": cls._mapThing(item), "files": cls._mapThingFiles(item)})
+
     def getCollections(self, on_finished: Callable[[List[Collection]], Any],
-                       on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]]) -> None:
+                       on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]]) -> RequestHandle:
         url = "{}/users/{}/collections".format(self._root_url, self._username)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetCollections)
+        request = self._createEmptyRequest(url, cache_ttl=self._things_cache_ttl)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetCollections),
+                         timeout=self._things_timeout, hedge=True)
 
     @staticmethod
-    def _parseGetCollections(reply: QNetworkReply) -> Tuple[int, Optional[List[Collection]]]:
-        status_code, response = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetCollections(status_code: int, body: bytes) -> Tuple[int, Optional[List[Collection]]]:
+        status_code, response = ApiHelper.parseReplyAsJson(status_code, body)
         if not response or not isinstance(response, dict):
             return status_code, None
         items = response.get("items", [])
@@ -131,19 +159,25 @@ class MyMiniFactoryApiClient(AbstractApiClient):
         }) for item in items]
 
     def getThingFiles(self, thing_id: int, on_finished: Callable[[List[ThingFile]], Any],
-                      on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                      on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                      priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         url = "{}/objects/{}".format(self._root_url, thing_id)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetThingFiles)
+        request = self._createEmptyRequest(url, cache_ttl=self._thing_files_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._parseGetThingFiles,
+                         timeout=self._thing_files_timeout)
 
-    @staticmethod
-    def _parseGetThingFiles(reply: QNetworkReply) -> Tuple[int, Optional[List[ThingFile]]]:
-        status_code, response = ApiHelper.parseReplyAsJson(reply)
+    @classmethod
+    def _parseGetThingFiles(cls, status_code: int, body: bytes) -> Tuple[int, Optional[List[ThingFile]]]:
+        status_code, response = ApiHelper.parseReplyAsJson(status_code, body)
         if not response or not isinstance(response, dict):
             return status_code, None
+        return status_code, cls._mapThingFiles(response)
+
+    @staticmethod
+    def _mapThingFiles(response: dict) -> List[ThingFile]:
         file_id = response.get("id")
         items = response.get("files", {}).get("items")
-        return status_code, [ThingFile({
+        return [ThingFile({
             "id": file_id,
             "thumbnail": item.get("thumbnail_url"),
             "name": item.get("filename"),
@@ -151,15 +185,17 @@ class MyMiniFactoryApiClient(AbstractApiClient):
         }) for item in items]
 
     def getThings(self, query: str, page: int, on_finished: Callable[[List[Thing]], Any],
-                  on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                  on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                  priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         operator = "&" if query.find("?") > 0 else "?"
         url = "{}/{}{}per_page={}&page={}".format(self._root_url, query, operator, Settings.PER_PAGE, page)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetThings)
+        request = self._createEmptyRequest(url, cache_ttl=self._things_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetThings),
+                         timeout=self._things_timeout, hedge=True)
 
     @staticmethod
-    def _parseGetThings(reply: QNetworkReply) -> Tuple[int, Optional[List[Thing]]]:
-        status_code, response = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetThings(status_code: int, body: bytes) -> Tuple[int, Optional[List[Thing]]]:
+        status_code, response = ApiHelper.parseReplyAsJson(status_code, body)
         if not response or not isinstance(response, dict):
             return status_code, None
         items = response.get("objects", {}).get("items", []) if response.get("objects", {}) else response.get("items", [])
@@ -171,18 +207,21 @@ class MyMiniFactoryApiClient(AbstractApiClient):
             "description": item.get("description")
         }) for item in items]
 
-    def downloadThingFile(self, file_id: int, file_name: str, on_finished: Callable[[bytes], Any]) -> None:
+    def downloadThingFile(self, file_id: int, file_name: str, file_path: str,
+                          on_finished: Callable[[str, str], Any],
+                          on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                          on_progress: Optional[Callable[[int, int], Any]] = None) -> RequestHandle:
         url = "https://www.myminifactory.com/download/{}?downloadfile={}".format(file_id, file_name)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, parser=ApiHelper.parseReplyAsBytes)
+        request = self._createEmptyRequest(url, use_cache=False)
+        return self._download(request, file_path, on_finished, on_failed, on_progress)
 
     @property
     def _root_url(self):
         return "https://www.myminifactory.com/api/v2"
 
     def _setAuth(self, request: QNetworkRequest) -> None:
-        token = PreferencesHelper.getSettingValue(Settings.MYMINIFACTORY_API_TOKEN_KEY)
-        if not token or token == "":
+        token = PreferencesHelper.getSnapshot().myminifactory_api_token
+        if not token:
             # If the user was not signed in we use a default token for the public endpoints.
             # We'll use the 'old way' of injecting the API key in the request
             return self._injectApiToken(request)
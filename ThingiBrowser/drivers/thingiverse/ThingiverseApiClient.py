@@ -2,7 +2,7 @@
 # Thingiverse plugin is released under the terms of the LGPLv3 or higher.
 from typing import List, Callable, Any, Optional, Tuple
 
-from PyQt5.QtNetwork import QNetworkRequest, QNetworkReply
+from PyQt5.QtNetwork import QNetworkRequest
 
 from ...Settings import Settings
 from ...PreferencesHelper import PreferencesHelper
@@ -10,11 +10,15 @@ from ...api.AbstractApiClient import AbstractApiClient
 from ...api.ApiHelper import ApiHelper
 from ...api.JsonObject import ApiError, Thing, ThingFile, Collection
 from ...api.LocalAuthService import LocalAuthService
+from ...api.RequestHandle import RequestHandle
 
 
 class ThingiverseApiClient(AbstractApiClient):
     """ Client for interacting with the Thingiverse API. """
 
+    _index_name = "thingiverse"
+    _thumbnail_hosts = ("cdn.thingiverse.com",)
+
     def __init__(self) -> None:
         self._auth_state = None  # type: Optional[str]
         PreferencesHelper.initSetting(Settings.THINGIVERSE_USER_NAME_PREFERENCES_KEY)
@@ -23,8 +27,8 @@ class ThingiverseApiClient(AbstractApiClient):
 
     @property
     def user_id(self):
-        user_name = PreferencesHelper.getSettingValue(Settings.THINGIVERSE_USER_NAME_PREFERENCES_KEY)
-        if not user_name or user_name == "":
+        user_name = PreferencesHelper.getSnapshot().thingiverse_user_name
+        if not user_name:
             return "404_this_user_does_not_exist"  # ugly, but tricks the Thingiverse API in giving a 404 response
         return user_name
 
@@ -76,14 +80,15 @@ class ThingiverseApiClient(AbstractApiClient):
         return "newest"
 
     def getCollections(self, on_finished: Callable[[List[Collection]], Any],
-                       on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                       on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> RequestHandle:
         url = "{}/users/{}/collections".format(self._root_url, self.user_id)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetCollections)
+        request = self._createEmptyRequest(url, cache_ttl=self._things_cache_ttl)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetCollections),
+                         timeout=self._things_timeout, hedge=True)
 
     @staticmethod
-    def _parseGetCollections(reply: QNetworkReply) -> Tuple[int, Optional[List[Collection]]]:
-        status_code, response = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetCollections(status_code: int, body: bytes) -> Tuple[int, Optional[List[Collection]]]:
+        status_code, response = ApiHelper.parseReplyAsJson(status_code, body)
         if status_code == 404:
             # Thingiverse returns a 404 when there are no collection results instead of just an empty list
             return 200, []
@@ -98,14 +103,16 @@ class ThingiverseApiClient(AbstractApiClient):
         }) for item in response]
 
     def getThings(self, query: str, page: int, on_finished: Callable[[List[Thing]], Any],
-                  on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                  on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                  priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         url = "{}/{}?per_page={}&page={}".format(self._root_url, query, Settings.PER_PAGE, page)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetThings)
+        request = self._createEmptyRequest(url, cache_ttl=self._things_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetThings),
+                         timeout=self._things_timeout, hedge=True)
 
     @staticmethod
-    def _parseGetThings(reply: QNetworkReply) -> Tuple[int, Optional[List[Thing]]]:
-        status_code, response = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetThings(status_code: int, body: bytes) -> Tuple[int, Optional[List[Thing]]]:
+        status_code, response = ApiHelper.parseReplyAsJson(status_code, body)
         if status_code == 404:
             # Thingiverse returns a 404 when there are no thing results instead of just an empty list
             return 200, []
@@ -124,14 +131,16 @@ class ThingiverseApiClient(AbstractApiClient):
         }) for item in response]
 
     def getThing(self, thing_id: int, on_finished: Callable[[Thing], Any],
-                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                 on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                 priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         url = "{}/things/{}".format(self._root_url, thing_id)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetThing)
+        request = self._createEmptyRequest(url, cache_ttl=self._thing_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._indexed(self._parseGetThing),
+                         timeout=self._thing_timeout)
 
     @staticmethod
-    def _parseGetThing(reply: QNetworkReply) -> Tuple[int, Optional[Thing]]:
-        status_code, item = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetThing(status_code: int, body: bytes) -> Tuple[int, Optional[Thing]]:
+        status_code, item = ApiHelper.parseReplyAsJson(status_code, body)
         if not item or not isinstance(item, dict):
             return status_code, None
         return status_code, Thing({
@@ -143,14 +152,16 @@ class ThingiverseApiClient(AbstractApiClient):
         })
 
     def getThingFiles(self, thing_id: int, on_finished: Callable[[List[ThingFile]], Any],
-                      on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None) -> None:
+                      on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                      priority: QNetworkRequest.Priority = QNetworkRequest.NormalPriority) -> RequestHandle:
         url = "{}/things/{}/files".format(self._root_url, thing_id)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, on_failed, parser=self._parseGetThingFiles)
+        request = self._createEmptyRequest(url, cache_ttl=self._thing_files_cache_ttl, priority=priority)
+        return self._get(request, on_finished, on_failed, parser=self._parseGetThingFiles,
+                         timeout=self._thing_files_timeout)
 
     @staticmethod
-    def _parseGetThingFiles(reply: QNetworkReply) -> Tuple[int, Optional[List[ThingFile]]]:
-        status_code, response = ApiHelper.parseReplyAsJson(reply)
+    def _parseGetThingFiles(status_code: int, body: bytes) -> Tuple[int, Optional[List[ThingFile]]]:
+        status_code, response = ApiHelper.parseReplyAsJson(status_code, body)
         if not response or not isinstance(response, list):
             return status_code, None
         return status_code, [ThingFile({
@@ -160,10 +171,13 @@ class ThingiverseApiClient(AbstractApiClient):
             "url": item.get("public_url") or item.get("url"),
         }) for item in response]
 
-    def downloadThingFile(self, file_id: int, file_name: str, on_finished: Callable[[bytes], Any]) -> None:
+    def downloadThingFile(self, file_id: int, file_name: str, file_path: str,
+                          on_finished: Callable[[str, str], Any],
+                          on_failed: Optional[Callable[[Optional[ApiError], Optional[int]], Any]] = None,
+                          on_progress: Optional[Callable[[int, int], Any]] = None) -> RequestHandle:
         url = "{}/files/{}/download".format(self._root_url, file_id)
-        reply = self._manager.get(self._createEmptyRequest(url))
-        self._addCallback(reply, on_finished, parser=ApiHelper.parseReplyAsBytes)
+        request = self._createEmptyRequest(url, use_cache=False)
+        return self._download(request, file_path, on_finished, on_failed, on_progress)
 
     @property
     def _root_url(self):
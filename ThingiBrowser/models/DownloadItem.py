@@ -0,0 +1,54 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..api.AbstractApiClient import AbstractApiClient
+    from ..api.RequestHandle import RequestHandle
+
+
+class DownloadItem:
+    """ A single file in the download queue, with its status and progress. """
+
+    QUEUED = "queued"
+    DOWNLOADING = "downloading"
+    FINISHED = "finished"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, download_id: int, driver: "AbstractApiClient", file_id: int, file_name: str,
+                 priority: int = 0) -> None:
+        self._download_id = download_id
+        self._driver = driver
+        self._file_id = file_id
+        self._file_name = file_name
+        self._priority = priority
+        self.status = self.QUEUED  # type: str
+        self.bytes_received = 0  # type: int
+        self.bytes_total = -1  # type: int
+        self.request = None  # type: Optional[RequestHandle]
+        self.file_path = None  # type: Optional[str]
+
+    @property
+    def download_id(self) -> int:
+        return self._download_id
+
+    @property
+    def driver(self) -> "AbstractApiClient":
+        return self._driver
+
+    @property
+    def file_id(self) -> int:
+        return self._file_id
+
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    @property
+    def priority(self) -> int:
+        return self._priority
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (self.QUEUED, self.DOWNLOADING)
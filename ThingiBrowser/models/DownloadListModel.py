@@ -0,0 +1,93 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Any, Dict, List, Optional
+
+from PyQt5.QtCore import QAbstractListModel, QByteArray, QModelIndex, Qt, pyqtProperty, pyqtSignal  # type: ignore
+
+from .DownloadItem import DownloadItem
+
+
+class DownloadListModel(QAbstractListModel):
+    """ List model exposing the download queue, including finished and failed downloads, to QML. """
+
+    DownloadIdRole = Qt.UserRole + 1
+    FileIdRole = Qt.UserRole + 2
+    FileNameRole = Qt.UserRole + 3
+    StatusRole = Qt.UserRole + 4
+    BytesReceivedRole = Qt.UserRole + 5
+    BytesTotalRole = Qt.UserRole + 6
+
+    # Signal triggered when the number of downloads changed.
+    countChanged = pyqtSignal()
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._items = []  # type: List[DownloadItem]
+
+    def roleNames(self) -> Dict[int, QByteArray]:
+        return {
+            self.DownloadIdRole: QByteArray(b"downloadId"),
+            self.FileIdRole: QByteArray(b"fileId"),
+            self.FileNameRole: QByteArray(b"fileName"),
+            self.StatusRole: QByteArray(b"status"),
+            self.BytesReceivedRole: QByteArray(b"bytesReceived"),
+            self.BytesTotalRole: QByteArray(b"bytesTotal"),
+        }
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or not 0 <= index.row() < len(self._items):
+            return None
+        item = self._items[index.row()]
+        return {
+            self.DownloadIdRole: item.download_id,
+            self.FileIdRole: item.file_id,
+            self.FileNameRole: item.file_name,
+            self.StatusRole: item.status,
+            self.BytesReceivedRole: item.bytes_received,
+            self.BytesTotalRole: item.bytes_total,
+        }.get(role)
+
+    @pyqtProperty(int, notify=countChanged)
+    def count(self) -> int:
+        return len(self._items)
+
+    def getItem(self, download_id: int) -> Optional[DownloadItem]:
+        """
+        Get a download by its ID.
+        :param download_id: The download ID.
+        :return: The download or None if it's not in the list.
+        """
+        return next((item for item in self._items if item.download_id == download_id), None)
+
+    def addItem(self, item: DownloadItem) -> None:
+        """
+        Append a download to the list.
+        :param item: The download.
+        """
+        self.beginInsertRows(QModelIndex(), len(self._items), len(self._items))
+        self._items.append(item)
+        self.endInsertRows()
+        self.countChanged.emit()
+
+    def updateItem(self, item: DownloadItem, roles: Optional[List[int]] = None) -> None:
+        """
+        Notify views that the status or progress of a download changed.
+        :param item: The changed download.
+        :param roles: The changed roles, defaults to all roles.
+        """
+        if item not in self._items:
+            return
+        index = self.index(self._items.index(item))
+        self.dataChanged.emit(index, index, roles or [])
+
+    def removeInactiveItems(self) -> None:
+        """
+        Remove all finished, failed and cancelled downloads from the list.
+        """
+        self.beginResetModel()
+        self._items = [item for item in self._items if item.is_active]
+        self.endResetModel()
+        self.countChanged.emit()
@@ -0,0 +1,169 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Union
+
+from PyQt5.QtCore import QAbstractListModel, QByteArray, QModelIndex, Qt, QTimer, pyqtProperty, pyqtSignal  # type: ignore
+
+from ..Settings import Settings
+from ..api.JsonObject import Thing, Collection
+
+ListItem = Union[Thing, Collection]
+
+
+class ThingsListModel(QAbstractListModel):
+    """
+    List model with the things (or collections) of the current query.
+    Pages are appended as they arrive and things that are already in the list are skipped.
+    When the view scrolls near the end, fetchMore() asks for the next page.
+    """
+
+    IdRole = Qt.UserRole + 1
+    TypeRole = Qt.UserRole + 2
+    NameRole = Qt.UserRole + 3
+    ThumbnailRole = Qt.UserRole + 4
+    UrlRole = Qt.UserRole + 5
+    DescriptionRole = Qt.UserRole + 6
+    SourceRole = Qt.UserRole + 7
+
+    _ROLE_FIELDS = {
+        IdRole: "id",
+        TypeRole: "type",
+        NameRole: "name",
+        ThumbnailRole: "thumbnail",
+        UrlRole: "url",
+        DescriptionRole: "description",
+        SourceRole: "source",
+    }  # type: Dict[int, str]
+
+    # Signal triggered when the number of items changed.
+    countChanged = pyqtSignal()
+
+    def __init__(self, fetch_more: Optional[Callable[[], None]] = None, parent=None) -> None:
+        super().__init__(parent)
+        self._fetch_more = fetch_more
+        self._items = []  # type: List[ListItem]
+        self._keys = set()  # type: Set[Hashable]
+        self._has_more = False
+        self._skipped_pages = 0
+
+    @property
+    def items(self) -> List[ListItem]:
+        return list(self._items)
+
+    @property
+    def hasMore(self) -> bool:
+        return self._has_more
+
+    def roleNames(self) -> Dict[int, QByteArray]:
+        return {role: QByteArray(field.encode()) for role, field in self._ROLE_FIELDS.items()}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or not 0 <= index.row() < len(self._items) or role not in self._ROLE_FIELDS:
+            return None
+        return getattr(self._items[index.row()], self._ROLE_FIELDS[role])
+
+    @pyqtProperty(int, notify=countChanged)
+    def count(self) -> int:
+        return len(self._items)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more and self._fetch_more is not None
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if self.canFetchMore(parent) and self._fetch_more:
+            self._fetch_more()
+
+    def setHasMore(self, has_more: bool) -> None:
+        """
+        Set whether there are more pages that can be fetched.
+        :param has_more: True if there are more pages.
+        """
+        self._has_more = has_more
+
+    def setItems(self, items: Sequence[ListItem], has_more: bool = False) -> None:
+        """
+        Replace all items, for example with the first page of a new query.
+        :param items: The new items.
+        :param has_more: Whether there are more pages that can be fetched.
+        """
+        self.beginResetModel()
+        self._items = []
+        self._keys = set()
+        self._items.extend(self._getNewItems(items))
+        self._has_more = has_more
+        self._skipped_pages = 0
+        self.endResetModel()
+        self.countChanged.emit()
+
+    def appendItems(self, items: Sequence[ListItem], has_more: bool = False) -> None:
+        """
+        Append a page of items. Items that are already in the list are skipped.
+        The view only fetches more when rows were added, so the next page is fetched here if none were new.
+        :param items: The items to append.
+        :param has_more: Whether there are more pages that can be fetched.
+        """
+        self._has_more = has_more
+        new_items = self._getNewItems(items)
+        if not new_items:
+            if has_more and self._skipped_pages < Settings.MAX_SKIPPED_PAGES:
+                self._skipped_pages += 1
+                QTimer.singleShot(0, self.fetchMore)  # not from within the callback that appends the page
+            return
+        self._skipped_pages = 0
+        self.beginInsertRows(QModelIndex(), len(self._items), len(self._items) + len(new_items) - 1)
+        self._items.extend(new_items)
+        self.endInsertRows()
+        self.countChanged.emit()
+
+    def insertItems(self, row: int, items: Sequence[ListItem]) -> None:
+        """
+        Insert items at a position. Items that are already in the list are skipped.
+        :param row: The row to insert the items at.
+        :param items: The items to insert.
+        """
+        new_items = self._getNewItems(items)
+        if not new_items:
+            return
+        row = max(0, min(row, len(self._items)))
+        self.beginInsertRows(QModelIndex(), row, row + len(new_items) - 1)
+        self._items[row:row] = new_items
+        self.endInsertRows()
+        self.countChanged.emit()
+
+    def hasItem(self, item: ListItem) -> bool:
+        """
+        Check if an item is in the list.
+        :param item: The item.
+        :return: True if an item with the same type, source and ID is in the list.
+        """
+        return item.id is not None and self._getKey(item) in self._keys
+
+    def clear(self) -> None:
+        """
+        Remove all items.
+        """
+        self.setItems([])
+
+    def _getNewItems(self, items: Sequence[ListItem]) -> List[ListItem]:
+        """
+        Filter out items that are already in the list (or twice in the given items) and remember the new ones.
+        Items without an ID can't be compared and are always kept.
+        :param items: The items to filter.
+        :return: The new items.
+        """
+        new_items = []
+        for item in items:
+            if item.id is not None:
+                key = self._getKey(item)
+                if key in self._keys:
+                    continue
+                self._keys.add(key)
+            new_items.append(item)
+        return new_items
+
+    @staticmethod
+    def _getKey(item: ListItem) -> Hashable:
+        return item.type, item.source, item.id
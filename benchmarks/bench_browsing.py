@@ -0,0 +1,304 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+"""
+Browsing benchmark against a local stub of the Thingiverse and MyMiniFactory APIs, so runs are repeatable and don't
+depend on the real APIs or the network. The stub replays payloads with the shape and size of real responses (see
+payloads.py) with a configurable latency and bandwidth, and the drivers' root URLs point at it. Measured are:
+- list query latency: from asking a driver for a page of search results until the parsed things arrive, including
+  parsing on the worker threads and adding the things to the local search index, and again from the HTTP cache;
+- parse throughput of the drivers' _parseGetThings on pages of 20, 100 and 1000 items;
+- the cost of the things list model: setting a page and reading every role of every row, like the QML view does;
+- download throughput of a 20 MB model file, which is hashed while it's streamed to disk;
+- the peak Python memory of each of these, in a separate run as tracemalloc slows things down.
+The stub runs in its own process, so serving responses does not compete with the plugin code for the GIL. Qt's test
+mode is enabled, so the HTTP cache and search index of the user's Cura are not touched.
+Results are printed, and can be saved as JSON and compared with an earlier run.
+Needs Uranium and Cura on the Python path.
+Run from the repository root: python -m benchmarks.bench_browsing --latency 100 --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR, QCoreApplication, QEventLoop, QStandardPaths, QTimer
+
+from UM.Preferences import Preferences  # type: ignore
+
+from ThingiBrowser.PreferencesHelper import PreferencesHelper
+from ThingiBrowser.SettingsSnapshot import SettingsSnapshot
+from ThingiBrowser.api.AbstractApiClient import AbstractApiClient
+from ThingiBrowser.drivers.myminifactory.MyMiniFactoryApiClient import MyMiniFactoryApiClient
+from ThingiBrowser.drivers.thingiverse.ThingiverseApiClient import ThingiverseApiClient
+from ThingiBrowser.models.ThingsListModel import ThingsListModel
+
+from . import payloads
+from .stub_api_server import DOWNLOAD_SIZE, serve
+
+QUERIES = 50
+PAGE_SIZES = [20, 100, 1000]
+RUNS = 20
+DOWNLOADS = 3
+TIMEOUT = 60  # per request, in seconds
+
+# The drivers by name, with the path of their API on the stub server.
+DRIVERS = {
+    "thingiverse": (ThingiverseApiClient, ""),
+    "myminifactory": (MyMiniFactoryApiClient, "/api/v2"),
+}  # type: Dict[str, Tuple[Type[AbstractApiClient], str]]
+
+SEARCH_PAYLOADS = {
+    "thingiverse": payloads.thingiverse_search,
+    "myminifactory": payloads.myminifactory_search,
+}  # type: Dict[str, Callable[[int], bytes]]
+
+
+def _serve(queue: Any, latency: float, bandwidth: Optional[int]) -> None:
+    serve(0, latency, bandwidth, queue.put)
+
+
+def start_server(latency: float, bandwidth: Optional[int]) -> Tuple[multiprocessing.Process, str]:
+    """
+    Start the stub API server in its own process.
+    :param latency: The delay before every response, in seconds.
+    :param bandwidth: The bandwidth per response in bytes per second, None for no limit.
+    :return: The process and the URL of the server.
+    """
+    queue = multiprocessing.Queue()  # type: Any
+    process = multiprocessing.Process(target=_serve, args=(queue, latency, bandwidth), daemon=True)
+    process.start()
+    return process, queue.get(timeout=10)
+
+
+def create_driver(driver_class: Type[AbstractApiClient], root_url: str) -> AbstractApiClient:
+    """
+    Create a driver that sends its requests to the stub server, without rate limiting.
+    :param driver_class: The driver.
+    :param root_url: The root URL of the driver's API on the stub server.
+    :return: The driver.
+    """
+
+    class BenchmarkDriver(driver_class):  # type: ignore
+        _rate_limit = 10000
+        _rate_limit_burst = 10000
+
+        @property
+        def _root_url(self) -> str:
+            return root_url
+
+    return BenchmarkDriver()
+
+
+def run_request(start: Callable[[Callable[..., None], Callable[..., None]], Any]) -> float:
+    """
+    Start a request and run the Qt event loop until it finished.
+    :param start: Starts the request, with the callbacks for success and failure.
+    :return: The time in seconds until the result arrived.
+    """
+    loop = QEventLoop()
+    finished = []  # type: List[bool]
+    errors = []  # type: List[str]
+
+    def on_finished(*args: Any) -> None:
+        finished.append(True)
+        loop.quit()
+
+    def on_failed(error: Any = None, status_code: Optional[int] = None) -> None:
+        errors.append("{} ({})".format(getattr(error, "error", error), status_code))
+        loop.quit()
+
+    timer = QTimer()
+    timer.setSingleShot(True)
+    timer.timeout.connect(loop.quit)
+    timer.start(TIMEOUT * 1000)
+    started = time.perf_counter()
+    start(on_finished, on_failed)
+    if not finished and not errors:
+        loop.exec_()
+    seconds = time.perf_counter() - started
+    timer.stop()
+    if errors:
+        raise RuntimeError("request failed: {}".format(errors[0]))
+    if not finished:
+        raise RuntimeError("request did not finish within {} seconds".format(TIMEOUT))
+    return seconds
+
+
+def measure_peak_memory(function: Callable[[], Any]) -> float:
+    """
+    Run a function while tracing memory allocations.
+    :param function: The function.
+    :return: The peak of the memory allocated by Python while it ran, in KB.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_list_queries(drivers: Dict[str, AbstractApiClient]) -> Dict[str, Any]:
+    # Search terms are unique per run, so the first time they are queried they're not in the HTTP cache.
+    run_id = int(time.time())
+    results = {}
+    for name, driver in drivers.items():
+        queries = [driver.getThingsBySearchQuery("bench{}x{}".format(run_id, index)) for index in range(QUERIES + 2)]
+
+        def query(index: int) -> float:
+            return run_request(lambda on_finished, on_failed: driver.getThings(
+                queries[index], 1, on_finished, on_failed))
+
+        # The first request opens the connection.
+        first = query(0)
+        latencies = sorted(query(index) * 1000 for index in range(1, QUERIES + 1))
+        cached = [query(index) * 1000 for index in range(1, QUERIES + 1)]
+        results[name] = {
+            "first_ms": first * 1000,
+            "median_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95)],
+            "cached_median_ms": statistics.median(cached),
+            "peak_kb": measure_peak_memory(lambda: query(QUERIES + 1)),
+        }
+    return results
+
+
+def bench_parsing() -> Dict[str, Any]:
+    results = {}  # type: Dict[str, Any]
+    for name, (driver_class, _) in DRIVERS.items():
+        results[name] = {}
+        for size in PAGE_SIZES:
+            body = SEARCH_PAYLOADS[name](size)
+
+            def parse() -> None:
+                driver_class._parseGetThings(200, body)  # type: ignore
+
+            durations = []
+            for _ in range(RUNS):
+                started = time.perf_counter()
+                parse()
+                durations.append(time.perf_counter() - started)
+            seconds = statistics.median(durations)
+            results[name][str(size)] = {
+                "ms": seconds * 1000,
+                "items_per_second": size / seconds,
+                "page_kb": len(body) / 1024,
+                "peak_kb": measure_peak_memory(parse),
+            }
+    return results
+
+
+def bench_things_model() -> Dict[str, Any]:
+    results = {}
+    for size in PAGE_SIZES:
+        things = ThingiverseApiClient._parseGetThings(200, payloads.thingiverse_search(size))[1] or []
+        model = ThingsListModel()
+        roles = list(model.roleNames())
+
+        def show() -> None:
+            model.setItems(things)
+            for row in range(model.rowCount()):
+                index = model.index(row)
+                for role in roles:
+                    model.data(index, role)
+
+        durations = []
+        for _ in range(RUNS):
+            started = time.perf_counter()
+            show()
+            durations.append(time.perf_counter() - started)
+        results[str(size)] = {
+            "ms": statistics.median(durations) * 1000,
+            "peak_kb": measure_peak_memory(show),
+        }
+    return results
+
+
+def bench_downloads(driver: AbstractApiClient) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+
+        def download(file_id: int) -> float:
+            path = os.path.join(directory, "{}.stl".format(file_id))
+            return run_request(lambda on_finished, on_failed: driver.downloadThingFile(
+                file_id, "model.stl", path, on_finished, on_failed))
+
+        durations = [download(file_id) for file_id in range(1, DOWNLOADS + 1)]
+        return {
+            "mb_per_second": DOWNLOAD_SIZE / statistics.median(durations) / 1024 / 1024,
+            "peak_kb": measure_peak_memory(lambda: download(DOWNLOADS + 1)),
+        }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}  # type: Dict[str, float]
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, "{}{}.".format(prefix, key)))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(path: str, results: Dict[str, Any]) -> None:
+    with open(path) as baseline_file:
+        baseline = flatten(json.load(baseline_file)["results"])
+    print("\ncompared with {}:".format(path))
+    for key, value in flatten(results).items():
+        if key in baseline and baseline[key]:
+            print("  {}: {:.2f} -> {:.2f} ({:+.1f}%)".format(
+                key, baseline[key], value, (value - baseline[key]) * 100 / baseline[key]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=100, help="delay before every response, in milliseconds")
+    parser.add_argument("--bandwidth", type=int, default=0, help="in KB/s per response, 0 for no limit")
+    parser.add_argument("--output", help="file to save the results to, as JSON")
+    parser.add_argument("--compare", help="results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    application = QCoreApplication(sys.argv)  # noqa: F841, needed for the network requests
+    QStandardPaths.setTestModeEnabled(True)
+    PreferencesHelper._snapshot = SettingsSnapshot(Preferences())
+    process, url = start_server(args.latency / 1000, args.bandwidth * 1024 or None)
+    try:
+        drivers = {name: create_driver(driver_class, url + path) for name, (driver_class, path) in DRIVERS.items()}
+        results = {
+            "list_query": bench_list_queries(drivers),
+            "parse": bench_parsing(),
+            "things_model": bench_things_model(),
+            "download": bench_downloads(drivers["thingiverse"]),
+        }
+    finally:
+        process.terminate()
+
+    for key, value in flatten(results).items():
+        print("{}: {:.2f}".format(key, value))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "environment": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "qt": QT_VERSION_STR,
+                    "pyqt": PYQT_VERSION_STR,
+                },
+                "options": {"latency_ms": args.latency, "bandwidth_kb_per_second": args.bandwidth,
+                            "queries": QUERIES, "runs": RUNS},
+                "results": results,
+            }, output_file, indent=2)
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
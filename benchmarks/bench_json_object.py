@@ -0,0 +1,82 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+"""
+Micro-benchmark for the API models: allocations and memory per 1,000 parsed things, and toStruct() speed.
+Compares the slotted records with the previous QObject based models.
+Note that tracemalloc only sees Python allocations, the C++ side of each legacy QObject is not included.
+Run from the repository root: python -m benchmarks.bench_json_object
+"""
+import gc
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from PyQt5.QtCore import QObject
+
+from ThingiBrowser.api.JsonObject import Thing
+
+COUNT = 1000
+
+
+class LegacyJsonObject(QObject):
+    """ The QObject based model as it was before the slotted records. """
+    def __init__(self, _dict: Dict[str, Any]):
+        self.type = self.__class__.__name__
+        if _dict:
+            vars(self).update(_dict)
+        super().__init__()
+
+    def toStruct(self) -> Dict[str, Any]:
+        return self.__dict__
+
+
+class LegacyThing(LegacyJsonObject):
+    def __init__(self, _dict: Dict[str, Any]):
+        self.id = None
+        self.thumbnail = None
+        self.name = None
+        self.url = None
+        self.description = None
+        super().__init__(_dict)
+
+
+def make_items() -> List[Dict[str, Any]]:
+    return [{
+        "id": index,
+        "thumbnail": "https://cdn.thingiverse.com/renders/{}/thumb_medium.jpg".format(index),
+        "name": "Thing {}".format(index),
+        "url": "https://www.thingiverse.com/thing:{}".format(index),
+        "description": "Description of thing {}".format(index),
+    } for index in range(COUNT)]
+
+
+def measure_allocations(model: Callable[[Dict[str, Any]], Any], items: List[Dict[str, Any]]) -> None:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    things = [model(item) for item in items]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    print("  {:>8} allocations, {:>8.1f} KiB, {:>6.0f} bytes per thing".format(blocks, size / 1024, size / COUNT))
+    del things
+
+
+def measure_to_struct(model: Callable[[Dict[str, Any]], Any], items: List[Dict[str, Any]]) -> None:
+    things = [model(item) for item in items]
+    seconds = min(timeit.repeat(lambda: [thing.toStruct() for thing in things], number=10, repeat=5)) / 10
+    print("  toStruct() for {} things: {:.3f} ms".format(COUNT, seconds * 1000))
+
+
+def main() -> None:
+    items = make_items()
+    for label, model in (("QObject models (before)", LegacyThing), ("Slotted records (after)", Thing)):
+        print(label)
+        measure_allocations(model, items)
+        measure_to_struct(model, items)
+
+
+if __name__ == "__main__":
+    main()
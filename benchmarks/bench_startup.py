@@ -0,0 +1,71 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+"""
+Startup benchmark: the import cost the plugin adds to Cura's boot, with lazy loading and as it was before.
+Every measurement runs in a fresh interpreter in which Qt, Uranium and Cura are already imported (as they are when
+Cura loads plugins), so only the plugin's own imports are timed.
+Before lazy loading the extension imported the service, both drivers, the analytics client and the thumbnail provider
+when Cura booted, and the MyMiniFactory driver sent a request for the user data. Now those happen on first open.
+Needs Uranium and Cura on the Python path.
+Run from the repository root: python -m benchmarks.bench_startup
+"""
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+RUNS = 10
+
+# Modules that Cura has loaded before it registers plugins.
+PRELOADED = [
+    "PyQt5.QtCore", "PyQt5.QtNetwork", "PyQt5.QtQuick", "PyQt5.QtGui",
+    "UM.Extension", "UM.Logger", "UM.Signal", "cura.CuraApplication",
+]
+
+# Modules imported by register() at boot.
+BOOT = ["ThingiBrowser.ThingiBrowserExtension"]
+
+# Modules that are only imported when a plugin window is opened for the first time.
+FIRST_OPEN = ["ThingiBrowser.ThingiBrowserService", "ThingiBrowser.api.Analytics", "ThingiBrowser.ThumbnailImageProvider"]
+
+SCRIPT = """
+import importlib, json, sys, time
+for name in {preloaded!r}:
+    importlib.import_module(name)
+modules = len(sys.modules)
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": len(sys.modules) - modules}}))
+"""
+
+
+def measure(modules: List[str]) -> Dict[str, float]:
+    """
+    Import the given modules in fresh interpreters.
+    :param modules: The modules to import.
+    :return: The median import time in milliseconds and the number of modules that were loaded.
+    """
+    results = []
+    for _ in range(RUNS):
+        output = subprocess.check_output([sys.executable, "-c", SCRIPT.format(preloaded=PRELOADED, modules=modules)])
+        results.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return {
+        "milliseconds": statistics.median(result["seconds"] for result in results) * 1000,
+        "modules": results[0]["modules"],
+    }
+
+
+def main() -> None:
+    lazy = measure(BOOT)
+    eager = measure(BOOT + FIRST_OPEN)
+    print("{:<28}{:>12}{:>10}".format("", "import (ms)", "modules"))
+    print("{:<28}{:>12.1f}{:>10}".format("eager boot (before)", eager["milliseconds"], eager["modules"]))
+    print("{:<28}{:>12.1f}{:>10}".format("lazy boot", lazy["milliseconds"], lazy["modules"]))
+    print("{:<28}{:>12.1f}{:>10}".format("saved at boot", eager["milliseconds"] - lazy["milliseconds"],
+                                         eager["modules"] - lazy["modules"]))
+
+
+if __name__ == "__main__":
+    main()
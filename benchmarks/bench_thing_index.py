@@ -0,0 +1,100 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+"""
+Benchmark for the local search index: indexing speed and query latency with 100,000 indexed things.
+Things are added per page of results, like the drivers do, into an index file in a temporary directory.
+Names and descriptions use a vocabulary of a few thousand words with a Zipf distribution, like real text. The most
+frequent words are stop words that are not searched for, queries use the other words with the same distribution.
+Needs Uranium on the Python path.
+Run from the repository root: python -m benchmarks.bench_thing_index
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import List
+
+from ThingiBrowser.api.JsonObject import Thing
+from ThingiBrowser.api.ThingIndex import ThingIndex
+from ThingiBrowser.Settings import Settings
+
+COUNT = 100000
+QUERIES = 200
+VOCABULARY_SIZE = 5000
+
+STOP_WORDS = [
+    "the", "a", "for", "and", "with", "to", "of", "this", "is", "in", "print", "printed", "it", "on", "you", "3d",
+]
+
+COMMON_WORDS = [
+    "cube", "calibration", "benchy", "vase", "spiral", "gear", "planetary", "box", "hinge", "lid", "dragon",
+    "articulated", "phone", "stand", "holder", "cable", "clip", "organizer", "miniature", "terrain", "tower",
+    "dice", "pen", "plant", "pot", "lamp", "shade", "mount", "bracket", "raspberry", "enclosure", "fan", "duct",
+    "spool", "filament", "guide", "keychain", "whistle", "rocket", "robot", "skull", "octopus", "flexi", "rex",
+    "chess", "piece", "knight", "castle", "bowl", "cup", "coaster", "hook", "wall", "drawer", "tool", "wrench",
+]
+
+
+def make_vocabulary(rng: random.Random) -> List[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = STOP_WORDS + COMMON_WORDS
+    while len(words) < VOCABULARY_SIZE:
+        words.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return words
+
+
+def make_pages(rng: random.Random, words: List[str], weights: List[float]) -> List[List[Thing]]:
+    things = [Thing({
+        "id": index,
+        "name": " ".join(rng.choices(words, weights, k=rng.randint(2, 4))),
+        "description": " ".join(rng.choices(words, weights, k=rng.randint(10, 40))),
+        "url": "https://www.thingiverse.com/thing:{}".format(index),
+        "thumbnail": "https://cdn.thingiverse.com/renders/{}/thumb_medium.jpg".format(index),
+    }) for index in range(COUNT)]
+    return [things[start:start + Settings.PER_PAGE] for start in range(0, COUNT, Settings.PER_PAGE)]
+
+
+def make_queries(rng: random.Random, words: List[str], weights: List[float]) -> List[str]:
+    words, weights = words[len(STOP_WORDS):], weights[len(STOP_WORDS):]
+    queries = []
+    for _ in range(QUERIES):
+        query = rng.choices(words, weights, k=rng.randint(1, 2))
+        # What the user typed so far, the last word is often incomplete.
+        query[-1] = query[-1][:rng.randint(2, len(query[-1]))]
+        queries.append(" ".join(query))
+    return queries
+
+
+def main() -> None:
+    rng = random.Random(42)
+    words = make_vocabulary(rng)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    pages = make_pages(rng, words, weights)
+    queries = make_queries(rng, words, weights)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "index.sqlite3")
+        index = ThingIndex(path, max_items=COUNT)
+
+        start = time.perf_counter()
+        for page in pages:
+            index.addItems("thingiverse", page)
+        index_seconds = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, "thingiverse")
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        index.close()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+    print("indexed {} things in {:.1f} s ({:.2f} ms per page of {}), {:.1f} MB on disk".format(
+        COUNT, index_seconds, index_seconds * 1000 / len(pages), Settings.PER_PAGE, size / 1024 / 1024))
+    print("query latency over {} queries: median {:.2f} ms, p95 {:.2f} ms, max {:.2f} ms".format(
+        QUERIES, statistics.median(latencies), latencies[int(len(latencies) * 0.95)], latencies[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+"""
+API payloads for the benchmarks, shaped like the responses of the Thingiverse and MyMiniFactory APIs.
+Items have the full set of fields the APIs return, not only the ones the drivers read, so the payload sizes and the
+parsing work are realistic (about 1.5 KB per Thingiverse search hit and 4 KB per MyMiniFactory object).
+Recorded responses can be used instead by saving them as benchmarks/fixtures/<name>.json, for example
+thingiverse_search.json with a full page of search results. Recorded pages are repeated to get the requested size.
+"""
+import json
+import os
+import random
+from typing import Any, Callable, Dict, List
+
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures")
+
+WORDS = [
+    "cube", "calibration", "benchy", "vase", "spiral", "gear", "planetary", "box", "hinge", "lid", "dragon",
+    "articulated", "phone", "stand", "holder", "cable", "clip", "organizer", "miniature", "terrain", "tower",
+    "dice", "pen", "plant", "pot", "lamp", "shade", "mount", "bracket", "raspberry", "enclosure", "fan", "duct",
+]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _thingiverse_creator(rng: random.Random) -> Dict[str, Any]:
+    name = "maker{}".format(rng.randint(1, 100000))
+    return {
+        "id": rng.randint(1, 10000000),
+        "name": name,
+        "first_name": name.capitalize(),
+        "last_name": "",
+        "url": "https://api.thingiverse.com/users/{}".format(name),
+        "public_url": "https://www.thingiverse.com/{}".format(name),
+        "thumbnail": "https://cdn.thingiverse.com/site/img/default/avatar/avatar_default_thumb_medium.jpg",
+        "count_of_followers": rng.randint(0, 5000),
+        "count_of_following": rng.randint(0, 500),
+        "count_of_designs": rng.randint(0, 300),
+        "accepts_tips": rng.random() < 0.2,
+        "is_following": False,
+        "location": "",
+        "cover": "https://cdn.thingiverse.com/site/img/default/cover/cover_default.jpg",
+        "is_admin": False,
+        "is_moderator": False,
+        "is_featured": False,
+        "is_verified": False,
+    }
+
+
+def _thingiverse_thing(rng: random.Random, thing_id: int) -> Dict[str, Any]:
+    name = _text(rng, rng.randint(2, 5))
+    return {
+        "id": thing_id,
+        "name": name,
+        "url": "https://api.thingiverse.com/things/{}".format(thing_id),
+        "public_url": "https://www.thingiverse.com/thing:{}".format(thing_id),
+        "created_at": "2020-0{}-1{}T12:00:00+00:00".format(rng.randint(1, 9), rng.randint(0, 9)),
+        "thumbnail": "https://cdn.thingiverse.com/renders/{:02x}/{:02x}/{}_preview_featured.jpg".format(
+            rng.randint(0, 255), rng.randint(0, 255), thing_id),
+        "preview_image": "https://cdn.thingiverse.com/assets/{:02x}/{:02x}/{}/large_display.jpg".format(
+            rng.randint(0, 255), rng.randint(0, 255), thing_id),
+        "creator": _thingiverse_creator(rng),
+        "is_private": 0,
+        "is_purchased": 0,
+        "is_published": 1,
+        "is_nsfw": False,
+        "comment_count": rng.randint(0, 200),
+        "make_count": rng.randint(0, 500),
+        "like_count": rng.randint(0, 20000),
+        "tags": [{"name": word, "url": "https://api.thingiverse.com/tags/{}".format(word), "count": rng.randint(1, 9999),
+                  "things_url": "https://api.thingiverse.com/tags/{}/things".format(word),
+                  "absolute_url": "/tag:{}".format(word)} for word in rng.sample(WORDS, 3)],
+        "is_edu_approved": False,
+    }
+
+
+def _thingiverse_file(rng: random.Random, file_id: int) -> Dict[str, Any]:
+    name = "{}.stl".format(rng.choice(WORDS))
+    return {
+        "id": file_id,
+        "name": name,
+        "size": rng.randint(10000, 20000000),
+        "url": "https://api.thingiverse.com/files/{}".format(file_id),
+        "public_url": "https://www.thingiverse.com/download:{}".format(file_id),
+        "download_url": "https://api.thingiverse.com/files/{}/download".format(file_id),
+        "threejs_url": "https://cdn.thingiverse.com/threejs_json/{}.js".format(file_id),
+        "thumbnail": "https://cdn.thingiverse.com/renders/{}_thumb_medium.jpg".format(file_id),
+        "default_image": None,
+        "date": "2020-05-01 12:00:00",
+        "formatted_size": "1 MB",
+        "download_count": rng.randint(0, 100000),
+        "direct_url": "https://cdn.thingiverse.com/assets/{}/{}".format(file_id, name),
+    }
+
+
+def _myminifactory_image(rng: random.Random) -> Dict[str, Any]:
+    upload_id = rng.randint(1, 10000000)
+
+    def size(label: str, width: int, height: int) -> Dict[str, Any]:
+        return {"url": "https://dl.myminifactory.com/object-assets/{}/images/{}-{}.jpg".format(
+            upload_id, label, upload_id), "width": width, "height": height}
+
+    return {
+        "id": rng.randint(1, 10000000),
+        "upload_id": upload_id,
+        "is_primary": True,
+        "original": size("original", 1920, 1440),
+        "tiny": size("tiny", 100, 75),
+        "thumbnail": size("thumbnail", 230, 172),
+        "standard": size("720X720", 720, 540),
+    }
+
+
+def _myminifactory_object(rng: random.Random, object_id: int) -> Dict[str, Any]:
+    name = _text(rng, rng.randint(2, 5))
+    return {
+        "id": object_id,
+        "url": "https://www.myminifactory.com/object/3d-print-{}".format(object_id),
+        "name": name,
+        "description": "<p>{}</p>".format(_text(rng, rng.randint(40, 150))),
+        "licenses": [{"type": "creative-commons", "value": "CC BY-NC-SA"}],
+        "images": [_myminifactory_image(rng) for _ in range(rng.randint(1, 4))],
+        "designer": {
+            "username": "designer{}".format(rng.randint(1, 100000)),
+            "name": _text(rng, 2),
+            "profile_url": "https://www.myminifactory.com/users/designer",
+            "avatar_url": "https://dl.myminifactory.com/avatars/default.png",
+            "followers": rng.randint(0, 5000),
+        },
+        "views": rng.randint(0, 100000),
+        "likes": rng.randint(0, 5000),
+        "featured": rng.random() < 0.1,
+        "tags": rng.sample(WORDS, 4),
+        "files": {"total_count": 1, "items": [{
+            "id": object_id * 10,
+            "filename": "{}.stl".format(rng.choice(WORDS)),
+            "thumbnail_url": "https://dl.myminifactory.com/object-assets/{}/thumbnail.png".format(object_id),
+            "size": rng.randint(10000, 20000000),
+        }]},
+    }
+
+
+def _load_fixture(name: str) -> Any:
+    path = os.path.join(FIXTURES_DIRECTORY, "{}.json".format(name))
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as fixture:
+        return json.loads(fixture.read())
+
+
+def _items(name: str, count: int, make_item: Callable[[random.Random, int], Dict[str, Any]],
+           get_items: Callable[[Any], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Get items from a recorded fixture if there is one, otherwise make them.
+    :param name: The name of the fixture.
+    :param count: The number of items.
+    :param make_item: Makes an item from a random generator and an ID.
+    :param get_items: Gets the list of items from a recorded response.
+    :return: The items.
+    """
+    recorded = _load_fixture(name)
+    if recorded is not None:
+        items = get_items(recorded)
+        return [dict(items[index % len(items)], id=index + 1) for index in range(count)]
+    rng = random.Random(count)
+    return [make_item(rng, 1000000 + index) for index in range(count)]
+
+
+def thingiverse_search(count: int) -> bytes:
+    hits = _items("thingiverse_search", count, _thingiverse_thing, lambda recorded: recorded["hits"])
+    return json.dumps({"total": 100000, "hits": hits}).encode()
+
+
+def thingiverse_thing(thing_id: int) -> bytes:
+    return json.dumps(_thingiverse_thing(random.Random(thing_id), thing_id)).encode()
+
+
+def thingiverse_files(count: int) -> bytes:
+    return json.dumps(_items("thingiverse_files", count, _thingiverse_file, lambda recorded: recorded)).encode()
+
+
+def myminifactory_search(count: int) -> bytes:
+    items = _items("myminifactory_search", count, _myminifactory_object, lambda recorded: recorded["items"])
+    return json.dumps({"total_count": 100000, "items": items}).encode()
+
+
+def myminifactory_object(object_id: int) -> bytes:
+    return json.dumps(_myminifactory_object(random.Random(object_id), object_id)).encode()
+
+
+def model_file(size: int) -> bytes:
+    """
+    Make the content of a model file. Binary STL files are mostly floats, which compress badly, like random bytes.
+    :param size: The size in bytes.
+    :return: The content.
+    """
+    return random.Random(size).getrandbits(size * 8).to_bytes(size, "little")
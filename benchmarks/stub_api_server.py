@@ -0,0 +1,157 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+"""
+Local HTTP server that replays Thingiverse and MyMiniFactory API responses, for benchmarks that should not depend on
+the real APIs. Every response is delayed by the configured latency and sent at the configured bandwidth.
+Thingiverse endpoints are served at the root, MyMiniFactory endpoints under /api/v2, like the real APIs.
+The page size of list queries is taken from the per_page parameter, so pages of any size can be requested.
+Can also be started on its own to point a development build of the plugin at it.
+Run from the repository root: python -m benchmarks.stub_api_server --port 8000 --latency 100 --bandwidth 1000
+"""
+import argparse
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import payloads
+
+# Size of the model files served by the download endpoint, in bytes.
+DOWNLOAD_SIZE = 20 * 1024 * 1024
+
+CHUNK_SIZE = 16 * 1024
+
+Route = Tuple[Pattern, Callable[[re.Match, int], bytes]]
+
+ROUTES = [
+    (re.compile(r"^/files/(\d+)/download$"), lambda match, per_page: payloads.model_file(DOWNLOAD_SIZE)),
+    (re.compile(r"^/things/(\d+)/files$"), lambda match, per_page: payloads.thingiverse_files(5)),
+    (re.compile(r"^/things/(\d+)$"), lambda match, per_page: payloads.thingiverse_thing(int(match.group(1)))),
+    (re.compile(r"^/api/v2/objects/(\d+)$"), lambda match, per_page: payloads.myminifactory_object(
+        int(match.group(1)))),
+    (re.compile(r"^/api/v2/\w+"), lambda match, per_page: payloads.myminifactory_search(per_page)),
+    (re.compile(r"^/\w+"), lambda match, per_page: payloads.thingiverse_search(per_page)),
+]  # type: List[Route]
+
+
+class StubApiServer:
+    """ Serves the stub API on a background thread. """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, bandwidth: Optional[int] = None) -> None:
+        """
+        :param port: The port to listen on, 0 to pick a free one.
+        :param latency: The delay before every response, in seconds.
+        :param bandwidth: The bandwidth per response in bytes per second, None for no limit.
+        """
+        self._cache = {}  # type: Dict[Tuple[Any, ...], bytes]
+        self._cache_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._createHandler(latency, bandwidth))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:{}".format(self._server.server_address[1])
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def getBody(self, path: str, per_page: int) -> Optional[bytes]:
+        """
+        Get the response body for a path. Bodies are made once, so making them is not part of the measured latency.
+        :param path: The path of the request, without the query.
+        :param per_page: The requested page size.
+        :return: The body, or None if there's no such endpoint.
+        """
+        for pattern, make_body in ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            key = (pattern.pattern, match.groups(), per_page)
+            with self._cache_lock:
+                if key not in self._cache:
+                    self._cache[key] = make_body(match, per_page)
+                return self._cache[key]
+        return None
+
+    def _createHandler(self, latency: float, bandwidth: Optional[int]) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep connections open, like the real APIs
+
+            def do_GET(self) -> None:
+                url = urlsplit(self.path)
+                per_page = int(parse_qs(url.query).get("per_page", ["20"])[0])
+                body = server.getBody(url.path, per_page)
+                time.sleep(latency)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                content_type = "application/octet-stream" if url.path.endswith("/download") else "application/json"
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self._write(body)
+
+            def do_HEAD(self) -> None:
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _write(self, body: bytes) -> None:
+                if not bandwidth:
+                    self.wfile.write(body)
+                    return
+                started = time.perf_counter()
+                for offset in range(0, len(body), CHUNK_SIZE):
+                    self.wfile.write(body[offset:offset + CHUNK_SIZE])
+                    # Sleep until the time it takes to send this much data at the configured bandwidth.
+                    delay = (offset + CHUNK_SIZE) / bandwidth - (time.perf_counter() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # one line per request would drown the benchmark output
+
+        return Handler
+
+
+def serve(port: int, latency: float, bandwidth: Optional[int], ready: Optional[Callable[[str], None]] = None) -> None:
+    """
+    Serve the stub API until the process is stopped.
+    :param port: The port to listen on, 0 to pick a free one.
+    :param latency: The delay before every response, in seconds.
+    :param bandwidth: The bandwidth per response in bytes per second, None for no limit.
+    :param ready: Called with the URL of the server once it's listening.
+    """
+    server = StubApiServer(port, latency, bandwidth)
+    server.start()
+    if ready:
+        ready(server.url)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0, help="delay before every response, in milliseconds")
+    parser.add_argument("--bandwidth", type=int, default=0, help="in KB/s per response, 0 for no limit")
+    args = parser.parse_args()
+    serve(args.port, args.latency / 1000, args.bandwidth * 1024 or None, lambda url: print("serving on", url))
+
+
+if __name__ == "__main__":
+    main()
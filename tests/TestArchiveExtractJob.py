@@ -0,0 +1,102 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import sys
+import zipfile
+from unittest.mock import patch, MagicMock
+
+import pytest
+from surrogate import surrogate
+
+
+def make_archive(path: str, members) -> str:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members:
+            archive.writestr(name, content)
+    return path
+
+
+def patch_archive(path: str, patcher) -> str:
+    with open(path, "rb") as archive_file:
+        data = bytearray(archive_file.read())
+    patcher(data)
+    with open(path, "wb") as archive_file:
+        archive_file.write(data)
+    return path
+
+
+class TestArchiveExtractJob:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def extract_job_class(self):
+        from ..ThingiBrowser.ArchiveExtractJob import ArchiveExtractJob
+        return ArchiveExtractJob
+
+    @pytest.fixture
+    def run(self, extract_job_class, tmp_path):
+        def run(archive_path: str, **kwargs):
+            job = extract_job_class(archive_path, str(tmp_path / "files"), ["stl", "obj"], **kwargs)
+            on_finished, on_failed = MagicMock(), MagicMock()
+            job.signals.finished.connect(on_finished)
+            job.signals.failed.connect(on_failed)
+            with patch.object(sys.modules[extract_job_class.__module__], "Logger"):
+                job.run()
+            return on_finished.call_args[0][0] if on_finished.called else on_failed.call_args[0][0]
+        return run
+
+    def test_detects_archives(self, extract_job_class, tmp_path):
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [("cube.stl", b"solid cube")])
+        mesh_path = str(tmp_path / "cube.stl")
+        with open(mesh_path, "wb") as mesh_file:
+            mesh_file.write(b"solid cube")
+        assert extract_job_class.isArchive(archive_path)
+        assert not extract_job_class.isArchive(mesh_path)
+
+    def test_extracts_supported_members_only(self, run, tmp_path):
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [
+            ("README.txt", b"hello"),
+            ("files/cube.stl", b"solid cube"),
+            ("__MACOSX/files/._cube.stl", b"fork"),
+            ("other/cube.STL", b"solid other cube"),
+            ("..\\..\\sphere.obj", b"v 0 0 0"),
+        ])
+        paths = run(archive_path)
+        assert [os.path.basename(path) for path in paths] == ["cube.stl", "cube (2).STL", "sphere.obj"]
+        assert all(os.path.dirname(path) == str(tmp_path / "files") for path in paths)
+        with open(paths[1], "rb") as extracted_file:
+            assert extracted_file.read() == b"solid other cube"
+
+    def test_too_many_entries_are_rejected(self, run, tmp_path):
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [("{}.stl".format(i), b"x") for i in range(3)])
+        assert "entries" in run(archive_path, max_entries=2)
+        assert not os.path.exists(str(tmp_path / "files"))
+
+    def test_too_large_content_is_rejected(self, run, tmp_path):
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [("a.stl", b"x" * 600), ("b.stl", b"x" * 600)])
+        assert "expands" in run(archive_path, max_size=1000)
+        assert not os.path.exists(str(tmp_path / "files"))
+
+    def test_highly_compressed_member_is_rejected(self, run, extract_job_class, tmp_path):
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [("bomb.stl", b"\0" * (3 * 1024 * 1024))])
+        assert "compressed" in run(archive_path, max_ratio=2)
+
+    def test_encrypted_member_is_rejected(self, run, tmp_path):
+        def encrypt(data: bytearray) -> None:
+            # set the encryption flag on the local and central headers, extracting then needs a password
+            data[data.find(b"PK\x03\x04") + 6] |= 0x1
+            data[data.find(b"PK\x01\x02") + 8] |= 0x1
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [("a.stl", b"solid a"), ("b.stl", b"solid b")])
+        assert "encrypted" in run(patch_archive(archive_path, encrypt))
+        assert not os.path.exists(str(tmp_path / "files"))
+
+    def test_corrupt_member_is_rejected(self, run, tmp_path):
+        def corrupt(data: bytearray) -> None:
+            # the second member's compressed data follows its 30 byte local header and name
+            start = data.find(b"PK\x03\x04", 1) + 30 + len("b.stl")
+            for i in range(start, start + 10):
+                data[i] ^= 0xff
+        archive_path = make_archive(str(tmp_path / "thing.zip"), [("a.stl", b"solid a " * 100),
+                                                                  ("b.stl", b"solid b " * 100)])
+        assert "decompressing" in run(patch_archive(archive_path, corrupt))
+        assert not os.path.exists(str(tmp_path / "files"))
@@ -0,0 +1,84 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from unittest.mock import MagicMock
+
+import pytest
+from PyQt5.QtNetwork import QNetworkRequest
+
+from ..ThingiBrowser.DetailPrefetcher import DetailPrefetcher
+
+
+class TestDetailPrefetcher:
+
+    @pytest.fixture
+    def driver(self):
+        driver = MagicMock()
+        driver.cached = set()
+        driver.thing_details_requests = 1
+        driver.hasThingDetails.side_effect = lambda thing_id: thing_id in driver.cached
+        driver.getThingDetails.side_effect = lambda thing_id, on_finished, on_failed, priority: MagicMock(
+            isRunning=True, on_finished=on_finished, on_failed=on_failed)
+        return driver
+
+    @staticmethod
+    def requested(driver):
+        return [c[0][0] for c in driver.getThingDetails.call_args_list]
+
+    @staticmethod
+    def finish(driver, index: int) -> None:
+        call = driver.getThingDetails.call_args_list[index]
+        driver.cached.add(call[0][0])
+        call[0][1](MagicMock())
+
+    def test_requests_are_low_priority_and_capped(self, driver):
+        prefetcher = DetailPrefetcher(max_parallel=2, max_queued=10, budget=10)
+        for thing_id in range(1, 5):
+            prefetcher.prefetch(driver, thing_id)
+        assert self.requested(driver) == [1, 2]
+        assert driver.getThingDetails.call_args[1]["priority"] == QNetworkRequest.LowPriority
+        self.finish(driver, 0)
+        assert self.requested(driver) == [1, 2, 3]
+
+    def test_hovered_thing_goes_first(self, driver):
+        prefetcher = DetailPrefetcher(max_parallel=1, max_queued=10, budget=10)
+        for thing_id in range(1, 4):
+            prefetcher.prefetch(driver, thing_id)
+        prefetcher.prefetch(driver, 3, urgent=True)
+        self.finish(driver, 0)
+        assert self.requested(driver) == [1, 3]
+
+    def test_failed_request_frees_slot(self, driver):
+        prefetcher = DetailPrefetcher(max_parallel=1, max_queued=10, budget=10)
+        prefetcher.prefetch(driver, 1)
+        prefetcher.prefetch(driver, 2)
+        driver.getThingDetails.call_args[0][2](None, 500)
+        assert self.requested(driver) == [1, 2]
+
+    def test_cached_things_are_skipped(self, driver):
+        driver.cached.add(1)
+        prefetcher = DetailPrefetcher(max_parallel=1, max_queued=10, budget=10)
+        prefetcher.prefetch(driver, 1)
+        assert self.requested(driver) == []
+
+    def test_budget_limits_requests_per_session(self, driver):
+        prefetcher = DetailPrefetcher(max_parallel=5, max_queued=10, budget=2)
+        for thing_id in range(1, 5):
+            prefetcher.prefetch(driver, thing_id)
+        assert self.requested(driver) == [1, 2]
+        assert prefetcher.budget == 0
+
+    def test_budget_counts_every_request_of_the_details(self, driver):
+        driver.thing_details_requests = 2
+        prefetcher = DetailPrefetcher(max_parallel=5, max_queued=10, budget=5)
+        for thing_id in range(1, 5):
+            prefetcher.prefetch(driver, thing_id)
+        assert self.requested(driver) == [1, 2]
+        assert prefetcher.budget == 1
+
+    def test_clear_drops_queued_things(self, driver):
+        prefetcher = DetailPrefetcher(max_parallel=1, max_queued=10, budget=10)
+        prefetcher.prefetch(driver, 1)
+        prefetcher.prefetch(driver, 2)
+        prefetcher.clear()
+        self.finish(driver, 0)
+        assert self.requested(driver) == [1]
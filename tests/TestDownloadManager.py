@@ -0,0 +1,121 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import hashlib
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+from surrogate import surrogate
+
+from ..ThingiBrowser.models.DownloadItem import DownloadItem
+
+
+class TestDownloadManager:
+
+    @pytest.fixture
+    def driver(self):
+        driver = MagicMock()
+        driver.downloadThingFile.side_effect = lambda *args, **kwargs: MagicMock()
+        return driver
+
+    @pytest.fixture
+    def on_finished(self):
+        return MagicMock()
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def download_manager_class(self):
+        from ..ThingiBrowser.DownloadManager import DownloadManager
+        return DownloadManager
+
+    @pytest.fixture
+    def manager(self, download_manager_class, on_finished):
+        return download_manager_class(on_finished=on_finished, on_failed=MagicMock(), max_parallel=2)
+
+    @pytest.fixture
+    def store(self, download_manager_class, tmp_path):
+        model_store_class = sys.modules[download_manager_class.__module__].ModelStore
+        return model_store_class(str(tmp_path / "models"), max_size=1024)
+
+    @pytest.fixture
+    def stored_manager(self, download_manager_class, on_finished, store):
+        return download_manager_class(on_finished=on_finished, on_failed=MagicMock(), max_parallel=2, store=store)
+
+    @staticmethod
+    def started_file_ids(driver):
+        return [call[0][0] for call in driver.downloadThingFile.call_args_list]
+
+    @staticmethod
+    def finish(driver, call_index: int) -> None:
+        call = driver.downloadThingFile.call_args_list[call_index]
+        file_path = call[0][2]
+        with open(file_path, "wb") as file:
+            file.write(b"solid cube")
+        call[1]["on_finished"](file_path, hashlib.sha256(b"solid cube").hexdigest())
+
+    def test_limits_parallel_downloads(self, manager, driver):
+        items = [manager.enqueue(driver, file_id, "{}.stl".format(file_id)) for file_id in range(3)]
+        assert self.started_file_ids(driver) == [0, 1]
+        assert items[2].status == DownloadItem.QUEUED
+        assert manager.model.count == 3
+
+    def test_finished_download_starts_next_one(self, manager, driver, on_finished):
+        items = [manager.enqueue(driver, file_id, "{}.stl".format(file_id)) for file_id in range(3)]
+        self.finish(driver, 0)
+        assert items[0].status == DownloadItem.FINISHED
+        assert on_finished.call_args[0][0].endswith("0.stl")
+        assert self.started_file_ids(driver) == [0, 1, 2]
+
+    def test_higher_priority_starts_first(self, manager, driver):
+        manager.setMaxParallel(1)
+        manager.enqueue(driver, 1, "1.stl")
+        manager.enqueue(driver, 2, "2.stl")
+        manager.enqueue(driver, 3, "3.stl", priority=1)
+        self.finish(driver, 0)
+        assert self.started_file_ids(driver) == [1, 3]
+
+    def test_cancel_running_download_aborts_it(self, manager, driver):
+        items = [manager.enqueue(driver, file_id, "{}.stl".format(file_id)) for file_id in range(3)]
+        request = items[0].request
+        manager.cancel(items[0].download_id)
+        request.abort.assert_called_once()
+        assert items[0].status == DownloadItem.CANCELLED
+        assert self.started_file_ids(driver) == [0, 1, 2]
+
+    def test_cancel_queued_download(self, manager, driver):
+        items = [manager.enqueue(driver, file_id, "{}.stl".format(file_id)) for file_id in range(3)]
+        manager.cancel(items[2].download_id)
+        self.finish(driver, 0)
+        assert items[2].status == DownloadItem.CANCELLED
+        assert self.started_file_ids(driver) == [0, 1]
+
+    def test_retry_failed_download(self, manager, driver):
+        item = manager.enqueue(driver, 1, "1.stl")
+        driver.downloadThingFile.call_args[1]["on_failed"](None, 500)
+        assert item.status == DownloadItem.FAILED
+        assert not manager.hasActiveDownloads
+        manager.retry(item.download_id)
+        assert item.status == DownloadItem.DOWNLOADING
+        assert driver.downloadThingFile.call_count == 2
+
+    def test_clear_inactive_keeps_running_downloads(self, manager, driver):
+        manager.enqueue(driver, 1, "1.stl")
+        manager.enqueue(driver, 2, "2.stl")
+        self.finish(driver, 0)
+        manager.clearInactive()
+        assert manager.model.count == 1
+
+    def test_stored_file_is_loaded_without_download(self, stored_manager, driver, on_finished):
+        stored_manager.enqueue(driver, 1, "cube.stl")
+        self.finish(driver, 0)
+        stored_path = on_finished.call_args[0][0]
+        item = stored_manager.enqueue(driver, 1, "cube.stl")
+        assert self.started_file_ids(driver) == [1]
+        assert item.status == DownloadItem.FINISHED
+        assert item.bytes_received == len(b"solid cube")
+        assert on_finished.call_args[0][0] == stored_path
+
+    def test_failed_download_removes_staging_directory(self, stored_manager, driver, tmp_path):
+        stored_manager.enqueue(driver, 1, "cube.stl")
+        driver.downloadThingFile.call_args[1]["on_failed"](None, 500)
+        assert list((tmp_path / "models" / "staging").iterdir()) == []
@@ -0,0 +1,125 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from surrogate import surrogate
+
+from ..ThingiBrowser.api.JsonObject import Thing
+from ..ThingiBrowser.models.ThingsListModel import ThingsListModel
+from ..ThingiBrowser.Settings import Settings
+
+
+def make_things(start: int, count: int = Settings.PER_PAGE):
+    return [Thing({"id": start + index, "name": "Thing {}".format(index)}) for index in range(count)]
+
+
+class TestFederatedQuery:
+
+    @pytest.fixture
+    def requests(self):
+        return []
+
+    @pytest.fixture
+    def model(self):
+        return ThingsListModel()
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def federated_query_class(self):
+        from ..ThingiBrowser.FederatedQuery import FederatedQuery
+        return FederatedQuery
+
+    @pytest.fixture
+    def query(self, qt_application, federated_query_class, requests, model):
+        def fetch(driver, page, on_finished, on_failed):
+            request = MagicMock()
+            requests.append({"driver": driver, "page": page, "on_finished": on_finished, "on_failed": on_failed,
+                             "request": request})
+            return request
+
+        drivers = {"thingiverse": "thingiverse_driver", "myminifactory": "myminifactory_driver"}
+        with patch.object(sys.modules[federated_query_class.__module__], "Logger"):
+            yield federated_query_class(drivers, fetch, model, on_state_changed=MagicMock())
+
+    @staticmethod
+    def respond(requests, driver: str, things, page: int = 1) -> None:
+        request = next(r for r in requests if r["driver"] == driver + "_driver" and r["page"] == page)
+        request["on_finished"](things)
+
+    @staticmethod
+    def keys(model):
+        return [(thing.source, thing.id) for thing in model.items]
+
+    def test_start_fetches_first_page_from_every_driver(self, query, requests):
+        query.start()
+        assert [(r["driver"], r["page"]) for r in requests] == [("thingiverse_driver", 1), ("myminifactory_driver", 1)]
+        assert query.isRunning
+
+    def test_results_are_shown_as_soon_as_a_driver_answers(self, query, requests, model):
+        query.start()
+        self.respond(requests, "myminifactory", make_things(10, count=2))
+        assert self.keys(model) == [("myminifactory", 10), ("myminifactory", 11)]
+        assert query.isRunning
+
+    def test_results_are_interleaved_in_driver_order(self, query, requests, model):
+        query.start()
+        self.respond(requests, "myminifactory", make_things(10, count=3))
+        self.respond(requests, "thingiverse", make_things(1, count=2))
+        assert self.keys(model) == [("thingiverse", 1), ("myminifactory", 10), ("thingiverse", 2),
+                                    ("myminifactory", 11), ("myminifactory", 12)]
+        assert not query.isRunning
+
+    def test_same_id_from_different_drivers_is_kept(self, query, requests, model):
+        query.start()
+        self.respond(requests, "thingiverse", make_things(1, count=1))
+        self.respond(requests, "myminifactory", make_things(1, count=1))
+        assert self.keys(model) == [("thingiverse", 1), ("myminifactory", 1)]
+
+    def test_next_page_uses_cursor_per_driver(self, query, requests, model):
+        query.start()
+        self.respond(requests, "thingiverse", make_things(100))
+        self.respond(requests, "myminifactory", make_things(1000, count=2))
+        assert model._has_more
+        query.fetchMore()
+        assert [(r["driver"], r["page"]) for r in requests[2:]] == [("thingiverse_driver", 2)]
+        self.respond(requests, "thingiverse", make_things(200, count=1), page=2)
+        assert model.count == Settings.PER_PAGE + 3
+        assert self.keys(model)[-1] == ("thingiverse", 200)
+        assert not model._has_more
+
+    def test_fetch_more_waits_for_running_page(self, query, requests):
+        query.start()
+        self.respond(requests, "thingiverse", make_things(100))
+        query.fetchMore()
+        assert len(requests) == 2
+
+    def test_failing_driver_does_not_block_others(self, query, requests, model):
+        query.start()
+        requests[0]["on_failed"](None, 401)
+        self.respond(requests, "myminifactory", make_things(10))
+        assert self.keys(model)[0] == ("myminifactory", 10)
+        query.fetchMore()
+        assert [(r["driver"], r["page"]) for r in requests[2:]] == [("myminifactory_driver", 2)]
+
+    def test_timed_out_driver_is_skipped_for_the_page(self, query, requests, model):
+        query.start()
+        self.respond(requests, "myminifactory", make_things(10))
+        query._onTimeout("thingiverse")
+        requests[0]["request"].abort.assert_called_once()
+        assert not query.isRunning
+        assert model._has_more
+        query.fetchMore()
+        assert [(r["driver"], r["page"]) for r in requests[2:]] == [("thingiverse_driver", 1),
+                                                                    ("myminifactory_driver", 2)]
+
+    def test_abort_aborts_running_requests_and_drops_replies(self, query, requests, model):
+        query.start()
+        query.abort()
+        assert all(r["request"].abort.called for r in requests)
+        self.respond(requests, "thingiverse", make_things(1))
+        assert model.count == 0
+
+    def test_interleave(self, federated_query_class):
+        assert federated_query_class.interleave([[1, 2, 3], [], [4]]) == [1, 4, 2, 3]
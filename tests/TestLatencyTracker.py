@@ -0,0 +1,31 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from ..ThingiBrowser.LatencyTracker import LatencyTracker
+from ..ThingiBrowser.Settings import Settings
+
+
+class TestLatencyTracker:
+
+    def test_percentile_of_recent_latencies(self):
+        tracker = LatencyTracker(max_samples=100, min_samples=10)
+        for latency in range(100):
+            tracker.add(latency / 100)
+        assert tracker.percentile(0.95, default=5) == 0.95
+        assert tracker.percentile(1, default=5) == 0.99
+
+    def test_default_until_enough_samples(self):
+        tracker = LatencyTracker(max_samples=100, min_samples=10)
+        tracker.add(0.1)
+        assert tracker.percentile(0.95, default=5) == 5
+        assert tracker.getHedgeDelay() == Settings.HEDGE_DEFAULT_DELAY
+
+    def test_old_samples_are_dropped(self):
+        tracker = LatencyTracker(max_samples=2, min_samples=1)
+        for latency in (10, 1, 2):
+            tracker.add(latency)
+        assert tracker.percentile(1, default=5) == 2
+
+    def test_hedge_delay_has_a_minimum(self):
+        tracker = LatencyTracker(max_samples=10, min_samples=1)
+        tracker.add(0.001)
+        assert tracker.getHedgeDelay() == Settings.HEDGE_MIN_DELAY
@@ -0,0 +1,56 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from unittest.mock import patch
+
+from ..ThingiBrowser.LruCache import LruCache
+
+
+class TestLruCache:
+
+    def test_get_returns_stored_item(self):
+        cache = LruCache(2)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+    def test_drops_least_recently_used(self):
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    def test_remove_and_clear(self):
+        cache = LruCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.remove("a")
+        assert "a" not in cache
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_items_expire_after_ttl(self):
+        cache = LruCache(2, ttl=10)
+        with patch("time.monotonic", return_value=100):
+            cache.put("a", 1)
+        with patch("time.monotonic", return_value=105):
+            assert cache.get("a") == 1
+        with patch("time.monotonic", return_value=111):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_contains_does_not_mark_as_used(self):
+        cache = LruCache(2, ttl=10)
+        with patch("time.monotonic", return_value=100):
+            cache.put("a", None)
+            cache.put("b", 2)
+            assert "a" in cache
+            cache.put("c", 3)
+            assert "a" not in cache
+            assert "b" in cache
+        with patch("time.monotonic", return_value=111):
+            assert "b" not in cache
+        assert len(cache) == 2
@@ -0,0 +1,110 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import hashlib
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from surrogate import surrogate
+
+
+def download(store, file_name: str, content: bytes) -> str:
+    staging_path = store.createStagingPath(file_name)
+    with open(staging_path, "wb") as staged_file:
+        staged_file.write(content)
+    return staging_path
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class TestModelStore:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def imported_model_store_class(self):
+        from ..ThingiBrowser.ModelStore import ModelStore
+        return ModelStore
+
+    @pytest.fixture
+    def model_store_class(self, imported_model_store_class):
+        with patch.object(sys.modules[imported_model_store_class.__module__], "Logger"):
+            yield imported_model_store_class
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        return str(tmp_path / "models")
+
+    def test_stored_file_is_found_again(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=1024)
+        path = store.add(("thingiverse", 1, "cube.stl"), download(store, "cube.stl", b"cube"), content_hash(b"cube"))
+        assert os.path.basename(path) == "cube.stl"
+        assert store.get(("thingiverse", 1, "cube.stl")) == path
+        assert model_store_class(directory, max_size=1024).get(("thingiverse", 1, "cube.stl")) == path
+        assert store.get(("myminifactory", 1, "cube.stl")) is None
+
+    def test_identical_content_is_stored_once(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=1024)
+        first = store.add(("thingiverse", 1, "a.stl"), download(store, "a.stl", b"cube"), content_hash(b"cube"))
+        second = store.add(("myminifactory", 2, "b.stl"), download(store, "b.stl", b"cube"), content_hash(b"cube"))
+        assert first == second
+        assert store.size == 4
+
+    def test_least_recently_used_files_are_evicted(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=10)
+        for file_id, content in enumerate([b"aaaa", b"bbbb"]):
+            store.add(("thingiverse", file_id, "x.stl"), download(store, "x.stl", content), content_hash(content))
+        store.get(("thingiverse", 0, "x.stl"))
+        store.add(("thingiverse", 2, "x.stl"), download(store, "x.stl", b"cccc"), content_hash(b"cccc"))
+        assert store.get(("thingiverse", 1, "x.stl")) is None
+        assert store.get(("thingiverse", 0, "x.stl"))
+        assert store.get(("thingiverse", 2, "x.stl"))
+        assert not os.path.exists(os.path.join(directory, "objects", content_hash(b"bbbb")))
+
+    def test_use_is_saved_with_the_next_change(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=10)
+        for file_id, content in enumerate([b"aaaa", b"bbbb"]):
+            store.add(("thingiverse", file_id, "x.stl"), download(store, "x.stl", content), content_hash(content))
+        with patch.object(store, "_save") as save:
+            store.get(("thingiverse", 0, "x.stl"))
+        save.assert_not_called()
+        store.add(("thingiverse", 2, "x.stl"), download(store, "x.stl", b"cccc"), content_hash(b"cccc"))
+        reopened = model_store_class(directory, max_size=10)
+        assert reopened.get(("thingiverse", 0, "x.stl")) is not None
+        assert reopened.get(("thingiverse", 1, "x.stl")) is None
+
+    def test_file_larger_than_limit_is_kept_until_next_download(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=2)
+        path = store.add(("thingiverse", 1, "x.stl"), download(store, "x.stl", b"aaaa"), content_hash(b"aaaa"))
+        assert os.path.isfile(path)
+
+    def test_leftovers_are_removed_on_open(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=1024)
+        staging_path = download(store, "cube.stl", b"cube")
+        orphan = os.path.join(directory, "objects", "orphan")
+        os.makedirs(orphan)
+        model_store_class(directory, max_size=1024)
+        assert not os.path.exists(staging_path)
+        assert not os.path.exists(orphan)
+
+    def test_file_removed_outside_of_plugin_is_forgotten(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=1024)
+        path = store.add(("thingiverse", 1, "cube.stl"), download(store, "cube.stl", b"cube"), content_hash(b"cube"))
+        os.remove(path)
+        assert store.get(("thingiverse", 1, "cube.stl")) is None
+
+    def test_extracted_files_count_towards_the_limit(self, model_store_class, directory):
+        store = model_store_class(directory, max_size=10)
+        archive = store.add(("thingiverse", 1, "a.zip"), download(store, "a.zip", b"aaaa"), content_hash(b"aaaa"))
+        os.makedirs(archive + ".files")
+        with open(os.path.join(archive + ".files", "a.stl"), "wb") as extracted_file:
+            extracted_file.write(b"aaaaaa")
+        store.addExtractedFiles(archive, [os.path.join(archive + ".files", "a.stl")])
+        assert store.size == 10
+        assert store.get(("thingiverse", 1, "a.zip")) == archive
+        store.add(("thingiverse", 2, "b.stl"), download(store, "b.stl", b"bb"), content_hash(b"bb"))
+        assert store.get(("thingiverse", 1, "a.zip")) is None
+        assert not os.path.exists(archive + ".files")
+        assert store.size == 2
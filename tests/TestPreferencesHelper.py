@@ -14,6 +14,7 @@ class TestPreferencesHelper:
     def preferences_helper(self, application):
         with patch("cura.CuraApplication.CuraApplication", application):
             from ..ThingiBrowser.PreferencesHelper import PreferencesHelper
+            PreferencesHelper._snapshot = None
             return PreferencesHelper
 
     def test_initSetting_returns_default_value(self, preferences_helper):
@@ -32,6 +33,12 @@ class TestPreferencesHelper:
         preferences_helper.setSetting("test_setting_stored", "new_stored_value")
         preferences.setValue.assert_called_with("thingibrowser/test_setting_stored", "new_stored_value")
 
+    def test_getSettingValue_uses_snapshot(self, preferences_helper):
+        snapshot = preferences_helper.getSnapshot()
+        assert preferences_helper.getSettingValue("test_setting_stored") == "stored"
+        assert preferences_helper.getSnapshot() is snapshot
+        assert "test_setting_stored" in snapshot._values
+
     def test_getAllSettings_returns_all_settings(self, preferences_helper):
         all_settings = preferences_helper.getAllSettings(drivers={}, views={})
-        assert len(all_settings) == 4
+        assert len(all_settings) == 9
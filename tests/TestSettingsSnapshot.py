@@ -0,0 +1,62 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from typing import Callable, Dict, List
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class PreferencesMock:
+    """ Fake Cura preferences that count reads and notify listeners of changes. """
+
+    def __init__(self, values: Dict[str, str]) -> None:
+        self._values = values
+        self._listeners = []  # type: List[Callable[[str], None]]
+        self.preferenceChanged = MagicMock()
+        self.preferenceChanged.connect.side_effect = self._listeners.append
+        self.reads = 0
+
+    def getValue(self, key: str) -> str:
+        self.reads += 1
+        return self._values.get(key)
+
+    def setValue(self, key: str, value: str) -> None:
+        self._values[key] = value
+        for listener in self._listeners:
+            listener(key)
+
+
+class TestSettingsSnapshot:
+
+    @pytest.fixture
+    def preferences(self):
+        return PreferencesMock({
+            "thingibrowser/myminifactory_access_token": "token",
+            "thingibrowser/user_name": "ChrisTerBeke",
+            "thingibrowser/max_parallel_downloads": "nope",
+        })
+
+    @pytest.fixture
+    def snapshot(self, preferences):
+        from ..ThingiBrowser.SettingsSnapshot import SettingsSnapshot
+        return SettingsSnapshot(preferences)
+
+    def test_reads_preferences_once(self, snapshot, preferences):
+        assert snapshot.myminifactory_api_token == "token"
+        assert snapshot.myminifactory_api_token == "token"
+        assert preferences.reads == 1
+
+    def test_refreshes_changed_setting_only(self, snapshot, preferences):
+        assert snapshot.thingiverse_user_name == "ChrisTerBeke"
+        assert snapshot.myminifactory_api_token == "token"
+        preferences.setValue("thingibrowser/user_name", "fieldOfView")
+        assert snapshot.thingiverse_user_name == "fieldOfView"
+        assert snapshot.myminifactory_api_token == "token"
+        assert preferences.reads == 3
+
+    def test_ignores_other_preferences(self, snapshot, preferences):
+        preferences.setValue("general/language", "nl_NL")
+        assert preferences.reads == 0
+
+    def test_invalid_number_falls_back_to_default(self, snapshot):
+        assert snapshot.max_parallel_downloads == 2
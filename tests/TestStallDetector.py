@@ -0,0 +1,157 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import sys
+import time
+from types import CodeType, SimpleNamespace
+from typing import Callable
+from unittest.mock import patch, MagicMock
+
+import pytest
+from surrogate import surrogate
+
+
+def fake_code(directory: str, path: str, name: str, line: int) -> CodeType:
+    """ Compile a function as if it was defined at a line of a file in the given directory. """
+    module_code = compile("\n" * (line - 1) + "def {}(): pass".format(name), os.path.join(directory, path), "exec")
+    return next(const for const in module_code.co_consts if isinstance(const, CodeType))
+
+
+def nested_code(function: Callable, name: str) -> CodeType:
+    """ Get the code of a function or lambda that is defined in another function. """
+    return next(const for const in function.__code__.co_consts if isinstance(const, CodeType) and const.co_name == name)
+
+
+def make_stack(*codes: CodeType) -> SimpleNamespace:
+    """ Fake the innermost frame of a stack that runs the given functions, outermost first, from Qt. """
+    frame = SimpleNamespace(f_code=fake_code("/usr/lib/PyQt5", "QtCore.py", "exec_", 1), f_lineno=1, f_back=None)
+    for code in codes:
+        frame = SimpleNamespace(f_code=code, f_lineno=code.co_firstlineno, f_back=frame)
+    return frame
+
+
+class TestStallDetector:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def module(self, qt_application):
+        from ..ThingiBrowser import StallDetector
+        return StallDetector
+
+    @pytest.fixture
+    @surrogate("cura.CuraApplication.CuraApplication")
+    @surrogate("UM.Logger.Logger")
+    @surrogate("UM.Signal.Signal")
+    def plugin_classes(self, application, qt_application):
+        with patch("cura.CuraApplication.CuraApplication", application):
+            from ..ThingiBrowser.api.AbstractApiClient import AbstractApiClient
+            from ..ThingiBrowser.ThingiBrowserService import ThingiBrowserService
+            from ..ThingiBrowser.models.ThingsListModel import ThingsListModel
+        # Nested dispatchers are marked when they are defined, which happens before they can be on the stack.
+        ThingiBrowserService._whenCurrentQuery(MagicMock(), MagicMock())
+        AbstractApiClient.getThingDetails(MagicMock(_details_cache=MagicMock(get=MagicMock(return_value=None))), 1,
+                                          MagicMock())
+        AbstractApiClient._parseInBackground(MagicMock(), 200, b"", [])
+        AbstractApiClient._startRequest(MagicMock(), MagicMock(), ("https://api.com/things", b""), MagicMock(),
+                                        False, 0)
+        return AbstractApiClient, ThingiBrowserService, ThingsListModel
+
+    @pytest.fixture
+    def detector(self, module):
+        # Attribute stalls to the test code instead of the plugin code.
+        detector = module.StallDetector(on_stall=MagicMock(), directory=os.path.dirname(os.path.abspath(__file__)),
+                                        interval=0.02, threshold=0.1)
+        with patch.object(module, "Logger"):
+            yield detector
+        detector.stop()
+
+    def test_stall_is_attributed_to_the_blocking_code(self, module, detector):
+        stack = make_stack(fake_code(detector._directory, "ThingiBrowserService.py", "search", 10),
+                           fake_code(detector._directory, "ThingsListModel.py", "update", 20))
+        detector._gui_thread_id = 1
+        detector._stopped = MagicMock()
+        detector._stopped.wait.side_effect = [False, False, True]  # two samples, then stop
+        detector._last_beat = time.monotonic() - 0.3
+        with patch.object(module.sys, "_current_frames", return_value={1: stack}):
+            detector._watch()
+        detector._onHeartbeat()
+        offender = detector.getReport()[0]
+        assert offender["callback"] == "ThingiBrowserService.search"
+        assert offender["location"] == "ThingsListModel.py:20"
+        assert offender["count"] == 1
+        assert offender["max_ms"] >= 100
+
+    def test_gui_thread_is_not_sampled_while_on_time(self, module, detector):
+        detector._stopped = MagicMock()
+        detector._stopped.wait.side_effect = [False, True]
+        detector._last_beat = time.monotonic()
+        with patch.object(module.sys, "_current_frames") as current_frames:
+            detector._watch()
+        current_frames.assert_not_called()
+        assert detector._samples == []
+
+    def test_query_callback_is_blamed_instead_of_the_dispatch(self, module, plugin_classes):
+        api_client_class, service_class, list_model_class = plugin_classes
+        stack = make_stack(nested_code(api_client_class._startRequest, "on_reply_finished"),
+                           nested_code(api_client_class._parseInBackground, "on_parsed"),
+                           api_client_class._handleResponse.__code__,
+                           nested_code(service_class._whenCurrentQuery, "wrapped"),
+                           nested_code(service_class._executeQuery, "<lambda>"),
+                           service_class._onPageFinished.__code__,
+                           list_model_class.setItems.__code__)
+        assert module.StallDetector()._getCulprit(stack) == (
+            "ThingiBrowserService._onPageFinished",
+            "models/ThingsListModel.py:{}".format(list_model_class.setItems.__code__.co_firstlineno))
+
+    def test_details_callback_is_blamed_instead_of_the_dispatch(self, module, plugin_classes):
+        api_client_class, service_class, _ = plugin_classes
+        stack = make_stack(nested_code(api_client_class._parseInBackground, "on_parsed"),
+                           api_client_class._handleResponse.__code__,
+                           nested_code(api_client_class.getThingDetails, "on_details"),
+                           service_class._onThingDetailsFinished.__code__)
+        callback, _ = module.StallDetector()._getCulprit(stack)
+        assert callback == "ThingiBrowserService._onThingDetailsFinished"
+
+    def test_dispatch_is_blamed_when_nothing_else_runs(self, module, plugin_classes):
+        api_client_class, _, _ = plugin_classes
+        stack = make_stack(nested_code(api_client_class._parseInBackground, "on_parsed"),
+                           api_client_class._handleResponse.__code__)
+        callback, _ = module.StallDetector()._getCulprit(stack)
+        assert callback == "AbstractApiClient._handleResponse"
+
+    def test_offenders_are_ranked_by_total_time(self, module, detector):
+        detector._recordStall(0.3, [("Service._onDownloadFinished", "Service.py:10")])
+        detector._recordStall(0.2, [("Analytics._send", "api/Analytics.py:60")] * 2)
+        detector._recordStall(0.2, [("Analytics._send", "api/Analytics.py:61"), ("Service.search", "Service.py:5")])
+        detector._recordStall(0.5, [])
+        report = detector.getReport()
+        assert [offender["callback"] for offender in report] == \
+               [module.UNKNOWN, "Analytics._send", "Service._onDownloadFinished"]
+        assert report[1]["count"] == 2
+        assert report[1]["total_ms"] == pytest.approx(400)
+        assert detector._on_stall.call_count == 4
+
+    def test_late_heartbeat_records_a_stall(self, detector):
+        detector._last_beat = time.monotonic() - 0.5
+        detector._samples = [("Service.search", "Service.py:5")]
+        detector._onHeartbeat()
+        assert detector.getReport()[0]["callback"] == "Service.search"
+        assert detector._samples == []
+
+    def test_short_delays_are_not_stalls(self, detector):
+        detector._last_beat = time.monotonic() - 0.05
+        detector._samples = [("Service.search", "Service.py:5")]
+        detector._onHeartbeat()
+        assert detector.getReport() == []
+        assert detector._samples == []
+
+    def test_code_outside_the_directory_is_not_blamed(self, module, detector):
+        callback, location = detector._getCulprit(sys._getframe())
+        assert callback == "TestStallDetector.test_code_outside_the_directory_is_not_blamed"
+        outside = module.StallDetector(directory="/nonexistent")
+        assert outside._getCulprit(sys._getframe()) == (module.OUTSIDE_PLUGIN, "")
+
+    def test_report_is_logged_as_a_ranked_table(self, module, detector):
+        detector._recordStall(0.3, [("Service._onDownloadFinished", "Service.py:10")])
+        detector.logReport()
+        assert " 1.      300 ms total,    1x" in module.Logger.log.call_args[0][-1]
@@ -4,6 +4,7 @@ from unittest.mock import patch, MagicMock, DEFAULT, call
 from typing import Callable
 
 import os
+import sys
 import pytest
 from surrogate import surrogate
 
@@ -31,8 +32,20 @@ class TestThingiBrowserExtension:
         with patch("cura.CuraApplication.CuraApplication", application):
             with patch("UM.Extension.Extension", ExtensionMock):
                 from ..ThingiBrowser.ThingiBrowserExtension import ThingiBrowserExtension
+                # Import the lazily loaded modules while Cura is mocked.
+                from ..ThingiBrowser import ThingiBrowserService, ThumbnailImageProvider  # noqa: F401
+                from ..ThingiBrowser.api import Analytics  # noqa: F401
                 return ThingiBrowserExtension
 
+    @pytest.fixture(autouse=True)
+    def warm_up(self, make_plugin):
+        package = make_plugin.__module__.rsplit(".", 1)[0]
+        service_class = sys.modules[package + ".ThingiBrowserService"].ThingiBrowserService
+        provider_class = sys.modules[package + ".ThumbnailImageProvider"].ThumbnailImageProvider
+        with patch.object(service_class, "warmUpConnections") as warm_up_service, \
+                patch.object(provider_class, "warmUp") as warm_up_thumbnails:
+            yield warm_up_service, warm_up_thumbnails
+
     def test_extension_loads(self, make_plugin):
         with patch.multiple(ExtensionMock, setMenuName=DEFAULT, addMenuItem=DEFAULT) as mocked_values:
             plugin = make_plugin()
@@ -42,6 +55,13 @@ class TestThingiBrowserExtension:
                 call("Settings", plugin.showSettingsWindow)
             ])
 
+    def test_extension_loads_lazily(self, make_plugin, application):
+        application.reset_mock()
+        plugin = make_plugin()
+        assert plugin._service is None
+        assert plugin._analytics is None
+        application.getPluginRegistry.assert_not_called()
+
     def test_extension_opens_main_window(self, make_plugin, application):
         application.reset_mock()
         plugin = make_plugin()
@@ -69,3 +89,19 @@ class TestThingiBrowserExtension:
             "ThingiService": plugin._service,
             "Analytics": plugin._analytics
         })
+
+    def test_extension_warms_up_connections_when_opening_main_window(self, make_plugin, warm_up):
+        warm_up_service, warm_up_thumbnails = warm_up
+        plugin = make_plugin()
+        warm_up_service.assert_not_called()
+        plugin.showMainWindow()
+        warm_up_service.assert_called_once()
+        assert warm_up_thumbnails.call_args[0][0] == ["cdn.thingiverse.com", "dl.myminifactory.com"]
+
+    def test_extension_registers_thumbnail_provider_once(self, make_plugin, application):
+        application.reset_mock()
+        plugin = make_plugin()
+        plugin.showMainWindow()
+        plugin.showSettingsWindow()
+        application.getQmlEngine.return_value.addImageProvider.assert_called_once_with("thingithumb",
+                                                                                      plugin._thumbnail_provider)
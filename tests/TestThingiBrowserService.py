@@ -0,0 +1,395 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from unittest.mock import patch, MagicMock
+
+import pytest
+from PyQt5.QtNetwork import QNetworkRequest
+from surrogate import surrogate
+
+from ..ThingiBrowser.api.JsonObject import Thing, ThingDetails, ThingFile
+from ..ThingiBrowser.models.DriverOption import DriverOption
+from ..ThingiBrowser.Settings import Settings
+
+
+def make_things(page: int, count: int = Settings.PER_PAGE):
+    return [Thing({"id": page * 100 + index, "name": "Thing {}".format(index)}) for index in range(count)]
+
+
+class TestThingiBrowserService:
+
+    @pytest.fixture
+    @surrogate("cura.CuraApplication.CuraApplication")
+    @surrogate("UM.Logger.Logger")
+    @surrogate("UM.Signal.Signal")
+    def service(self, application):
+        with patch("cura.CuraApplication.CuraApplication", application):
+            from ..ThingiBrowser.ThingiBrowserService import ThingiBrowserService
+            service = ThingiBrowserService(extension=MagicMock())
+            driver = MagicMock()
+            driver.getThingsBySearchQuery.side_effect = lambda search_terms: "search/{}".format(search_terms)
+            driver.getThings.side_effect = lambda **kwargs: MagicMock()
+            driver.searchLocal.return_value = []
+            service._drivers["thingiverse"] = DriverOption(label="Thingiverse", driver=driver)
+            service._active_driver_name = "thingiverse"
+            return service
+
+    @pytest.fixture
+    def driver(self, service):
+        return service._drivers["thingiverse"].driver
+
+    @staticmethod
+    def respond(driver, call_index: int, things) -> None:
+        driver.getThings.call_args_list[call_index][1]["on_finished"](things)
+
+    @staticmethod
+    def ids(service):
+        return [thing.id for thing in service.things.items]
+
+    def test_full_page_prefetches_next_page_with_low_priority(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        assert driver.getThings.call_count == 2
+        prefetch_call = driver.getThings.call_args_list[1][1]
+        assert prefetch_call["page"] == 2
+        assert prefetch_call["priority"] == QNetworkRequest.LowPriority
+
+    def test_partial_page_does_not_prefetch(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1, count=3))
+        assert driver.getThings.call_count == 1
+
+    def test_next_page_is_appended_from_prefetch(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        self.respond(driver, 1, make_things(2))
+        service.nextPage()
+        assert service.currentPage == 2
+        assert service.things.count == 2 * Settings.PER_PAGE
+        assert self.ids(service)[Settings.PER_PAGE] == 200
+        assert not service.isQuerying
+        assert [c[1]["page"] for c in driver.getThings.call_args_list] == [1, 2, 3]
+
+    def test_throttled_state_follows_the_api_clients(self, service):
+        abstract_api_client = sys.modules[service.__module__].AbstractApiClient
+        on_changed = MagicMock()
+        service.throttledStateChanged.connect(on_changed)
+        with patch.object(abstract_api_client, "_throttled_requests", set()):
+            assert not service.isThrottled
+            abstract_api_client._setThrottled(("https://api.com/things", b""), True)
+            assert service.isThrottled
+        on_changed.assert_called_once()
+
+    def test_network_telemetry_is_exported_as_json(self, service, tmp_path):
+        module = sys.modules[service.__module__]
+        telemetry = module.AbstractApiClient.getTelemetry().__class__()
+        with patch.object(module.AbstractApiClient, "_telemetry", telemetry), \
+                patch.object(module.QStandardPaths, "writableLocation", return_value=str(tmp_path)), \
+                patch.object(module, "Logger"):
+            path = service.exportNetworkTelemetry()
+        with open(path) as export_file:
+            assert json.load(export_file) == {"summary": {}, "requests": []}
+        assert path.startswith(str(tmp_path))
+
+    def test_logging_requests_follows_the_setting(self, service):
+        module = sys.modules[service.__module__]
+        telemetry = MagicMock()
+        with patch.object(module.AbstractApiClient, "_telemetry", telemetry), \
+                patch.object(module.PreferencesHelper, "getSnapshot") as get_snapshot:
+            get_snapshot.return_value.configure_mock(log_requests=True, detect_stalls=False, max_parallel_downloads=2,
+                                                     model_store_max_size=1024)
+            service._onSettingChanged(Settings.LOG_REQUESTS_PREFERENCES_KEY)
+        telemetry.setLogging.assert_called_once_with(True)
+
+    def test_stall_detector_follows_the_setting(self, service):
+        module = sys.modules[service.__module__]
+        detector = MagicMock(isRunning=False)
+        service._stall_detector = detector
+        with patch.object(module.PreferencesHelper, "getSnapshot") as get_snapshot:
+            get_snapshot.return_value.configure_mock(detect_stalls=True, max_parallel_downloads=2,
+                                                     model_store_max_size=1024)
+            service._onSettingChanged(Settings.DETECT_STALLS_PREFERENCES_KEY)
+            detector.start.assert_called_once()
+            detector.isRunning = True
+            get_snapshot.return_value.detect_stalls = False
+            service._onSettingChanged(Settings.DETECT_STALLS_PREFERENCES_KEY)
+        detector.stop.assert_called_once()
+        detector.logReport.assert_called_once()
+
+    def test_stall_report_is_updated_on_stalls(self, service):
+        on_changed = MagicMock()
+        service.stallReportChanged.connect(on_changed)
+        with patch.object(sys.modules[service._stall_detector.__module__], "Logger"):
+            service._stall_detector._recordStall(0.3, [("DownloadManager._start", "DownloadManager.py:80")])
+        assert service.stallReport[0]["callback"] == "DownloadManager._start"
+        on_changed.assert_called_once()
+
+    def test_warm_up_connects_active_driver_first(self, service, driver):
+        other_driver = MagicMock(thumbnail_hosts=["cdn.other.com"])
+        driver.thumbnail_hosts = ["cdn.thingiverse.com"]
+        service._drivers = {"thingiverse": service._drivers["thingiverse"],
+                            "other": DriverOption(label="Other", driver=other_driver)}
+        with patch.object(sys.modules[service.__module__], "QTimer") as timer:
+            service.warmUpConnections()
+        driver.warmUp.assert_called_once()
+        other_driver.warmUp.assert_not_called()
+        timer.singleShot.call_args[0][1]()
+        other_driver.warmUp.assert_called_once()
+        assert service.getThumbnailHosts() == ["cdn.thingiverse.com", "cdn.other.com"]
+
+    def test_repeated_query_is_served_from_cache(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1, count=3))
+        service.search("sphere")
+        service.search("cube")
+        assert self.ids(service) == [100, 101, 102]
+        assert driver.getThings.call_count == 2
+
+    def test_things_seen_on_earlier_page_are_skipped(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        self.respond(driver, 1, make_things(1, count=2) + make_things(2, count=3))
+        service.nextPage()
+        assert self.ids(service)[Settings.PER_PAGE:] == [200, 201, 202]
+
+    def test_scrolling_to_the_end_fetches_next_page(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        assert service.things.canFetchMore()
+        service.things.fetchMore()
+        assert service.currentPage == 2
+
+    def test_last_page_stops_fetching(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1, count=3))
+        assert not service.things.canFetchMore()
+
+    def test_failed_next_page_stops_fetching(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        driver.getThings.call_args_list[1][1]["on_failed"]()  # the prefetch fails silently
+        service.nextPage()
+        with patch.object(service, "_showApiResponseError"):
+            driver.getThings.call_args_list[2][1]["on_failed"](None, 500)
+        assert service.currentPage == 1
+        assert not service.things.canFetchMore()
+
+    def test_next_page_waits_for_running_prefetch(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        service.nextPage()
+        assert service.isQuerying
+        assert driver.getThings.call_count == 2
+        self.respond(driver, 1, make_things(2))
+        assert not service.isQuerying
+        assert self.ids(service)[Settings.PER_PAGE] == 200
+
+    def test_new_query_aborts_running_prefetch(self, service, driver):
+        service.search("cube")
+        self.respond(driver, 0, make_things(1))
+        prefetch_request = service._prefetch_request
+        service.search("sphere")
+        prefetch_request.abort.assert_called_once()
+        assert driver.getThings.call_args_list[2][1]["query"] == "search/sphere"
+
+    def test_new_query_aborts_running_query(self, service, driver):
+        service.search("cube")
+        cube_request = service._query_request
+        service.search("sphere")
+        cube_request.abort.assert_called_once()
+
+    def test_late_reply_does_not_overwrite_newer_results(self, service, driver):
+        service.search("cube")
+        service.search("sphere")
+        self.respond(driver, 1, make_things(2, count=3))
+        self.respond(driver, 0, make_things(1, count=3))
+        assert self.ids(service) == [200, 201, 202]
+        assert not service.isQuerying
+
+    def test_late_failure_of_superseded_query_is_ignored(self, service, driver):
+        service.search("cube")
+        service.search("sphere")
+        with patch.object(service, "_showApiResponseError") as show_error:
+            driver.getThings.call_args_list[0][1]["on_failed"](None, 500)
+        show_error.assert_not_called()
+        assert service.isQuerying
+
+    def test_search_shows_local_hits_until_remote_results_arrive(self, service, driver):
+        driver.searchLocal.return_value = [Thing({"id": 7, "name": "Cube"})]
+        service.search("cube")
+        driver.searchLocal.assert_called_once_with("cube")
+        assert self.ids(service) == [7]
+        assert service.isQuerying
+        self.respond(driver, 0, make_things(1, count=3))
+        assert self.ids(service) == [100, 101, 102]
+
+    def test_search_local_waits_for_typing_to_pause(self, service, driver):
+        driver.searchLocal.return_value = [Thing({"id": 7, "name": "Cube"})]
+        for search_term in ("c", "cu", "cub"):
+            service.searchLocal(search_term)
+        driver.searchLocal.assert_not_called()
+        assert service._local_search_timer.isActive()
+        service._onLocalSearchTimeout()
+        driver.searchLocal.assert_called_once_with("cub")
+        assert self.ids(service) == [7]
+
+    def test_search_local_keeps_running_query(self, service, driver):
+        driver.searchLocal.return_value = [Thing({"id": 7, "name": "Cube"})]
+        service.search("sphere")
+        driver.searchLocal.reset_mock()
+        sphere_request = service._query_request
+        service.searchLocal("cu")
+        service._onLocalSearchTimeout()
+        sphere_request.abort.assert_not_called()
+        driver.searchLocal.assert_not_called()
+        assert service.isQuerying
+        self.respond(driver, 0, make_things(1, count=3))
+        assert self.ids(service) == [100, 101, 102]
+
+    def test_clearing_search_text_shows_previous_results(self, service, driver):
+        service.search("sphere")
+        self.respond(driver, 0, make_things(1, count=3))
+        driver.searchLocal.return_value = [Thing({"id": 7, "name": "Cube"})]
+        service.searchLocal("cu")
+        service._onLocalSearchTimeout()
+        assert self.ids(service) == [7]
+        service.searchLocal("")
+        service._onLocalSearchTimeout()
+        assert self.ids(service) == [100, 101, 102]
+
+    def test_thing_details_show_thing_and_supported_files(self, service, driver):
+        service._supported_file_types = ["stl"]
+        details = ThingDetails({"thing": Thing({"id": 1}), "files": [ThingFile({"id": 2, "name": "cube.stl"}),
+                                                                     ThingFile({"id": 3, "name": "readme.txt"})]})
+        driver.getThingDetails.side_effect = lambda thing_id, on_finished, on_failed: on_finished(details)
+        service.showThingDetails(1)
+        assert service.activeThing["id"] == 1
+        assert [thing_file["id"] for thing_file in service.activeThingFiles] == [2]
+
+    def test_hide_thing_details_aborts_details_requests(self, service, driver):
+        service.showThingDetails(1)
+        service.hideThingDetails()
+        driver.getThingDetails.return_value.abort.assert_called_once()
+
+    def test_download_all_thing_files_queues_every_file(self, service, driver):
+        service._thing_files = [ThingFile({"id": 1, "name": "a.stl"}), ThingFile({"id": 2, "name": "b.stl"})]
+        service.downloadAllThingFiles()
+        assert service.downloads.count == 2
+        assert service.isDownloading
+
+    @pytest.fixture
+    def other_driver(self, service):
+        driver = MagicMock()
+        driver.getThingsBySearchQuery.side_effect = lambda search_terms: "other/{}".format(search_terms)
+        driver.getThings.side_effect = lambda **kwargs: MagicMock()
+        driver.searchLocal.return_value = []
+        service._drivers["myminifactory"] = DriverOption(label="MyMiniFactory", driver=driver)
+        return driver
+
+    def test_all_sources_is_listed_with_several_drivers(self, service, other_driver):
+        assert service.drivers[-1] == {"key": Settings.ALL_DRIVERS_KEY, "label": Settings.ALL_DRIVERS_LABEL}
+
+    def test_search_all_sources_queries_every_driver(self, service, driver, other_driver):
+        service._active_driver_name = Settings.ALL_DRIVERS_KEY
+        service.search("cube")
+        assert driver.getThings.call_args[1]["query"] == "search/cube"
+        assert other_driver.getThings.call_args[1]["query"] == "other/cube"
+        self.respond(other_driver, 0, make_things(2, count=2))
+        assert self.ids(service) == [200, 201]
+        assert service.isQuerying
+        self.respond(driver, 0, make_things(1, count=1))
+        assert self.ids(service) == [100, 200, 201]
+        assert not service.isQuerying
+
+    def test_search_all_sources_replaces_local_hits_with_results(self, service, driver, other_driver):
+        service._active_driver_name = Settings.ALL_DRIVERS_KEY
+        driver.searchLocal.return_value = [Thing({"id": 100}), Thing({"id": 999})]
+        other_driver.searchLocal.return_value = [Thing({"id": 200})]
+        service.search("cube")
+        assert self.ids(service) == [100, 200, 999]
+        self.respond(other_driver, 0, make_things(2, count=2))
+        assert self.ids(service) == [200, 201]
+        self.respond(driver, 0, make_things(1, count=2))
+        assert [(thing.source, thing.id) for thing in service.things.items] == [
+            ("thingiverse", 100), ("myminifactory", 200), ("thingiverse", 101), ("myminifactory", 201)]
+
+    def test_search_all_sources_without_results_removes_local_hits(self, service, driver, other_driver):
+        service._active_driver_name = Settings.ALL_DRIVERS_KEY
+        driver.searchLocal.return_value = [Thing({"id": 100})]
+        service.search("cube")
+        self.respond(driver, 0, [])
+        self.respond(other_driver, 0, [])
+        assert self.ids(service) == []
+
+    def test_new_query_aborts_all_sources_query(self, service, driver, other_driver):
+        service._active_driver_name = Settings.ALL_DRIVERS_KEY
+        service.search("cube")
+        request = service._federated_query._requests["thingiverse"]
+        service.search("sphere")
+        request.abort.assert_called_once()
+        self.respond(driver, 0, make_things(1, count=1))
+        assert self.ids(service) == []
+
+    def test_thing_details_use_the_driver_of_the_thing(self, service, driver, other_driver):
+        service._active_driver_name = Settings.ALL_DRIVERS_KEY
+        service.showThingDetails(1, "myminifactory")
+        other_driver.getThingDetails.assert_called_once()
+        driver.getThingDetails.assert_not_called()
+        service._thing_files = [ThingFile({"id": 1, "name": "a.stl"})]
+        with patch.object(service._download_manager, "enqueue") as enqueue:
+            service.downloadAllThingFiles()
+        assert enqueue.call_args[0][0] is other_driver
+
+    def test_authentication_error_of_thing_details_is_shown_for_the_driver_of_the_thing(self, service, driver,
+                                                                                          other_driver):
+        service._active_driver_name = Settings.ALL_DRIVERS_KEY
+        service.showThingDetails(1, "myminifactory")
+        module = sys.modules[service.__module__]
+        with patch.object(module, "QMessageBox") as message_box, \
+                patch.object(service, "clearAuthenticationForDriver") as clear_authentication:
+            other_driver.getThingDetails.call_args[1]["on_failed"](None, 401)
+        clear_authentication.assert_called_once_with("myminifactory")
+        assert "MyMiniFactory" in message_box.return_value.setText.call_args[0][0]
+
+    def test_prefetch_thing_details_is_opt_in(self, service, driver):
+        snapshot = MagicMock(prefetch_details=False)
+        preferences_helper = sys.modules[service.__module__].PreferencesHelper
+        with patch.object(service, "_detail_prefetcher") as prefetcher, \
+                patch.object(preferences_helper, "getSnapshot", return_value=snapshot):
+            service.prefetchThingDetails(1, "", False)
+            prefetcher.prefetch.assert_not_called()
+            snapshot.prefetch_details = True
+            service.prefetchThingDetails(1, "", True)
+        prefetcher.prefetch.assert_called_once_with(driver, 1, True)
+
+    def test_downloaded_archive_is_extracted_and_loaded(self, service, tmp_path):
+        archive_path = str(tmp_path / "thing.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.writestr("cube.stl", b"solid cube")
+            archive.writestr("README.txt", b"hello")
+        service._supported_file_types = ["stl"]
+        module = sys.modules[service.__module__]
+        with patch.object(module, "QThreadPool") as thread_pool, patch.object(service, "_loadFile") as load_file:
+            thread_pool.globalInstance.return_value.start.side_effect = lambda job: job.run()
+            service._onDownloadFinished(archive_path)
+        assert [os.path.basename(c[0][0]) for c in load_file.call_args_list] == ["cube.stl"]
+        assert service._extract_jobs == []
+
+    def test_files_extracted_from_a_stored_archive_count_towards_its_size(self, service):
+        archive_path = service._model_store.createStagingPath("thing.zip")
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.writestr("cube.stl", b"solid cube")
+        with open(archive_path, "rb") as archive_file:
+            content_hash = hashlib.sha256(archive_file.read()).hexdigest()
+        archive_path = service._model_store.add(("thingiverse", 1, "thing.zip"), archive_path, content_hash)
+        archive_size = service._model_store.size
+        service._supported_file_types = ["stl"]
+        module = sys.modules[service.__module__]
+        with patch.object(module, "QThreadPool") as thread_pool, patch.object(service, "_loadFile"):
+            thread_pool.globalInstance.return_value.start.side_effect = lambda job: job.run()
+            service._onDownloadFinished(archive_path)
+        assert service._model_store.size == archive_size + len(b"solid cube")
@@ -0,0 +1,160 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice, QSize
+from PyQt5.QtGui import QImage
+from PyQt5.QtTest import QSignalSpy
+from surrogate import surrogate
+
+
+def make_png(width: int, height: int) -> bytes:
+    image = QImage(width, height, QImage.Format_RGB32)
+    image.fill(0xff0000)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    return bytes(data)
+
+
+def load(provider, image_id: str, height: int) -> QImage:
+    response = provider.requestImageResponse(image_id, QSize(0, height))
+    spy = QSignalSpy(response.finished)
+    assert spy.wait(5000)
+    return response._image
+
+
+class TestThumbnailImageProvider:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def provider_class(self):
+        with patch("UM.Logger.Logger", MagicMock()):
+            from ..ThingiBrowser.ThumbnailImageProvider import ThumbnailImageProvider
+            return ThumbnailImageProvider
+
+    @pytest.fixture
+    def response(self):
+        return MagicMock(status_code=200, content=make_png(400, 300))
+
+    def test_downloads_once_and_stores_downscaled_copy(self, provider_class, response, tmp_path, qt_application):
+        provider = provider_class(str(tmp_path))
+        with patch("requests.Session.get", return_value=response) as get:
+            image = load(provider, "https%3A%2F%2Fcdn.com%2Fthumb.png", 75)
+            load(provider, "https%3A%2F%2Fcdn.com%2Fthumb.png", 75)
+        get.assert_called_once()
+        assert get.call_args[0][0] == "https://cdn.com/thumb.png"
+        assert image.height() == 75
+        assert provider.getThumbnail("https://cdn.com/thumb.png").height() == 150
+        assert len(os.listdir(str(tmp_path))) == 1
+
+    def test_thumbnails_load_in_parallel(self, provider_class, response, tmp_path, qt_application):
+        provider = provider_class(str(tmp_path))
+        all_started = threading.Barrier(3, timeout=5)
+
+        def get(url, timeout):
+            all_started.wait()
+            return response
+
+        with patch("requests.Session.get", side_effect=get):
+            responses = [provider.requestImageResponse("https%3A%2F%2Fcdn.com%2F{}.png".format(index), QSize(0, 75))
+                         for index in range(3)]
+            provider._load_pool.shutdown(wait=True)
+        assert all(not response._image.isNull() for response in responses)
+
+    def test_cancelled_thumbnail_is_not_downloaded(self, provider_class, tmp_path, qt_application):
+        provider = provider_class(str(tmp_path))
+        with patch("requests.Session.get") as get, patch.object(provider._load_pool, "submit") as submit:
+            response = provider.requestImageResponse("https%3A%2F%2Fcdn.com%2Fthumb.png", QSize(0, 75))
+            response.cancel()
+            spy = QSignalSpy(response.finished)
+            provider._load(*submit.call_args[0][1:])
+        get.assert_not_called()
+        assert spy.wait(5000)
+        assert response._image.isNull()
+
+    def test_serves_from_disk_in_new_session(self, provider_class, response, tmp_path):
+        with patch("requests.Session.get", return_value=response):
+            provider_class(str(tmp_path)).getThumbnail("https://cdn.com/thumb.png")
+        with patch("requests.Session.get") as get:
+            image = provider_class(str(tmp_path)).getThumbnail("https://cdn.com/thumb.png")
+        get.assert_not_called()
+        assert image.height() == 150
+
+    def test_failed_download_returns_null_image(self, provider_class, tmp_path, qt_application):
+        provider = provider_class(str(tmp_path))
+        logger = patch.object(sys.modules[provider_class.__module__], "Logger")
+        with logger, patch("requests.Session.get", return_value=MagicMock(status_code=404, content=b"")):
+            image = load(provider, "https%3A%2F%2Fcdn.com%2Fmissing.png", 75)
+        assert image.isNull()
+        assert os.listdir(str(tmp_path)) == []
+
+    def test_disk_cache_is_bounded(self, provider_class, response, tmp_path):
+        provider = provider_class(str(tmp_path), max_disk_size=1, max_memory_items=1)
+        with patch("requests.Session.get", return_value=response):
+            provider.getThumbnail("https://cdn.com/1.png")
+            provider.getThumbnail("https://cdn.com/2.png")
+        assert len(os.listdir(str(tmp_path))) == 0
+
+    def test_rewritten_thumbnail_is_counted_once(self, provider_class, tmp_path):
+        provider = provider_class(str(tmp_path))
+        path = provider._getCachePath("https://cdn.com/thumb.png")
+        image = QImage.fromData(make_png(200, 150), "PNG")
+        provider._writeToDisk(path, image)
+        provider._writeToDisk(path, image)
+        assert os.listdir(str(tmp_path)) == [os.path.basename(path)]
+        assert provider._disk_size == os.path.getsize(path)
+
+    def test_evicted_thumbnail_is_a_cache_miss(self, provider_class, response, tmp_path):
+        provider = provider_class(str(tmp_path))
+        path = provider._getCachePath("https://cdn.com/thumb.png")
+        provider._writeToDisk(path, QImage.fromData(make_png(200, 150), "PNG"))
+        with patch.object(sys.modules[provider_class.__module__].os, "utime", side_effect=FileNotFoundError):
+            assert provider._readFromDisk(path) is None
+
+    def test_slow_download_is_attempted_twice(self, provider_class, response, tmp_path):
+        provider = provider_class(str(tmp_path))
+        first_attempt_released = threading.Event()
+
+        def get(url, timeout):
+            if not first_attempt_released.is_set():
+                first_attempt_released.set()
+                time.sleep(1)
+                return MagicMock(status_code=500, content=b"")
+            return response
+
+        with patch.object(provider._latencies, "getHedgeDelay", return_value=0.01), \
+                patch("requests.Session.get", side_effect=get) as requests_get:
+            image = provider.getThumbnail("https://cdn.com/slow.png")
+        assert not image.isNull()
+        assert requests_get.call_count == 2
+
+    def test_slow_downloads_are_hedged_in_parallel(self, provider_class, response, tmp_path, qt_application):
+        provider = provider_class(str(tmp_path))
+        load_threads = provider._load_pool._max_workers
+        all_attempts_started = threading.Barrier(2 * load_threads, timeout=5)
+
+        def get(url, timeout):
+            all_attempts_started.wait()
+            return response
+
+        with patch.object(provider._latencies, "getHedgeDelay", return_value=0.01), \
+                patch("requests.Session.get", side_effect=get) as requests_get:
+            responses = [provider.requestImageResponse("https%3A%2F%2Fcdn.com%2F{}.png".format(index), QSize(0, 75))
+                         for index in range(load_threads)]
+            provider._load_pool.shutdown(wait=True)
+        assert all(not response._image.isNull() for response in responses)
+        assert requests_get.call_count == 2 * load_threads
+
+    def test_warm_up_connects_to_thumbnail_hosts(self, provider_class, tmp_path):
+        provider = provider_class(str(tmp_path))
+        with patch("requests.Session.head") as head:
+            provider.warmUp(["cdn.com"])
+            provider._download_pool.shutdown(wait=True)
+        assert head.call_args[0][0] == "https://cdn.com/"
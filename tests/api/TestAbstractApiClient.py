@@ -0,0 +1,404 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import json
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch, MagicMock
+
+import pytest
+from PyQt5.QtCore import QCoreApplication, QUrl
+from PyQt5.QtNetwork import QNetworkRequest
+from surrogate import surrogate
+
+
+class ReplyMock:
+    """ Fake QNetworkReply that can be finished from a test. """
+
+    def __init__(self, status_code: Optional[int] = 200, body: bytes = b"", headers: Optional[Dict[bytes, bytes]] = None,
+                 error: int = 0, from_cache: bool = False) -> None:
+        self._callbacks = []  # type: List[Callable[[], None]]
+        self.finished = MagicMock()
+        self.finished.connect.side_effect = self._callbacks.append
+        self.metaDataChanged = MagicMock()
+        self.attribute = MagicMock(side_effect=lambda name: {
+            QNetworkRequest.HttpStatusCodeAttribute: status_code,
+            QNetworkRequest.SourceIsFromCacheAttribute: from_cache,
+        }.get(name))
+        self.rawHeader = MagicMock(side_effect=lambda name: (headers or {}).get(name, b""))
+        self.error = MagicMock(return_value=error)
+        self.readAll = MagicMock()
+        self.readAll.return_value.data.return_value = body
+        self.deleteLater = MagicMock()
+        self.abort = MagicMock(side_effect=self.finish)
+
+    def finish(self) -> None:
+        for callback in self._callbacks:
+            callback()
+
+
+def wait_for_parsing(api_client) -> None:
+    """ Wait until the worker threads parsed all responses and deliver the results on this thread. """
+    api_client._parse_pool.waitForDone()
+    QCoreApplication.processEvents()
+
+
+class TestAbstractApiClient:
+
+    @pytest.fixture(autouse=True)
+    def event_loop(self, qt_application):
+        # Results of the worker threads are delivered through the event loop.
+        return qt_application
+
+    @pytest.fixture
+    @surrogate("cura.CuraApplication.CuraApplication")
+    @surrogate("UM.Logger.Logger")
+    @surrogate("UM.Signal.Signal")
+    def api_client(self, application):
+        with patch("cura.CuraApplication.CuraApplication", application):
+            from ...ThingiBrowser.drivers.thingiverse.ThingiverseApiClient import ThingiverseApiClient
+            return ThingiverseApiClient()
+
+    @pytest.fixture
+    def manager(self, api_client):
+        abstract_api_client = api_client.__class__.__bases__[0]
+        with patch.object(abstract_api_client, "_manager") as manager, \
+                patch.dict(abstract_api_client._in_flight, clear=True), \
+                patch.dict(abstract_api_client._request_handlers, clear=True), \
+                patch.dict(abstract_api_client._rate_limiters, clear=True), \
+                patch.dict(abstract_api_client._request_records, clear=True), \
+                patch.object(abstract_api_client, "_telemetry", abstract_api_client._telemetry.__class__()):
+            manager.get.side_effect = lambda request: ReplyMock(body=json.dumps({"id": 1, "name": "Cube"}).encode())
+            yield manager
+
+    @pytest.fixture
+    def thing_index(self, api_client):
+        abstract_api_client = api_client.__class__.__bases__[0]
+        thing_index_class = sys.modules[abstract_api_client.__module__].ThingIndex
+        with patch.object(abstract_api_client, "_thing_index", thing_index_class(":memory:")) as thing_index:
+            yield thing_index
+
+    @pytest.fixture
+    def details_cache(self, api_client):
+        abstract_api_client = api_client.__class__.__bases__[0]
+        cache_class = sys.modules[abstract_api_client.__module__].LruCache
+        with patch.object(abstract_api_client, "_details_cache", cache_class(10, ttl=60)) as details_cache:
+            yield details_cache
+
+    @pytest.fixture
+    def details_replies(self, manager):
+        replies = []
+
+        def get(request):
+            body = [{"id": 2, "name": "cube.stl"}] if request.url().path().endswith("/files") else {"id": 1}
+            replies.append(ReplyMock(body=json.dumps(body).encode()))
+            return replies[-1]
+
+        manager.get.side_effect = get
+        return replies
+
+    def test_thing_details_combine_thing_and_files(self, api_client, details_replies, details_cache, thing_index):
+        on_details = MagicMock()
+        handle = api_client.getThingDetails(1, on_details)
+        assert len(details_replies) == 2
+        for reply in details_replies:
+            reply.finish()
+        wait_for_parsing(api_client)
+        details = on_details.call_args[0][0]
+        assert details.thing.id == 1
+        assert [thing_file.name for thing_file in details.files] == ["cube.stl"]
+        assert not handle.isRunning
+
+    def test_recent_thing_details_are_served_from_memory(self, api_client, details_replies, details_cache,
+                                                         thing_index):
+        api_client.getThingDetails(1, MagicMock())
+        for reply in details_replies:
+            reply.finish()
+        wait_for_parsing(api_client)
+        on_details = MagicMock()
+        handle = api_client.getThingDetails(1, on_details)
+        assert len(details_replies) == 2
+        assert on_details.call_args[0][0].thing.id == 1
+        assert not handle.isRunning
+
+    def test_aborting_thing_details_aborts_both_requests(self, api_client, details_replies, details_cache):
+        on_details = MagicMock()
+        api_client.getThingDetails(1, on_details).abort()
+        assert all(reply.abort.called for reply in details_replies)
+        on_details.assert_not_called()
+
+    def test_parsed_things_are_added_to_local_index(self, api_client, manager, thing_index):
+        on_thing = MagicMock()
+        api_client.getThing(1, on_thing).reply.finish()
+        wait_for_parsing(api_client)
+        assert on_thing.call_args[0][0].name == "Cube"
+        assert [thing.id for thing in api_client.searchLocal("cu")] == [1]
+
+    def test_identical_requests_share_one_reply(self, api_client, manager):
+        on_thing, on_files = MagicMock(), MagicMock()
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_thing,
+                                 parser=api_client._parseGetThing)
+        shared_handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_files)
+        assert handle.reply is shared_handle.reply
+        assert manager.get.call_count == 1
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        assert not handle.isRunning
+        assert on_thing.call_args[0][0].name == "Cube"
+        on_files.assert_called_once_with({"id": 1, "name": "Cube"})
+
+    def test_finished_request_is_not_shared(self, api_client, manager):
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock()).reply.finish()
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock())
+        assert manager.get.call_count == 2
+
+    def test_different_urls_are_not_shared(self, api_client, manager):
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock())
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/2"), MagicMock())
+        assert manager.get.call_count == 2
+
+    def test_failed_request_calls_on_failed(self, api_client, manager):
+        manager.get.side_effect = lambda request: ReplyMock(status_code=404, body=b'{"error": "Not found"}')
+        on_finished, on_failed = MagicMock(), MagicMock()
+        with patch.object(sys.modules[api_client.__class__.__bases__[0].__module__], "Logger"):
+            api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_finished,
+                            on_failed).reply.finish()
+            wait_for_parsing(api_client)
+        on_finished.assert_not_called()
+        assert on_failed.call_args[0][0].error == "Not found"
+        assert on_failed.call_args[0][1] == 404
+
+    def test_aborting_shared_request_only_drops_that_caller(self, api_client, manager):
+        on_aborted, on_kept = MagicMock(), MagicMock()
+        aborted_handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_aborted)
+        kept_handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_kept)
+        aborted_handle.abort()
+        assert aborted_handle.isAborted
+        kept_handle.reply.abort.assert_not_called()
+        kept_handle.reply.finish()
+        wait_for_parsing(api_client)
+        on_aborted.assert_not_called()
+        on_kept.assert_called_once_with({"id": 1, "name": "Cube"})
+
+    def test_aborting_last_caller_aborts_reply(self, api_client, manager):
+        on_finished, on_failed = MagicMock(), MagicMock()
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_finished, on_failed)
+        handle.abort()
+        handle.reply.abort.assert_called_once()
+        on_finished.assert_not_called()
+        on_failed.assert_not_called()
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock())
+        assert manager.get.call_count == 2
+
+    def test_abort_after_finish_does_nothing(self, api_client, manager):
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock())
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        handle.abort()
+        handle.reply.abort.assert_not_called()
+        assert not handle.isAborted
+
+    def test_handle_aborted_while_parsing_is_skipped(self, api_client, manager):
+        on_finished = MagicMock()
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_finished)
+        handle.reply.finish()
+        handle.abort()
+        wait_for_parsing(api_client)
+        on_finished.assert_not_called()
+
+    def test_callbacks_run_on_the_gui_thread(self, api_client, manager):
+        threads = []
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"),
+                                 lambda _: threads.append(threading.current_thread()))
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        assert threads == [threading.main_thread()]
+
+    @pytest.fixture
+    def retry_replies(self, api_client, manager):
+        """ Replies that are returned in order, with retries without delay. """
+        replies = []
+        manager.get.side_effect = lambda request: replies.pop(0)
+        with patch.object(sys.modules[api_client.__class__.__bases__[0].__module__], "Logger"), \
+                patch("random.uniform", return_value=0):
+            yield replies
+
+    def test_busy_api_is_retried(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=500), ReplyMock(body=b'{"id": 1}')])
+        on_finished, on_failed = MagicMock(), MagicMock()
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_finished, on_failed)
+        handle.reply.finish()
+        QCoreApplication.processEvents()
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        assert manager.get.call_count == 2
+        on_finished.assert_called_once_with({"id": 1})
+        on_failed.assert_not_called()
+
+    def test_network_errors_are_retried(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=None, error=3), ReplyMock(body=b'{"id": 1}')])
+        on_finished = MagicMock()
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_finished)
+        handle.reply.finish()
+        QCoreApplication.processEvents()
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        on_finished.assert_called_once_with({"id": 1})
+
+    def test_retries_stop_after_the_budget(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=503, body=b'{"error": "Busy"}') for _ in range(4)])
+        on_failed = MagicMock()
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock(), on_failed)
+        for _ in range(4):
+            handle.reply.finish()
+            QCoreApplication.processEvents()
+        wait_for_parsing(api_client)
+        assert manager.get.call_count == 4
+        assert on_failed.call_args[0][1] == 503
+
+    def test_client_errors_are_not_retried(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=502, body=b'{"error": "Unauthorized"}')])
+        on_failed = MagicMock()
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock(),
+                        on_failed).reply.finish()
+        wait_for_parsing(api_client)
+        assert manager.get.call_count == 1
+        assert on_failed.call_args[0][1] == 502
+
+    def test_too_many_requests_pauses_the_host(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=429, headers={b"Retry-After": b"30"})])
+        callback = MagicMock()
+        abstract_api_client = api_client.__class__.__bases__[0]
+        with patch.object(abstract_api_client, "_throttled_changed_callbacks", [callback]), \
+                patch.object(abstract_api_client, "_throttled_requests", set()):
+            handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock())
+            handle.reply.finish()
+            assert api_client.isThrottled()
+            other_handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/2"), MagicMock())
+            assert other_handle.reply is None
+            assert manager.get.call_count == 1
+            handle.abort()
+            other_handle.abort()
+            assert not api_client.isThrottled()
+            assert callback.call_count == 2
+
+    def test_retry_after_longer_than_maximum_fails_right_away(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=429, body=b'{"error": "Slow down"}',
+                                        headers={b"Retry-After": b"3600"})])
+        on_failed = MagicMock()
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock(),
+                        on_failed).reply.finish()
+        wait_for_parsing(api_client)
+        assert on_failed.call_args[0][1] == 429
+
+    def test_requests_over_the_rate_limit_wait(self, api_client, manager):
+        settings = sys.modules[api_client.__class__.__bases__[0].__module__].Settings
+        handles = [api_client._get(api_client._createEmptyRequest("https://api.com/things/{}".format(thing_id)),
+                                   MagicMock()) for thing_id in range(settings.API_RATE_LIMIT_BURST + 1)]
+        assert manager.get.call_count == settings.API_RATE_LIMIT_BURST
+        assert handles[-1].reply is None
+        assert not api_client.isThrottled()
+
+    def test_parse_retry_after(self, api_client):
+        assert api_client._parseRetryAfter(b"") is None
+        assert api_client._parseRetryAfter(b"120") == 120
+        assert api_client._parseRetryAfter(b"Wed, 21 Oct 2015 07:28:00 GMT") == 0
+        assert api_client._parseRetryAfter(b"soon") is None
+
+    @pytest.fixture
+    def replies(self, api_client, manager):
+        replies = []
+
+        def get(request):
+            replies.append(ReplyMock(body=b'{"id": 1}'))
+            return replies[-1]
+
+        manager.get.side_effect = get
+        with patch.object(sys.modules[api_client.__class__.__bases__[0].__module__], "Logger"):
+            yield replies
+
+    def test_request_that_misses_its_deadline_fails_with_timeout(self, api_client, replies):
+        module = sys.modules[api_client.__class__.__bases__[0].__module__]
+        on_finished, on_failed = MagicMock(), MagicMock()
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), on_finished, on_failed,
+                        timeout=module.RequestTimeout(first_byte=0, total=30))
+        QCoreApplication.processEvents()
+        replies[0].abort.assert_called_once()
+        on_finished.assert_not_called()
+        assert isinstance(on_failed.call_args[0][0], module.ApiTimeoutError)
+        assert len(replies) == 1
+
+    def test_slow_hedged_request_is_attempted_twice(self, api_client, replies):
+        module = sys.modules[api_client.__class__.__bases__[0].__module__]
+        on_finished = MagicMock()
+        with patch.object(module.LatencyTracker, "getHedgeDelay", return_value=0):
+            handle = api_client._get(api_client._createEmptyRequest("https://api.com/things"), on_finished, hedge=True)
+            QCoreApplication.processEvents()
+        assert len(replies) == 2
+        replies[1].finish()
+        wait_for_parsing(api_client)
+        replies[0].abort.assert_called_once()
+        on_finished.assert_called_once_with({"id": 1})
+        assert not handle.isRunning
+
+    def test_requests_are_not_hedged_by_default(self, api_client, replies):
+        module = sys.modules[api_client.__class__.__bases__[0].__module__]
+        with patch.object(module.LatencyTracker, "getHedgeDelay", return_value=0):
+            api_client._get(api_client._createEmptyRequest("https://api.com/things"), MagicMock())
+            QCoreApplication.processEvents()
+        assert len(replies) == 1
+
+    def test_warm_up_connects_to_the_api_host(self, api_client, manager):
+        api_client.warmUp()
+        assert manager.connectToHostEncrypted.call_args[0][:2] == ("api.thingiverse.com", 443)
+        assert b"h2" in manager.connectToHostEncrypted.call_args[0][2].allowedNextProtocols()
+
+    def test_warm_up_supports_qt_before_5_13(self, api_client, manager):
+        module = sys.modules[api_client.__class__.__bases__[0].__module__]
+        with patch.object(module, "QT_VERSION", 0x050C08):
+            api_client.warmUp()
+        manager.connectToHostEncrypted.assert_called_once_with("api.thingiverse.com", 443)
+
+    def test_requests_allow_http2(self, api_client):
+        request = api_client._createEmptyRequest("https://api.com/things")
+        assert request.attribute(QNetworkRequest.Http2AllowedAttribute)
+
+    def test_finished_request_is_added_to_the_telemetry(self, api_client, manager):
+        manager.get.side_effect = lambda request: ReplyMock(body=b'{"id": 1}', from_cache=True)
+        handle = api_client.getThing(1, MagicMock())
+        api_client.getThing(1, MagicMock())
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        records = api_client.getTelemetry().records
+        assert len(records) == 1
+        assert (records[0].driver, records[0].endpoint) == ("thingiverse", "/things/{}")
+        assert records[0].bytes_received == 9
+        assert records[0].from_cache
+        assert records[0].callers == 2
+        assert records[0].queue_time is not None and records[0].parse_time is not None
+        assert records[0].total_time >= records[0].queue_time
+
+    def test_retried_request_is_added_to_the_telemetry_once(self, api_client, manager, retry_replies):
+        retry_replies.extend([ReplyMock(status_code=500), ReplyMock(body=b'{"id": 1}')])
+        handle = api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock())
+        handle.reply.finish()
+        QCoreApplication.processEvents()
+        handle.reply.finish()
+        wait_for_parsing(api_client)
+        assert [(record.status_code, record.retries) for record in api_client.getTelemetry().records] == [(200, 1)]
+
+    def test_timed_out_request_is_added_to_the_telemetry(self, api_client, replies):
+        module = sys.modules[api_client.__class__.__bases__[0].__module__]
+        api_client._get(api_client._createEmptyRequest("https://api.com/things/1"), MagicMock(), MagicMock(),
+                        timeout=module.RequestTimeout(first_byte=0, total=30))
+        QCoreApplication.processEvents()
+        assert [record.error for record in api_client.getTelemetry().records] == ["timeout"]
+
+    def test_aborted_request_is_added_to_the_telemetry(self, api_client, manager):
+        api_client.getThing(1, MagicMock()).abort()
+        assert [record.error for record in api_client.getTelemetry().records] == ["aborted"]
+
+    def test_endpoint_leaves_out_identifiers_and_query(self, api_client):
+        assert api_client._getEndpoint(QUrl("https://api.thingiverse.com/things/1/files")) == "/things/{}/files"
+        assert api_client._getEndpoint(QUrl("https://api.thingiverse.com/search/cube?page=2")) == "/search/{}"
+        assert api_client._getEndpoint(QUrl("https://api.thingiverse.com/popular")) == "/popular"
@@ -0,0 +1,138 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import json
+import sys
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+import requests
+from surrogate import surrogate
+
+
+class TestAnalyticsQueue:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def analytics_queue_class(self):
+        from ...ThingiBrowser.api.AnalyticsQueue import AnalyticsQueue
+        return AnalyticsQueue
+
+    @pytest.fixture
+    def post(self, analytics_queue_class):
+        module = sys.modules[analytics_queue_class.__module__]
+        sent = threading.Event()
+        post = MagicMock(return_value=MagicMock(status_code=200))
+        post.side_effect = lambda *args, **kwargs: sent.set() or post.return_value
+        post.sent = sent
+        with patch.object(module, "Logger"), patch.object(module.requests, "post", post):
+            yield post
+
+    def test_sends_full_batch(self, analytics_queue_class, post, tmp_path):
+        queue = analytics_queue_class(str(tmp_path / "analytics.json"), "Cura/4.6", batch_size=2, flush_interval=60)
+        queue.add({"t": "pageview", "dp": "search"})
+        queue.add({"t": "event", "ec": "search", "ea": "query"})
+        assert post.sent.wait(5)
+        queue.stop()
+        lines = post.call_args[1]["data"].split("\n")
+        assert len(lines) == 2
+        assert lines[0].startswith("t=pageview&dp=search&qt=")
+        assert post.call_args[1]["headers"] == {"User-Agent": "Cura/4.6"}
+
+    def test_stores_unsent_hits_on_stop(self, analytics_queue_class, post, tmp_path):
+        storage_path = tmp_path / "analytics.json"
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=20, flush_interval=60)
+        queue.add({"t": "pageview", "dp": "search"})
+        queue.stop()
+        post.assert_not_called()
+        stored_hits = json.loads(storage_path.read_text())
+        assert [hit["dp"] for hit in stored_hits] == ["search"]
+
+    def test_sends_stored_hits_after_restart(self, analytics_queue_class, post, tmp_path):
+        storage_path = tmp_path / "analytics.json"
+        storage_path.write_text(json.dumps([{"t": "pageview", "dp": "old", "_time": 0}]))
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=2, flush_interval=60)
+        with patch.object(sys.modules[analytics_queue_class.__module__].time, "time", return_value=1):
+            queue.add({"t": "pageview", "dp": "new"})
+            assert post.sent.wait(5)
+        queue.stop()
+        lines = post.call_args[1]["data"].split("\n")
+        assert lines == ["t=pageview&dp=old&qt=1000", "t=pageview&dp=new&qt=0"]
+        assert not storage_path.exists()
+
+    def test_keeps_hits_when_network_fails(self, analytics_queue_class, post, tmp_path):
+        storage_path = tmp_path / "analytics.json"
+
+        def offline_post(*args, **kwargs):
+            post.sent.set()
+            raise requests.ConnectionError()
+
+        post.side_effect = offline_post
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=1, flush_interval=60)
+        queue.add({"t": "pageview", "dp": "search"})
+        assert post.sent.wait(5)
+        queue.stop()
+        assert [hit["dp"] for hit in json.loads(storage_path.read_text())] == ["search"]
+
+    def test_drops_oldest_hits_above_maximum(self, analytics_queue_class, post, tmp_path):
+        storage_path = tmp_path / "analytics.json"
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=20, flush_interval=60, max_hits=2)
+        for screen in ("a", "b", "c"):
+            queue.add({"t": "pageview", "dp": screen})
+        queue.stop()
+        assert [hit["dp"] for hit in json.loads(storage_path.read_text())] == ["b", "c"]
+
+    def test_failed_batch_keeps_newest_hits_above_maximum(self, analytics_queue_class, post, tmp_path):
+        storage_path = tmp_path / "analytics.json"
+        release = threading.Event()
+
+        def offline_post(*args, **kwargs):
+            post.sent.set()
+            release.wait(5)
+            raise requests.ConnectionError()
+
+        post.side_effect = offline_post
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=2, flush_interval=60, max_hits=3)
+        queue.add({"t": "pageview", "dp": "a"})
+        queue.add({"t": "pageview", "dp": "b"})
+        assert post.sent.wait(5)
+        queue.add({"t": "pageview", "dp": "c"})
+        queue.add({"t": "pageview", "dp": "d"})
+        release.set()
+        queue.stop()
+        assert [hit["dp"] for hit in json.loads(storage_path.read_text())] == ["b", "c", "d"]
+
+    def test_sends_stored_hits_on_start(self, analytics_queue_class, post, tmp_path):
+        storage_path = tmp_path / "analytics.json"
+        storage_path.write_text(json.dumps([{"t": "pageview", "dp": "old", "_time": time.time()}]))
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=2, flush_interval=0.05)
+        queue.start()
+        assert post.sent.wait(5)
+        queue.stop()
+        assert post.call_args[1]["data"].startswith("t=pageview&dp=old&qt=")
+        assert not storage_path.exists()
+
+    @pytest.mark.parametrize("is_sent, stored", [(True, None), (False, ["search"])])
+    def test_stop_does_not_wait_for_the_running_batch(self, analytics_queue_class, post, tmp_path, is_sent, stored):
+        storage_path = tmp_path / "analytics.json"
+        release = threading.Event()
+
+        def slow_post(*args, **kwargs):
+            post.sent.set()
+            release.wait(5)
+            if not is_sent:
+                raise requests.ConnectionError()
+            return post.return_value
+
+        post.side_effect = slow_post
+        queue = analytics_queue_class(str(storage_path), "Cura/4.6", batch_size=1, flush_interval=60)
+        queue.add({"t": "pageview", "dp": "search"})
+        assert post.sent.wait(5)
+        queue.stop(timeout=0.05)
+        # The batch is stored while it is being sent, and only removed from storage once it was sent.
+        assert [hit["dp"] for hit in json.loads(storage_path.read_text())] == ["search"]
+        release.set()
+        queue._thread.join(5)
+        assert ([hit["dp"] for hit in json.loads(storage_path.read_text())] if storage_path.exists() else None) \
+            == stored
@@ -0,0 +1,75 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import pytest
+from PyQt5.QtCore import QUrl, QDateTime
+from PyQt5.QtNetwork import QNetworkCacheMetaData
+
+from ...ThingiBrowser.api.ApiResponseCache import ApiResponseCache
+
+
+def make_meta_data(url: str, cache_control: bytes = b"max-age=0, private") -> QNetworkCacheMetaData:
+    meta_data = QNetworkCacheMetaData()
+    meta_data.setUrl(QUrl(url))
+    meta_data.setSaveToDisk(True)
+    meta_data.setRawHeaders([(b"Cache-Control", cache_control), (b"ETag", b"\"abc\"")])
+    return meta_data
+
+
+def store(cache: ApiResponseCache, url: str, body: bytes) -> None:
+    device = cache.prepare(make_meta_data(url))
+    device.write(body)
+    cache.insert(device)
+
+
+class TestApiResponseCache:
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ApiResponseCache(str(tmp_path), 10 * 1024)
+
+    def test_stores_and_returns_response(self, cache):
+        store(cache, "https://api.com/things", b"[]")
+        assert cache.data(QUrl("https://api.com/things")).readAll() == b"[]"
+
+    def test_time_to_live_sets_expiration_and_keeps_validators(self, cache):
+        url = "https://api.com/things"
+        cache.setTimeToLive(QUrl(url), 300)
+        store(cache, url, b"[]")
+        meta_data = cache.metaData(QUrl(url))
+        assert meta_data.expirationDate() > QDateTime.currentDateTimeUtc().addSecs(290)
+        headers = {bytes(name): bytes(value) for name, value in meta_data.rawHeaders()}
+        assert headers[b"Cache-Control"] == b"private"
+        assert headers[b"ETag"] == b"\"abc\""
+
+    def test_without_time_to_live_server_headers_are_kept(self, cache):
+        url = "https://api.com/things"
+        store(cache, url, b"[]")
+        headers = {bytes(name): bytes(value) for name, value in cache.metaData(QUrl(url)).rawHeaders()}
+        assert headers[b"Cache-Control"] == b"max-age=0, private"
+
+    def test_expire_evicts_least_recently_used(self, cache):
+        body = b"x" * 3 * 1024
+        for index in range(3):
+            store(cache, "https://api.com/things/{}".format(index), body)
+        cache.data(QUrl("https://api.com/things/0"))  # most recently used now
+        store(cache, "https://api.com/things/3", body)
+        store(cache, "https://api.com/things/4", body)  # Qt expires before storing, so this triggers the eviction
+        assert cache.metaData(QUrl("https://api.com/things/0")).isValid()
+        assert cache.metaData(QUrl("https://api.com/things/3")).isValid()
+        assert not cache.metaData(QUrl("https://api.com/things/1")).isValid()
+
+    def test_bookkeeping_of_removed_and_evicted_entries_is_dropped(self, cache):
+        body = b"x" * 3 * 1024
+        for index in range(5):
+            store(cache, "https://api.com/things/{}".format(index), body)
+        assert "https://api.com/things/0" not in cache._last_access
+        cache.setTimeToLive(QUrl("https://api.com/things/4"), 300)
+        cache.remove(QUrl("https://api.com/things/4"))
+        assert "https://api.com/things/4" not in cache._last_access
+        assert "https://api.com/things/4" not in cache._time_to_live
+
+    def test_time_to_lives_of_responses_that_never_arrive_are_capped(self, cache):
+        for index in range(cache._MAX_PENDING_TIME_TO_LIVES + 10):
+            cache.setTimeToLive(QUrl("https://api.com/things/{}".format(index)), 300)
+        assert len(cache._time_to_live) == cache._MAX_PENDING_TIME_TO_LIVES
+        assert "https://api.com/things/0" not in cache._time_to_live
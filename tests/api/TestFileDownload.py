@@ -0,0 +1,88 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import hashlib
+import os
+import sys
+from typing import Callable, Dict, List
+from unittest.mock import patch, MagicMock
+
+import pytest
+from surrogate import surrogate
+
+
+class StreamingReplyMock:
+    """ Fake QNetworkReply that receives its body in chunks. """
+
+    def __init__(self, status_code: int = 200) -> None:
+        self._slots = {}  # type: Dict[str, List[Callable]]
+        for signal_name in ("readyRead", "downloadProgress", "finished"):
+            signal = MagicMock()
+            signal.connect.side_effect = self._slots.setdefault(signal_name, []).append
+            setattr(self, signal_name, signal)
+        self.attribute = MagicMock(return_value=status_code)
+        self.deleteLater = MagicMock()
+        self.abort = MagicMock(side_effect=self.finish)
+        self._buffer = b""
+
+    def receive(self, chunk: bytes, bytes_total: int = -1) -> None:
+        self._buffer += chunk
+        self._emit("readyRead")
+        self._emit("downloadProgress", len(chunk), bytes_total)
+
+    def readAll(self) -> MagicMock:
+        data, self._buffer = self._buffer, b""
+        return MagicMock(data=MagicMock(return_value=data))
+
+    def finish(self) -> None:
+        self._emit("finished")
+
+    def _emit(self, signal_name: str, *args) -> None:
+        for slot in self._slots.get(signal_name, []):
+            slot(*args)
+
+
+class TestFileDownload:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def file_download_class(self):
+        from ...ThingiBrowser.api.FileDownload import FileDownload
+        return FileDownload
+
+    @pytest.fixture
+    def download_class(self, file_download_class):
+        with patch.object(sys.modules[file_download_class.__module__], "Logger"):
+            yield file_download_class
+
+    def test_streams_chunks_to_file(self, download_class, tmp_path):
+        reply, on_finished, on_progress = StreamingReplyMock(), MagicMock(), MagicMock()
+        file_path = str(tmp_path / "cube.stl")
+        download_class(reply, file_path, on_finished, on_progress=on_progress)
+        reply.receive(b"solid ", bytes_total=11)
+        reply.receive(b"cube", bytes_total=11)
+        reply.finish()
+        with open(file_path, "rb") as downloaded_file:
+            assert downloaded_file.read() == b"solid cube"
+        on_finished.assert_called_once_with(file_path, hashlib.sha256(b"solid cube").hexdigest())
+        on_progress.assert_called_with(4, 11)
+
+    def test_error_response_is_not_written(self, download_class, tmp_path):
+        reply, on_finished, on_failed = StreamingReplyMock(status_code=404), MagicMock(), MagicMock()
+        file_path = str(tmp_path / "cube.stl")
+        download_class(reply, file_path, on_finished, on_failed)
+        reply.receive(b'{"error": "Not found"}')
+        reply.finish()
+        assert not os.path.exists(file_path)
+        on_finished.assert_not_called()
+        assert on_failed.call_args[0][0].error == "Not found"
+        assert on_failed.call_args[0][1] == 404
+
+    def test_abort_removes_partial_file(self, download_class, tmp_path):
+        reply, on_finished, on_failed = StreamingReplyMock(), MagicMock(), MagicMock()
+        file_path = str(tmp_path / "cube.stl")
+        download = download_class(reply, file_path, on_finished, on_failed)
+        reply.receive(b"solid ")
+        download.abort()
+        assert not os.path.exists(file_path)
+        on_finished.assert_not_called()
+        on_failed.assert_not_called()
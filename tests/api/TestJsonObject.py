@@ -1,19 +1,37 @@
 # Copyright (c) 2020.
 # ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import pytest
+
 from ...ThingiBrowser.api.JsonObject import JsonObject, Thing, ApiError, Collection, ThingFile
 
 
 class TestJsonObject:
 
-    def test_JsonObject_consumes_dict(self):
+    def test_JsonObject_ignores_unknown_keys(self):
         json_object = JsonObject({"key": "value"})
         assert json_object.type == "JsonObject"
-        assert json_object.toStruct() == {"key": "value", "type": "JsonObject"}
+        assert json_object.toStruct() == {"type": "JsonObject"}
+
+    def test_JsonObject_is_immutable(self):
+        thing = Thing({"id": 1, "name": "Just a Thing"})
+        with pytest.raises(AttributeError):
+            thing.name = "Another Thing"
+        with pytest.raises(AttributeError):
+            thing.color = "red"
+
+    def test_toStruct_returns_a_copy(self):
+        thing = Thing({"id": 1, "name": "Just a Thing", "likes": 5})
+        struct = thing.toStruct()
+        assert struct == {"id": 1, "name": "Just a Thing", "thumbnail": None, "url": None, "description": None,
+                          "source": None, "type": "Thing"}
+        struct["name"] = "Another Thing"
+        assert thing.toStruct()["name"] == "Just a Thing"
 
     def test_ApiError(self):
-        error = ApiError({"error": "Something horrible has happened"})
+        error = ApiError({"error": "Something horrible has happened", "code": 500})
         assert error.type == "ApiError"
         assert error.error == "Something horrible has happened"
+        assert error.response == {"error": "Something horrible has happened", "code": 500}
 
     def test_Collection(self):
         collection = Collection({
@@ -0,0 +1,35 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import sys
+from unittest.mock import patch, MagicMock
+
+import pytest
+from surrogate import surrogate
+
+
+def broken_parser(status_code: int, body: bytes):
+    raise KeyError("id")
+
+
+class TestParseJob:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def parse_job_class(self):
+        from ...ThingiBrowser.api.ParseJob import ParseJob
+        return ParseJob
+
+    def test_runs_every_parser(self, parse_job_class):
+        job = parse_job_class(200, b'{"id": 1}', [None, lambda status_code, body: (status_code, len(body))])
+        on_finished = MagicMock()
+        job.signals.finished.connect(on_finished)
+        job.run()
+        on_finished.assert_called_once_with([(200, {"id": 1}), (200, 9)])
+
+    def test_parser_exception_results_in_empty_response(self, parse_job_class):
+        job = parse_job_class(200, b'{"id": 1}', [broken_parser])
+        on_finished = MagicMock()
+        job.signals.finished.connect(on_finished)
+        with patch.object(sys.modules[parse_job_class.__module__], "Logger"):
+            job.run()
+        on_finished.assert_called_once_with([(200, None)])
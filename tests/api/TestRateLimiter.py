@@ -0,0 +1,37 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from unittest.mock import patch
+
+from ...ThingiBrowser.api.RateLimiter import RateLimiter
+
+
+class TestRateLimiter:
+
+    def test_burst_starts_right_away(self):
+        with patch("time.monotonic", return_value=100):
+            rate_limiter = RateLimiter(rate=2, burst=3)
+            assert [rate_limiter.reserve() for _ in range(3)] == [0, 0, 0]
+
+    def test_requests_over_the_burst_wait_one_after_another(self):
+        with patch("time.monotonic", return_value=100):
+            rate_limiter = RateLimiter(rate=2, burst=1)
+            assert [rate_limiter.reserve() for _ in range(3)] == [0, 0.5, 1]
+
+    def test_tokens_refill_over_time(self):
+        with patch("time.monotonic", return_value=100):
+            rate_limiter = RateLimiter(rate=2, burst=2)
+            rate_limiter.reserve()
+            rate_limiter.reserve()
+        with patch("time.monotonic", return_value=100.5):
+            assert rate_limiter.reserve() == 0
+            assert rate_limiter.reserve() == 0.5
+
+    def test_pause_delays_all_requests(self):
+        with patch("time.monotonic", return_value=100):
+            rate_limiter = RateLimiter(rate=2, burst=2)
+            rate_limiter.pause(10)
+            assert rate_limiter.isPaused
+            assert rate_limiter.reserve() == 10
+        with patch("time.monotonic", return_value=111):
+            assert not rate_limiter.isPaused
+            assert rate_limiter.reserve() == 0
@@ -0,0 +1,75 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import json
+from unittest.mock import patch, MagicMock
+
+import pytest
+from surrogate import surrogate
+
+
+class TestRequestTelemetry:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def module(self):
+        from ...ThingiBrowser.api import RequestTelemetry
+        return RequestTelemetry
+
+    def test_summary_has_percentiles_per_endpoint(self, module):
+        telemetry = module.RequestTelemetry(max_records=200)
+        for index in range(100):
+            record = module.RequestRecord("thingiverse", "/things/{}")
+            with patch.object(record, "getElapsedTime", return_value=(index + 1) / 1000):
+                telemetry.add(record)
+        telemetry.add(module.RequestRecord("myminifactory", "/search"))
+        summary = telemetry.getSummary()
+        assert set(summary) == {"thingiverse /things/{}", "myminifactory /search"}
+        assert summary["thingiverse /things/{}"]["count"] == 100
+        assert summary["thingiverse /things/{}"]["total_ms"] == {"p50": 51.0, "p95": 96.0, "p99": 100.0}
+        assert summary["thingiverse /things/{}"]["first_byte_ms"] is None
+
+    def test_failed_requests_are_counted_but_not_timed(self, module):
+        telemetry = module.RequestTelemetry()
+        record = module.RequestRecord("thingiverse", "/things/{}")
+        record.first_byte_time = 5
+        telemetry.add(record, error="timeout")
+        telemetry.add(module.RequestRecord("thingiverse", "/things/{}"))
+        failed = module.RequestRecord("thingiverse", "/things/{}")
+        failed.status_code = 404
+        telemetry.add(failed)
+        summary = telemetry.getSummary()["thingiverse /things/{}"]
+        assert summary["count"] == 3
+        assert summary["errors"] == 2
+        assert summary["first_byte_ms"] is None
+
+    def test_oldest_requests_are_dropped(self, module):
+        telemetry = module.RequestTelemetry(max_records=2)
+        for endpoint in ("/popular", "/featured", "/newest"):
+            telemetry.add(module.RequestRecord("thingiverse", endpoint))
+        assert [record.endpoint for record in telemetry.records] == ["/featured", "/newest"]
+
+    def test_requests_are_logged_when_enabled(self, module):
+        telemetry = module.RequestTelemetry()
+        with patch.object(module, "Logger") as logger:
+            telemetry.add(module.RequestRecord("thingiverse", "/popular"))
+            logger.log.assert_not_called()
+            telemetry.setLogging(True)
+            telemetry.add(module.RequestRecord("thingiverse", "/popular"))
+        assert json.loads(logger.log.call_args[0][2])["endpoint"] == "/popular"
+
+    def test_callbacks_are_called_for_every_request(self, module):
+        telemetry = module.RequestTelemetry()
+        callback = MagicMock()
+        telemetry.addCallback(callback)
+        telemetry.add(module.RequestRecord("thingiverse", "/popular"))
+        callback.assert_called_once()
+
+    def test_export_has_summary_and_requests(self, module):
+        telemetry = module.RequestTelemetry()
+        record = module.RequestRecord("thingiverse", "/popular")
+        record.bytes_received = 1024
+        record.from_cache = True
+        telemetry.add(record)
+        export = json.loads(telemetry.toJson())
+        assert export["requests"][0]["bytes"] == 1024
+        assert export["summary"]["thingiverse /popular"]["cache_hits"] == 1
@@ -0,0 +1,58 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import pytest
+from surrogate import surrogate
+
+from ...ThingiBrowser.api.JsonObject import Thing, Collection
+
+
+class TestThingIndex:
+
+    @pytest.fixture
+    @surrogate("UM.Logger.Logger")
+    def thing_index_class(self):
+        from ...ThingiBrowser.api.ThingIndex import ThingIndex
+        return ThingIndex
+
+    @pytest.fixture
+    def index(self, thing_index_class):
+        index = thing_index_class(":memory:", max_items=10)
+        index.addItems("thingiverse", [
+            Thing({"id": 1, "name": "Calibration cube", "description": "<p>A <strong>20mm</strong> cube</p>"}),
+            Thing({"id": 2, "name": "Benchy", "description": "Boat to test your printer with"}),
+            Collection({"id": 3, "name": "Test prints", "url": "https://www.thingiverse.com/collections/3"}),
+        ])
+        index.addItems("myminifactory", [Thing({"id": 1, "name": "Dragon cube"})])
+        yield index
+        index.close()
+
+    def test_matches_word_prefixes(self, index):
+        results = index.search("calib", "thingiverse")
+        assert [(result.type, result.id, result.name) for result in results] == [("Thing", 1, "Calibration cube")]
+
+    def test_ranks_name_matches_first(self, index):
+        results = index.search("test", "thingiverse")
+        assert [result.id for result in results] == [3, 2]
+        assert results[0].type == "Collection"
+        assert results[0].url == "https://www.thingiverse.com/collections/3"
+
+    def test_searches_only_given_driver(self, index):
+        assert [result.name for result in index.search("cube", "myminifactory")] == ["Dragon cube"]
+
+    def test_indexes_description_text_without_html(self, index):
+        assert [result.id for result in index.search("20mm", "thingiverse")] == [1]
+        assert index.search("strong", "thingiverse") == []
+
+    def test_updates_existing_items(self, index):
+        index.addItems("thingiverse", [Thing({"id": 2, "name": "3DBenchy"})])
+        assert index.search("benchy", "thingiverse") == []
+        assert [result.name for result in index.search("3dbenchy", "thingiverse")] == ["3DBenchy"]
+
+    def test_query_syntax_is_not_interpreted(self, index):
+        assert [result.id for result in index.search('"calibration* (', "thingiverse")] == [1]
+        assert index.search("   ", "thingiverse") == []
+
+    def test_evicts_least_recently_seen_items(self, index):
+        index.addItems("thingiverse", [Thing({"id": item_id, "name": "Vase"}) for item_id in range(10, 18)])
+        assert index.search("calibration", "thingiverse") == []
+        assert len(index.search("vase", "thingiverse")) == 8
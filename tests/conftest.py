@@ -1,9 +1,10 @@
 # Copyright (c) 2020.
 # ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
 import os
-from unittest.mock import MagicMock
+from unittest.mock import patch, MagicMock
 
 import pytest
+from PyQt5.QtCore import QCoreApplication, QStandardPaths
 
 
 def mock_preferences_get_value(key: str) -> str:
@@ -56,3 +57,24 @@ def application(preferences, plugin_registry):
     app.getPluginRegistry = MagicMock(return_value=plugin_registry)
     app.createQmlComponent = MagicMock(return_value=object)
     return app
+
+
+@pytest.fixture(scope="session")
+def qt_application():
+    """
+    Qt application instance, needed to deliver signals between threads.
+    :return: The QCoreApplication.
+    """
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_location(tmp_path_factory):
+    """
+    Temporary OS cache location, so the search index, model store, HTTP cache and analytics hits that the plugin
+    keeps there are not written to the cache of the user running the tests.
+    :return: The path of the cache location.
+    """
+    path = str(tmp_path_factory.mktemp("cache"))
+    with patch.object(QStandardPaths, "writableLocation", return_value=path):
+        yield path
@@ -1,5 +1,6 @@
 # Copyright (c) 2020.
 # Thingiverse plugin is released under the terms of the LGPLv3 or higher.
+import json
 from unittest.mock import patch
 
 import pytest
@@ -58,3 +59,9 @@ class TestMyMiniFactoryApiClient:
     def test_getNewestThingsQuery(self, api_client):
         query = api_client.getNewestThingsQuery()
         assert query == "search?sort=date"
+
+    def test_parseGetThingDetails(self, api_client):
+        body = json.dumps({"id": 3, "name": "Cube", "files": {"items": [{"filename": "cube.stl"}]}}).encode()
+        status_code, details = api_client._parseGetThingDetails(200, body)
+        assert details.thing.name == "Cube"
+        assert [(thing_file.id, thing_file.name) for thing_file in details.files] == [(3, "cube.stl")]
@@ -50,3 +50,13 @@ class TestThingiverseApiClient:
     def test_getNewestThingsQuery(self, api_client):
         query = api_client.getNewestThingsQuery()
         assert query == "newest"
+
+    def test_parseGetThings_search_hits(self, api_client):
+        body = b'{"hits": [{"id": 1, "name": "Cube", "thumbnail": "https://cdn.com/1.jpg", "public_url": "url"}]}'
+        status_code, things = api_client._parseGetThings(200, body)
+        assert status_code == 200
+        assert things[0].name == "Cube"
+        assert things[0].url == "url"
+
+    def test_parseGetThings_not_found_is_empty_list(self, api_client):
+        assert api_client._parseGetThings(404, b"{}") == (200, [])
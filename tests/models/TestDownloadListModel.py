@@ -0,0 +1,30 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from unittest.mock import MagicMock
+
+from ...ThingiBrowser.models.DownloadItem import DownloadItem
+from ...ThingiBrowser.models.DownloadListModel import DownloadListModel
+
+
+class TestDownloadListModel:
+
+    def test_model(self):
+        model = DownloadListModel()
+        item = DownloadItem(1, MagicMock(), file_id=10, file_name="cube.stl")
+        model.addItem(item)
+        assert model.count == 1
+        assert model.getItem(1) is item
+        index = model.index(0)
+        assert model.data(index, DownloadListModel.FileNameRole) == "cube.stl"
+        assert model.data(index, DownloadListModel.StatusRole) == DownloadItem.QUEUED
+        assert bytes(model.roleNames()[DownloadListModel.BytesTotalRole]) == b"bytesTotal"
+
+    def test_remove_inactive_items(self):
+        model = DownloadListModel()
+        finished_item = DownloadItem(1, MagicMock(), file_id=10, file_name="cube.stl")
+        finished_item.status = DownloadItem.FINISHED
+        model.addItem(finished_item)
+        model.addItem(DownloadItem(2, MagicMock(), file_id=11, file_name="sphere.stl"))
+        model.removeInactiveItems()
+        assert model.count == 1
+        assert model.getItem(1) is None
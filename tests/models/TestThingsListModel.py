@@ -0,0 +1,72 @@
+# Copyright (c) 2020.
+# ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+from unittest.mock import MagicMock
+
+from PyQt5.QtCore import QCoreApplication
+
+from ...ThingiBrowser.api.JsonObject import Thing, Collection
+from ...ThingiBrowser.models.ThingsListModel import ThingsListModel
+
+
+class TestThingsListModel:
+
+    def test_roles(self):
+        model = ThingsListModel()
+        model.setItems([Thing({"id": 1, "name": "Cube"})])
+        index = model.index(0)
+        assert model.count == 1
+        assert model.data(index, ThingsListModel.NameRole) == "Cube"
+        assert model.data(index, ThingsListModel.TypeRole) == "Thing"
+        assert bytes(model.roleNames()[ThingsListModel.ThumbnailRole]) == b"thumbnail"
+
+    def test_append_skips_duplicates(self):
+        model = ThingsListModel()
+        model.setItems([Thing({"id": 1}), Thing({"id": 2})])
+        model.appendItems([Thing({"id": 2}), Thing({"id": 3}), Collection({"id": 3})])
+        assert [(item.type, item.id) for item in model.items] == [("Thing", 1), ("Thing", 2), ("Thing", 3),
+                                                                   ("Collection", 3)]
+
+    def test_append_only_inserts_new_rows(self):
+        model = ThingsListModel()
+        model.setItems([Thing({"id": 1})])
+        on_inserted = MagicMock()
+        model.rowsInserted.connect(on_inserted)
+        model.appendItems([Thing({"id": 1}), Thing({"id": 2})])
+        assert on_inserted.call_args[0][1:] == (1, 1)
+
+    def test_set_items_resets_duplicates(self):
+        model = ThingsListModel()
+        model.setItems([Thing({"id": 1})])
+        model.setItems([Thing({"id": 1})])
+        assert model.count == 1
+
+    def test_fetch_more(self):
+        fetch_more = MagicMock()
+        model = ThingsListModel(fetch_more=fetch_more)
+        model.setItems([Thing({"id": 1})], has_more=True)
+        model.fetchMore()
+        fetch_more.assert_called_once()
+        model.setHasMore(False)
+        model.fetchMore()
+        fetch_more.assert_called_once()
+
+    def test_page_of_duplicates_fetches_more(self, qt_application):
+        fetch_more = MagicMock()
+        model = ThingsListModel(fetch_more=fetch_more)
+        model.setItems([Thing({"id": 1})], has_more=True)
+        for _ in range(5):
+            model.appendItems([Thing({"id": 1})], has_more=True)
+            QCoreApplication.processEvents()
+        assert fetch_more.call_count == 3
+        model.appendItems([Thing({"id": 2})], has_more=True)
+        model.appendItems([Thing({"id": 2})], has_more=True)
+        QCoreApplication.processEvents()
+        assert fetch_more.call_count == 4
+
+    def test_insert_items_at_row(self):
+        model = ThingsListModel()
+        model.setItems([Thing({"id": 1}), Thing({"id": 3})])
+        model.insertItems(1, [Thing({"id": 2}), Thing({"id": 3})])
+        assert [thing.id for thing in model.items] == [1, 2, 3]
+        assert model.hasItem(Thing({"id": 2}))
+        assert not model.hasItem(Thing({"id": 2, "source": "myminifactory"}))
@@ -0,0 +1,88 @@
+// Copyright (c) 2020.
+// ThingiBrowser plugin is released under the terms of the LGPLv3 or higher.
+import QtQuick 2.7
+import QtQuick.Controls 2.2
+import QtQuick.Layouts 1.3
+import UM 1.1 as UM
+
+ListView
+{
+    id: downloadsList
+    clip: true
+    spacing: 5
+
+    header: RowLayout
+    {
+        width: downloadsList.width
+
+        Label
+        {
+            text: "Downloads"
+            color: UM.Theme.getColor("text")
+            font: UM.Theme.getFont("medium")
+            renderType: Text.NativeRendering
+            Layout.fillWidth: true
+        }
+
+        Button
+        {
+            text: "Clear"
+            visible: !ThingiService.isDownloading
+            onClicked: {
+                ThingiService.clearDownloads()
+            }
+        }
+    }
+
+    delegate: RowLayout
+    {
+        width: downloadsList.width
+        spacing: 10
+
+        // file name
+        Label
+        {
+            text: model.fileName
+            color: UM.Theme.getColor("text")
+            elide: Text.ElideRight
+            renderType: Text.NativeRendering
+            Layout.fillWidth: true
+        }
+
+        // status or progress
+        Label
+        {
+            text: {
+                if (model.status !== "downloading") {
+                    return model.status
+                }
+                if (model.bytesTotal > 0) {
+                    return Math.round(100 * model.bytesReceived / model.bytesTotal) + "%"
+                }
+                return (model.bytesReceived / 1048576).toFixed(1) + " MB"
+            }
+            color: model.status === "failed" ? UM.Theme.getColor("error") : UM.Theme.getColor("text_inactive")
+            renderType: Text.NativeRendering
+        }
+
+        Button
+        {
+            text: "Cancel"
+            visible: model.status === "queued" || model.status === "downloading"
+            onClicked: {
+                ThingiService.cancelDownload(model.downloadId)
+                Analytics.trackEvent("cancel_download", "button_clicked")
+            }
+        }
+
+        Button
+        {
+            text: "Retry"
+            visible: model.status === "failed" || model.status === "cancelled"
+            onClicked: {
+                ThingiService.retryDownload(model.downloadId)
+                Analytics.trackEvent("retry_download", "button_clicked")
+            }
+        }
+    }
+}
@@ -71,6 +71,19 @@ ColumnLayout
         elide: Text.ElideRight
     }
 
+    // button to queue all files of the thing at once
+    Button
+    {
+        text: "Add all files to build plate"
+        visible: thingFiles.length > 1
+        Layout.leftMargin: 20
+        Layout.bottomMargin: 10
+        onClicked: {
+            ThingiService.downloadAllThingFiles()
+            Analytics.trackEvent("add_all_to_build_plate", "button_clicked")
+        }
+    }
+
     ThingFilesList
     {
         id: thingFilesList
@@ -96,4 +109,15 @@ ColumnLayout
         Layout.fillHeight: true
         Layout.leftMargin: 20
     }
+
+    DownloadsList
+    {
+        model: ThingiService.downloads
+        visible: ThingiService.downloads.count > 0
+        Layout.fillWidth: true
+        Layout.preferredHeight: Math.min(contentHeight, 150)
+        Layout.leftMargin: 20
+        Layout.rightMargin: 20
+        Layout.bottomMargin: 20
+    }
 }
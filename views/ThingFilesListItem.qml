@@ -24,7 +24,8 @@ Item
             Layout.preferredHeight: 75
             fillMode: Image.PreserveAspectCrop
             clip: true
-            source: thingFile.thumbnail ? thingFile.thumbnail : ""
+            asynchronous: true
+            source: thingFile.thumbnail ? "image://thingithumb/" + encodeURIComponent(thingFile.thumbnail) : ""
             sourceSize.height: 75
         }
 
@@ -39,22 +40,14 @@ Item
             Layout.fillWidth: true
         }
 
-        // download button
+        // download button, files are queued when other files are still downloading
         Button
         {
             text: "Add to build plate"
-            visible: !ThingiService.isDownloading
             onClicked: {
                 ThingiService.downloadThingFile(thingFile.id, thingFile.name)
                 Analytics.trackEvent("add_to_build_plate", "button_clicked")
             }
         }
-
-        // loading spinner
-        AnimatedImage
-        {
-            visible: ThingiService.isDownloading
-            source: "images/loading.gif"
-        }
     }
 }
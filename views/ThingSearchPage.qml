@@ -22,7 +22,7 @@ ColumnLayout
     Label
     {
         text: "No results. Please try another category or search term or configure your account in the settings window."
-        visible: ThingiService.things.length == 0 && ThingiService.isQuerying == false
+        visible: ThingiService.things.count == 0 && ThingiService.isQuerying == false
         font: UM.Theme.getFont("default")
         renderType: Text.NativeRendering
         horizontalAlignment: Text.AlignHCenter
@@ -47,40 +47,18 @@ ColumnLayout
         Layout.alignment: Qt.AlignBottom
         Layout.margins: 20
 
-        Button
-        {
-            text: "Previous page"
-            visible: ThingiService.currentPage > 1 && ThingiService.things.length > 0
-            onClicked: {
-                ThingiService.previousPage()
-                Analytics.trackEvent("previous_page", "button_clicked")
-            }
-        }
-
-        // FIXME: hide when reaching last page of results (can be done now that we have 'total' in Thingiverse api)
-        Button
+        AnimatedImage
         {
-            text: "Next page"
-            visible: ThingiService.things.length > 0
-            onClicked: {
-                ThingiService.nextPage()
-                Analytics.trackEvent("next_page", "button_clicked")
-            }
+            source: "images/loading.gif"
+            visible: ThingiService.isQuerying
         }
 
         Label
         {
-            text: "Page " + ThingiService.currentPage
-            visible: ThingiService.things.length > 0
-            font: UM.Theme.getFont("medium")
-            color: UM.Theme.getColor("text")
+            text: "The server is busy, results will show up in a moment."
+            visible: ThingiService.isThrottled
+            font: UM.Theme.getFont("default")
             renderType: Text.NativeRendering
         }
-
-        AnimatedImage
-        {
-            source: "images/loading.gif"
-            visible: ThingiService.isQuerying
-        }
     }
 }
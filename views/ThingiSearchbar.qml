@@ -14,6 +14,8 @@ RowLayout
         placeholderText: "Search for things..."
         Layout.fillWidth: true
         selectByMouse: true
+        // show matching things that were seen before while typing, the remote search starts on enter
+        onTextChanged: ThingiService.searchLocal(thingSearchField.text)
         onAccepted: {
             ThingiService.search(thingSearchField.text)
             Analytics.trackEvent("search_field", "enter_pressed")
@@ -15,7 +15,7 @@ Window
     // window configuration
     color: UM.Theme.getColor("viewport_background")
     minimumWidth: 500
-    minimumHeight: 300
+    minimumHeight: 420
     width: minimumWidth
     height: minimumHeight
     title: "ThingiBrower - Settings"
@@ -50,6 +50,36 @@ Window
             }
         }
 
+        // debug panel with the plugin code that blocked the GUI thread the longest, when freeze detection is on
+        ColumnLayout
+        {
+            visible: ThingiService.stallReport.length > 0
+            Layout.fillWidth: true
+
+            Label
+            {
+                text: "Slowest parts of the plugin"
+                font: UM.Theme.getFont("default_bold")
+                color: UM.Theme.getColor("text")
+                renderType: Text.NativeRendering
+            }
+
+            Repeater
+            {
+                model: ThingiService.stallReport
+                Label
+                {
+                    text: "%1 ms total, %2x, worst %3 ms: %4".arg(Math.round(modelData.total_ms))
+                        .arg(modelData.count).arg(Math.round(modelData.max_ms)).arg(modelData.callback)
+                    font: UM.Theme.getFont("default")
+                    color: UM.Theme.getColor("text")
+                    renderType: Text.NativeRendering
+                    elide: Text.ElideRight
+                    Layout.fillWidth: true
+                }
+            }
+        }
+
         RowLayout
         {
             Item
@@ -15,6 +15,8 @@ ScrollView
         id: thingsList
         width: parent.width
         spacing: 20
+        // the next page is loaded through the model's fetchMore when scrolling near the end
+        cacheBuffer: 400
         delegate: Item
         {
             width: parent.width
@@ -23,7 +25,7 @@ ScrollView
             ThingsListItem
             {
                 width: parent.width
-                thing: modelData
+                thing: model
             }
         }
     }
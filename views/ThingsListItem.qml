@@ -12,6 +12,23 @@ Item
     height: dataRow.height
     property var thing: null
 
+    // delegates are created for the visible results, so their details can be loaded in the background
+    Component.onCompleted: prefetchDetails(false)
+
+    function prefetchDetails(urgent) {
+        if (thing.type === "Thing") {
+            ThingiService.prefetchThingDetails(thing.id, thing.source || "", urgent)
+        }
+    }
+
+    MouseArea
+    {
+        anchors.fill: parent
+        hoverEnabled: true
+        acceptedButtons: Qt.NoButton
+        onEntered: prefetchDetails(true)
+    }
+
     RowLayout
     {
         id: dataRow
@@ -26,7 +43,8 @@ Item
             Layout.leftMargin: 20
             fillMode: Image.PreserveAspectCrop
             clip: true
-            source: thing.thumbnail ? thing.thumbnail : ""
+            asynchronous: true
+            source: thing.thumbnail ? "image://thingithumb/" + encodeURIComponent(thing.thumbnail) : ""
             sourceSize.height: 75
         }
 
@@ -65,10 +83,10 @@ Item
             onClicked: {
                 switch (thing.type) {
                     case "Collection":
-                        ThingiService.showCollectionDetails(thing.id)
+                        ThingiService.showCollectionDetails(thing.id, thing.source || "")
                         break
                     case "Thing":
-                        ThingiService.showThingDetails(thing.id)
+                        ThingiService.showThingDetails(thing.id, thing.source || "")
                         break
                 }
                 Analytics.trackEvent("more_details", "button_clicked")